@@ -27,6 +27,17 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = table_registry.metadata
 
+
+def include_name(name, type_, parent_names):
+    # Tabelas com _ são internas de src.online_migration (sombra e estado de
+    # uma reconstrução em andamento), não fazem parte dos modelos
+    return not (type_ == 'table' and name.startswith('_'))
+
+
+# No SQLite, ALTER de coluna só existe recriando a tabela: o modo batch faz
+# isso. Para tabelas grandes, ver src.online_migration
+render_as_batch = config.get_main_option('sqlalchemy.url').startswith('sqlite')
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -49,6 +60,8 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
+        render_as_batch=render_as_batch,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -58,7 +71,12 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection): 
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_name=include_name,
+        render_as_batch=render_as_batch,
+    )
 
     with context.begin_transaction():
         context.run_migrations()
@@ -1,17 +1,117 @@
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.routers import auth, users
+from src import health, tracing, turnout
+from src.archive import (
+    BallotArchive,
+    default_archive_path,
+    get_ballot_archive,
+    recover,
+)
+from src.database import engine, read_engine, resolve_engines, vote_engine
+from src.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from src.profiling import ProfilingMiddleware
+from src.routers import admin, auth, elections, jobs, keys, users, votes
 from src.schemas import Message
+from src.settings import Settings
+from src.write_queue import WriteCoalescer
 
-app = FastAPI()
+settings = Settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    engines = resolve_engines(app)
+    app.state.vote_queue = None
+    if settings.VOTE_GROUP_COMMIT:
+        app.state.vote_queue = WriteCoalescer(
+            lambda: AsyncSession(engines.votes, expire_on_commit=False),
+            window=settings.VOTE_GROUP_COMMIT_WINDOW,
+            max_batch=settings.VOTE_GROUP_COMMIT_MAX_BATCH,
+        )
+        await app.state.vote_queue.start()
+
+    app.state.ballot_archive = None
+    archive_path = settings.BALLOT_ARCHIVE_PATH or default_archive_path(
+        settings.DATABASE_URL
+    )
+    # Com get_ballot_archive substituído (testes) o arquivo não é aberto nem criado
+    if archive_path is not None and get_ballot_archive not in app.dependency_overrides:
+        app.state.ballot_archive = BallotArchive(archive_path)
+        await recover(engines.read, app.state.ballot_archive)
+
+    app.state.turnout = turnout.TurnoutBroadcaster(
+        turnout.database_counter(engines.read),
+        interval=settings.TURNOUT_INTERVAL,
+        resync=settings.TURNOUT_RESYNC,
+    )
+
+    await health.warm_up(app)
+
+    yield
+
+    # Tira o worker do balanceador antes de desmontar o resto
+    app.state.ready = False
+    await app.state.turnout.stop()
+    if app.state.vote_queue is not None:
+        await app.state.vote_queue.stop()
+    if app.state.ballot_archive is not None:
+        app.state.ballot_archive.close()
+    if app.state.tracer is not None:
+        app.state.tracer.close()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+
+if settings.PROFILING_ENABLED:
+    app.add_middleware(
+        ProfilingMiddleware,
+        directory=settings.PROFILING_DIR,
+        token=settings.PROFILING_TOKEN,
+        sample_rate=settings.PROFILING_SAMPLE_RATE,
+        mode=settings.PROFILING_MODE,
+        interval=settings.PROFILING_INTERVAL,
+    )
+
+app.state.tracer = None
+if settings.TRACING_ENABLED:
+    app.state.tracer = tracing.Tracer(
+        buffer_size=settings.TRACING_BUFFER_SIZE,
+        path=settings.TRACING_FILE,
+        min_duration=settings.TRACING_MIN_DURATION,
+        max_spans=settings.TRACING_MAX_SPANS,
+    )
+    app.add_middleware(tracing.TracingMiddleware, tracer=app.state.tracer)
+    for traced_engine in (engine, read_engine, vote_engine):
+        tracing.instrument_engine(traced_engine)
 
 
 app.include_router(auth.router)
 app.include_router(users.router)
+app.include_router(votes.router)
+app.include_router(keys.router)
+app.include_router(elections.router)
+app.include_router(admin.router)
+app.include_router(jobs.router)
+app.include_router(health.router)
+app.include_router(turnout.router)
 
 
 @app.get('/', status_code=HTTPStatus.OK, response_model=Message)
 async def read_root():
     return {'message': 'Ola Mundo!'}
+
+
+@app.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+
+# Depois de todas as rotas: envolve as funções já registradas
+if settings.TRACING_ENABLED:
+    tracing.instrument_routes(app)
@@ -0,0 +1,284 @@
+"""
+Arquivo append-only das cédulas cifradas, para auditoria e reapuração.
+
+Fica ao lado do banco (database.db -> database.ballots) e recebe cada cédula
+depois do COMMIT que a tornou válida. O banco continua sendo a fonte da
+verdade: o arquivo não recebe fsync a cada voto, e o que faltar depois de
+uma queda é recuperado com backfill, que o app roda ao subir (recover).
+
+Formato (little-endian):
+    magic (8 bytes)
+    registros: tamanho do payload (u32) | crc32 (u32) | id da cédula (u64) | payload
+
+O crc32 cobre o id e o payload. Cada registro é gravado num único write com
+O_APPEND, sob um flock exclusivo compartilhado por todos os workers. Antes
+de gravar, o escritor confere os registros que entraram desde a última vez
+(tamanho e crc32): um fim incompleto ou corrompido (queda no meio da
+escrita) é cortado com ftruncate, para o próximo registro não ficar
+desalinhado, e um id que já está no arquivo não é gravado de novo. Assim o
+backfill e o append do próprio voto podem correr juntos sem duplicar
+cédulas. O leitor ignora um registro incompleto no fim e o conta em
+`truncated`.
+
+O leitor usa mmap e entrega memoryviews sobre o mapeamento, sem cópia.
+"""
+
+import logging
+import mmap
+import os
+import struct
+import threading
+import zlib
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from fastapi import Request
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.models import Ballot
+
+try:
+    import fcntl
+except ImportError:  # Windows: só um processo pode gravar no arquivo
+    fcntl = None
+
+MAGIC = b'BALLOTS1'
+RECORD = struct.Struct('<IIQ')
+BALLOT_ID = struct.Struct('<Q')
+BACKFILL_CHUNK = 500
+
+logger = logging.getLogger(__name__)
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def default_archive_path(database_url: str) -> Path | None:
+    """Caminho ao lado do banco SQLite em arquivo; None para banco em memória."""
+    url = make_url(database_url)
+    if url.get_backend_name() != 'sqlite' or url.database in {None, '', ':memory:'}:
+        return None
+    return Path(url.database).with_suffix('.ballots')
+
+
+def _checksum(ballot_id: int, payload) -> int:
+    return zlib.crc32(payload, zlib.crc32(BALLOT_ID.pack(ballot_id)))
+
+
+class BallotArchive:
+    """
+    Escritor. Uma instância por processo; o arquivo aceita vários processos.
+    Guarda em memória os ids já gravados, para não repetir cédulas.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._create()
+        self._fd = os.open(
+            self.path, os.O_RDWR | os.O_APPEND | getattr(os, 'O_BINARY', 0)
+        )
+        self._lock_fd = os.open(
+            self.path.with_name(f'{self.path.name}.lock'), os.O_RDWR | os.O_CREAT
+        )
+        # O flock vale entre processos; as threads do mesmo processo dividem
+        # o descritor e precisam do lock comum
+        self._thread_lock = threading.Lock()
+        self._ids: set[int] = set()
+        self._end = len(MAGIC)
+        with self._exclusive():
+            self._scan()
+
+    def _create(self):
+        # O link só cria o arquivo se ele não existir: o magic nunca é gravado
+        # duas vezes, mesmo com workers subindo juntos
+        if self.path.exists():
+            return
+        temporary = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        temporary.write_bytes(MAGIC)
+        try:
+            os.link(temporary, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            temporary.unlink()
+
+    @contextmanager
+    def _exclusive(self):
+        with self._thread_lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _scan(self):
+        """
+        Confere os registros gravados desde a última leitura e corta o arquivo
+        no fim do último registro completo com crc32 válido.
+        """
+        size = os.fstat(self._fd).st_size
+        if size < self._end:
+            # Encurtado por fora: confere de novo desde o começo
+            self._ids.clear()
+            self._end = len(MAGIC)
+        position = self._end
+        while position + RECORD.size <= size:
+            length, expected, ballot_id = RECORD.unpack(
+                os.pread(self._fd, RECORD.size, position)
+            )
+            start = position + RECORD.size
+            if start + length > size:
+                break
+            if _checksum(ballot_id, os.pread(self._fd, length, start)) != expected:
+                break
+            self._ids.add(ballot_id)
+            position = start + length
+        if position < size:
+            logger.warning(
+                'Truncating %d bytes of incomplete records at the end of %s',
+                size - position,
+                self.path,
+            )
+            os.ftruncate(self._fd, position)
+        self._end = position
+
+    def ids(self) -> set[int]:
+        with self._exclusive():
+            self._scan()
+            return set(self._ids)
+
+    def append(self, ballot_id: int, payload: bytes) -> bool:
+        """Grava a cédula; False se ela já estava no arquivo."""
+        record = RECORD.pack(len(payload), _checksum(ballot_id, payload), ballot_id)
+        with self._exclusive():
+            self._scan()
+            if ballot_id in self._ids:
+                return False
+            written = os.write(self._fd, record + payload)
+            if written != RECORD.size + len(payload):
+                raise ArchiveError(f'Short write on {self.path}')
+            self._ids.add(ballot_id)
+            self._end += written
+        return True
+
+    def sync(self):
+        os.fsync(self._fd)
+
+    def close(self):
+        if self._fd is not None:
+            self.sync()
+            os.close(self._fd)
+            os.close(self._lock_fd)
+            self._fd = None
+
+
+class ArchiveReader:
+    def __init__(self, path: Path, verify: bool = True):
+        self.path = Path(path)
+        self.verify = verify
+        with open(self.path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            raise ArchiveError(f'{self.path} is not a ballot archive')
+        self.truncated = 0
+        self._index: list[tuple[int, int, int]] | None = None
+
+    def index(self) -> list[tuple[int, int, int]]:
+        """(id da cédula, offset do payload, tamanho), lendo só os cabeçalhos."""
+        if self._index is not None:
+            return self._index
+
+        index = []
+        size = len(self._mmap)
+        position = len(MAGIC)
+        while position + RECORD.size <= size:
+            length, _, ballot_id = RECORD.unpack_from(self._mmap, position)
+            start = position + RECORD.size
+            if start + length > size:
+                break
+            index.append((ballot_id, start, length))
+            position = start + length
+        self.truncated = size - position
+        self._index = index
+        return index
+
+    def __len__(self) -> int:
+        return len(self.index())
+
+    def ids(self) -> list[int]:
+        return [ballot_id for ballot_id, _, _ in self.index()]
+
+    def read(self, position: int) -> tuple[int, memoryview]:
+        """Registro de número `position` (na ordem do arquivo)."""
+        ballot_id, start, length = self.index()[position]
+        payload = self._view[start : start + length]
+        if self.verify:
+            _, expected, _ = RECORD.unpack_from(self._mmap, start - RECORD.size)
+            if _checksum(ballot_id, payload) != expected:
+                raise ArchiveError(
+                    f'Checksum mismatch for ballot {ballot_id} at offset {start}'
+                )
+        return ballot_id, payload
+
+    def __iter__(self) -> Iterator[tuple[int, memoryview]]:
+        for position in range(len(self)):
+            yield self.read(position)
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
+
+
+async def backfill(session: AsyncSession, archive: BallotArchive) -> int:
+    """
+    Grava no arquivo as cédulas do banco que ainda não estão nele. Uma
+    cédula gravada ao mesmo tempo pelo append do próprio voto é pulada.
+    """
+    archived = archive.ids()
+    missing = [
+        ballot_id
+        for ballot_id in await session.scalars(select(Ballot.id).order_by(Ballot.id))
+        if ballot_id not in archived
+    ]
+    added = 0
+    for offset in range(0, len(missing), BACKFILL_CHUNK):
+        chunk = missing[offset : offset + BACKFILL_CHUNK]
+        rows = await session.execute(
+            select(Ballot.id, Ballot.ciphertext)
+            .where(Ballot.id.in_(chunk))
+            .order_by(Ballot.id)
+        )
+        for ballot_id, ciphertext in rows:
+            added += archive.append(ballot_id, ciphertext)
+    archive.sync()
+    return added
+
+
+async def recover(engine: AsyncEngine, archive: BallotArchive) -> int:
+    """
+    backfill na subida do app, para o arquivo não ficar para trás depois de
+    uma parada sem close. Uma falha só é registrada: o banco é a fonte da
+    verdade e o arquivo pode ser completado depois.
+    """
+    try:
+        async with AsyncSession(engine) as session:
+            recovered = await backfill(session, archive)
+    except Exception:  # noqa: BLE001
+        logger.exception('Backfill of %s failed', archive.path)
+        return 0
+    if recovered:
+        logger.warning('Recovered %d ballots missing from %s', recovered, archive.path)
+    return recovered
+
+
+def get_ballot_archive(request: Request) -> BallotArchive | None:
+    # None com banco em memória ou fora do lifespan do app
+    return getattr(request.app.state, 'ballot_archive', None)
@@ -0,0 +1,77 @@
+"""
+Codificação em lote de cédulas com várias disputas.
+
+Uma cédula com várias disputas (presidente, governador, ...) ocupa um único
+vetor empacotado: os candidatos de cada disputa ficam em slots consecutivos,
+na ordem das disputas, e a cédula tem exatamente um 1 por disputa. Com
+disputas de 3 e 2 candidatos, votar no segundo e no primeiro dá
+
+    [0, 1, 0 | 1, 0]
+
+e a soma das cédulas continua sendo, slot a slot, o total de cada candidato.
+
+BallotLayout monta e confere essas linhas para um lote inteiro com operações
+do NumPy, sem listas Python por disputa: encode recebe os índices escolhidos
+(uma linha por cédula, uma coluna por disputa) e validate confere uma matriz
+0/1 já montada, por exemplo vinda de fora. O CryptoService cifra as linhas
+em encrypt_ballots; a apuração decifrada volta às disputas com split.
+"""
+
+from collections.abc import Sequence
+
+import numpy as np
+
+
+class BallotError(Exception):
+    pass
+
+
+class BallotLayout:
+    def __init__(self, races: Sequence[int]):
+        """`races`: quantidade de candidatos de cada disputa, em ordem."""
+        self.races = np.asarray(races, dtype=np.int64)
+        if self.races.ndim != 1 or not self.races.size or (self.races < 1).any():
+            raise BallotError('Every race needs at least one candidate')
+        self.offsets = np.concatenate(([0], np.cumsum(self.races)[:-1]))
+        self.slots = int(self.races.sum())
+
+    def encode(self, choices: np.ndarray) -> np.ndarray:
+        """
+        Matriz (cédulas x slots) de int64 a partir dos índices escolhidos,
+        uma linha por cédula e uma coluna por disputa.
+        """
+        choices = np.asarray(choices)
+        if choices.ndim != 2 or choices.shape[1] != self.races.size:  # noqa: PLR2004
+            raise BallotError(f'Expected one choice per race ({self.races.size})')
+        if not np.issubdtype(choices.dtype, np.integer):
+            raise BallotError('Choices must be integers')
+        invalid = (choices < 0) | (choices >= self.races)
+        if invalid.any():
+            ballot, race = np.argwhere(invalid)[0]
+            raise BallotError(f'Ballot {ballot}: candidate out of range in race {race}')
+
+        ballots = np.zeros((choices.shape[0], self.slots), dtype=np.int64)
+        rows = np.arange(choices.shape[0])[:, np.newaxis]
+        ballots[rows, self.offsets + choices] = 1
+        return ballots
+
+    def validate(self, ballots: np.ndarray) -> np.ndarray:
+        """Confere que cada linha é 0/1 com um único 1 por disputa."""
+        ballots = np.asarray(ballots)
+        if ballots.ndim != 2 or ballots.shape[1] != self.slots:  # noqa: PLR2004
+            raise BallotError(f'Expected {self.slots} slots per ballot')
+        if not ((ballots == 0) | (ballots == 1)).all():
+            raise BallotError('Slots must be 0 or 1')
+        selected = np.add.reduceat(ballots, self.offsets, axis=1)
+        invalid = selected != 1
+        if invalid.any():
+            ballot, race = np.argwhere(invalid)[0]
+            raise BallotError(f'Ballot {ballot}: expected one selection in race {race}')
+        return ballots.astype(np.int64, copy=False)
+
+    def split(self, totals: Sequence[int]) -> list[list[int]]:
+        """Totais decifrados (um por slot) separados por disputa."""
+        totals = np.asarray(totals)
+        if totals.shape != (self.slots,):
+            raise BallotError(f'Expected {self.slots} totals')
+        return [part.tolist() for part in np.split(totals, self.offsets[1:])]
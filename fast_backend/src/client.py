@@ -0,0 +1,97 @@
+"""
+Cliente de votação que cifra a cédula localmente.
+
+Baixa o manifesto de /keys/public, busca cada pacote público pelo resumo
+(conferindo o SHA-256) e guarda os pacotes em `cache_dir`, então um mesmo
+pacote é baixado uma única vez. A cifragem roda no cliente com o mesmo
+CryptoService do servidor; a API só recebe a cédula pronta, valida e soma.
+
+O servidor só aceita essas cédulas com ACCEPT_CLIENT_CIPHERTEXTS ligado, o
+que é inseguro enquanto não houver prova de que a cédula é one-hot (ver
+CryptoService.import_ballot).
+
+Uso:
+    client = BallotClient('https://eleicao.example')
+    receipt = client.cast(token, candidate=2)
+"""
+
+import base64
+import hashlib
+import os
+from http import HTTPStatus
+from pathlib import Path
+
+import httpx
+
+from src.crypto import CryptoService, MultiModulusCrypto, attach
+
+DEFAULT_CACHE_DIR = Path.home() / '.cache' / 'tcc-votacao'
+
+
+class ClientError(Exception):
+    pass
+
+
+class BallotClient:
+    def __init__(
+        self,
+        base_url: str = '',
+        cache_dir: Path = DEFAULT_CACHE_DIR,
+        http: httpx.Client | None = None,
+    ):
+        self.http = http or httpx.Client(base_url=base_url)
+        self.cache_dir = Path(cache_dir)
+        self._crypto: CryptoService | MultiModulusCrypto | None = None
+        self._etag: str | None = None
+
+    def refresh(self) -> bool:
+        """Revalida o manifesto; True se as chaves mudaram."""
+        headers = {'If-None-Match': self._etag} if self._etag else {}
+        response = self.http.get('/keys/public', headers=headers)
+        if response.status_code == HTTPStatus.NOT_MODIFIED and self._crypto:
+            return False
+        response.raise_for_status()
+        manifest = response.json()
+        paths = [self._fetch(entry) for entry in manifest['bundles']]
+        self._crypto = attach(paths, manifest['slots'])
+        self._etag = response.headers.get('ETag')
+        return True
+
+    def _fetch(self, entry: dict) -> Path:
+        path = self.cache_dir / f'{entry["digest"]}.bundle'
+        if path.exists():
+            return path
+        response = self.http.get(entry['url'])
+        response.raise_for_status()
+        if hashlib.sha256(response.content).hexdigest() != entry['digest']:
+            raise ClientError(f'Key bundle {entry["digest"]} failed verification')
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        temporary.write_bytes(response.content)
+        os.replace(temporary, path)
+        return path
+
+    @property
+    def crypto(self) -> CryptoService | MultiModulusCrypto:
+        if self._crypto is None:
+            self.refresh()
+        return self._crypto
+
+    def encrypt(self, candidate: int) -> bytes:
+        return self.crypto.encrypt_vote(candidate)
+
+    def _post(self, token: str, candidate: int, idempotency_key: str | None):
+        headers = {'Authorization': f'Bearer {token}'}
+        if idempotency_key is not None:
+            headers['Idempotency-Key'] = idempotency_key
+        ballot = base64.b64encode(self.encrypt(candidate)).decode()
+        return self.http.post('/votes/', json={'ciphertext': ballot}, headers=headers)
+
+    def cast(self, token: str, candidate: int, idempotency_key: str | None = None) -> str:
+        """Cifra e envia o voto; devolve o recibo (ballot_hash)."""
+        response = self._post(token, candidate, idempotency_key)
+        # Chaves trocadas desde o último download: baixa as novas e tenta de novo
+        if response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY and self.refresh():
+            response = self._post(token, candidate, idempotency_key)
+        response.raise_for_status()
+        return response.json()['ballot_hash']
@@ -0,0 +1,93 @@
+"""
+Apuração em vários módulos de texto claro, reconstruída pelo Teorema Chinês
+do Resto.
+
+Com um único módulo t o BFV conta cada candidato módulo t: com t = 65537, o
+voto 65537 de um candidato volta a zero sem aviso. Em vez de subir t (e com
+ele os parâmetros do esquema), cada cédula é cifrada em k contextos com
+módulos primos pequenos e distintos t1..tk, e cada contexto soma sozinho. Na
+decifragem os k resíduos de cada candidato determinam o total exato desde
+que ele seja menor que t1·t2·…·tk.
+
+Os contextos são independentes, então o trabalho se divide entre eles sem
+coordenação (a reapuração distribui contexto e lote entre processos).
+
+Formato do texto cifrado composto (little-endian):
+    cabeçalho: magic (4 bytes) | quantidade de componentes (u32)
+    componente: módulo (u64) | tamanho (u32)
+    blobs, na ordem dos componentes
+"""
+
+import math
+import struct
+from collections.abc import Sequence
+
+MAGIC = b'CRT1'
+HEADER = struct.Struct('<4sI')
+COMPONENT = struct.Struct('<QI')
+
+
+class CRTError(Exception):
+    pass
+
+
+def check_moduli(moduli: Sequence[int]) -> int:
+    """Confere que os módulos são primos entre si e devolve o produto."""
+    if len(moduli) < 2:  # noqa: PLR2004
+        raise CRTError('CRT tallying needs at least two plaintext moduli')
+    for index, modulus in enumerate(moduli):
+        if modulus < 2:  # noqa: PLR2004
+            raise CRTError(f'Invalid plaintext modulus {modulus}')
+        for other in moduli[index + 1 :]:
+            if math.gcd(modulus, other) != 1:
+                raise CRTError(f'Plaintext moduli {modulus} and {other} are not coprime')
+    return math.prod(moduli)
+
+
+def reconstruct(residues: Sequence[int], moduli: Sequence[int]) -> int:
+    """Único x em [0, t1·…·tk) com x ≡ residues[i] (mod moduli[i])."""
+    product = math.prod(moduli)
+    total = 0
+    for residue, modulus in zip(residues, moduli, strict=True):
+        partial = product // modulus
+        total += residue % modulus * partial * pow(partial, -1, modulus)
+    return total % product
+
+
+def pack(components: Sequence[bytes], moduli: Sequence[int]) -> bytes:
+    header = [HEADER.pack(MAGIC, len(components))]
+    header.extend(
+        COMPONENT.pack(modulus, len(data))
+        for modulus, data in zip(moduli, components, strict=True)
+    )
+    return b''.join(header + list(components))
+
+
+def unpack(data: bytes, moduli: Sequence[int]) -> list[memoryview]:
+    """Fatias (sem cópia) de cada componente, conferindo os módulos."""
+    view = memoryview(data)
+    if len(view) < HEADER.size:
+        raise CRTError('Not a multi-modulus ciphertext')
+    magic, count = HEADER.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise CRTError('Not a multi-modulus ciphertext')
+    if count != len(moduli):
+        raise CRTError(f'Ciphertext has {count} components, expected {len(moduli)}')
+
+    offset = HEADER.size + COMPONENT.size * count
+    if offset > len(view):
+        raise CRTError('Multi-modulus ciphertext is truncated')
+    components = []
+    for index, expected in enumerate(moduli):
+        modulus, length = COMPONENT.unpack_from(
+            view, HEADER.size + index * COMPONENT.size
+        )
+        if modulus != expected:
+            raise CRTError(
+                f'Component {index} uses modulus {modulus}, expected {expected}'
+            )
+        if offset + length > len(view):
+            raise CRTError('Multi-modulus ciphertext is truncated')
+        components.append(view[offset : offset + length])
+        offset += length
+    return components
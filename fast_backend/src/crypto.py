@@ -0,0 +1,458 @@
+"""
+Serviço de criptografia homomórfica (BFV/OpenFHE) usado na apuração.
+
+Cada voto é um vetor one-hot empacotado (um slot por candidato) cifrado com
+a chave pública; a apuração é a soma homomórfica (EvalAdd) das cédulas.
+Cédulas com várias disputas são montadas e conferidas em lote por
+src.ballots e cifradas por encrypt_ballots.
+Como só há somas, o contexto usa profundidade multiplicativa mínima e não
+gera chaves de relinearização nem de rotação.
+
+Somas não consomem nível, então toda cifra é compactada (Compress) para
+uma única torre RNS logo ao ser cifrada ou lida: com profundidade 1 a cédula
+cai de 263 KB para 132 KB, e uma torre ainda comporta bem mais de 2**30
+somas. Com profundidade 0 o contexto já nasce com uma torre e anel de 4096
+(66 KB por cédula); tools.bench_ciphertext mede os tamanhos e o custo.
+
+O OpenFHE é importado sob demanda para que o app e as ferramentas que não
+tocam em criptografia carreguem sem ele.
+
+Os workers da API só cifram e somam: get_crypto lê o pacote público
+(src.keystore), gerado uma vez, e nunca carrega a chave secreta. O mesmo
+pacote é servido em /keys/public para que os clientes (src.client) cifrem
+as cédulas eles mesmos; aí o servidor só valida (import_ballot) e soma.
+
+Com FHE_PLAINTEXT_MODULI o serviço passa a ser um MultiModulusCrypto: um
+contexto por módulo, e os totais reconstruídos pelo CRT (ver src.crt).
+"""
+
+from collections.abc import Iterable
+from contextlib import contextmanager
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from src import crt
+from src.keystore import KeyBundle, write_bundle
+from src.metrics import fhe_timer
+from src.settings import Settings
+
+if TYPE_CHECKING:
+    import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: gere as chaves antes de subir os workers
+    fcntl = None
+
+CONTEXT_FILE = 'cryptocontext.bin'
+PUBLIC_KEY_FILE = 'publickey.bin'
+SECRET_KEY_FILE = 'secretkey.bin'
+BUNDLE_FILE = 'public.bundle'
+LOCK_FILE = '.lock'
+# Torres RNS mantidas nas cifras guardadas: basta uma para somar
+STORAGE_TOWERS = 1
+
+
+def _openfhe():
+    import openfhe  # noqa: PLC0415
+
+    return openfhe
+
+
+class CryptoError(Exception):
+    pass
+
+
+@contextmanager
+def _exclusive(directory: Path):
+    """Impede que workers subindo juntos gerem chaves diferentes."""
+    directory.mkdir(parents=True, exist_ok=True)
+    with open(directory / LOCK_FILE, 'ab') as handle:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+
+
+class CryptoService:  # noqa: PLR0904
+    def __init__(self, context, public_key, secret_key=None, slots: int = 8):
+        self.context = context
+        self.public_key = public_key
+        self.secret_key = secret_key
+        self.slots = slots
+        self.bundle: KeyBundle | None = None
+        # A primeira codificação de um contexto trava (deadlock no OpenFHE) se
+        # rodar numa thread diferente da que criou o contexto; feita aqui, as
+        # threads do pool do servidor podem cifrar depois
+        context.MakePackedPlaintext([0])
+
+    @classmethod
+    def generate(cls, plaintext_modulus: int, depth: int, slots: int) -> 'CryptoService':
+        fhe = _openfhe()
+        parameters = fhe.CCParamsBFVRNS()
+        parameters.SetPlaintextModulus(plaintext_modulus)
+        parameters.SetMultiplicativeDepth(depth)
+
+        context = fhe.GenCryptoContext(parameters)
+        context.Enable(fhe.PKESchemeFeature.PKE)
+        context.Enable(fhe.PKESchemeFeature.LEVELEDSHE)
+
+        key_pair = context.KeyGen()
+        return cls(context, key_pair.publicKey, key_pair.secretKey, slots)
+
+    @classmethod
+    def load(cls, directory: Path, slots: int) -> 'CryptoService':
+        fhe = _openfhe()
+        context, ok = fhe.DeserializeCryptoContext(
+            str(directory / CONTEXT_FILE), fhe.BINARY
+        )
+        if not ok:
+            raise CryptoError(f'Could not read {directory / CONTEXT_FILE}')
+        public_key, ok = fhe.DeserializePublicKey(
+            str(directory / PUBLIC_KEY_FILE), fhe.BINARY
+        )
+        if not ok:
+            raise CryptoError(f'Could not read {directory / PUBLIC_KEY_FILE}')
+
+        secret_key = None
+        if (directory / SECRET_KEY_FILE).exists():
+            secret_key, ok = fhe.DeserializePrivateKey(
+                str(directory / SECRET_KEY_FILE), fhe.BINARY
+            )
+            if not ok:
+                raise CryptoError(f'Could not read {directory / SECRET_KEY_FILE}')
+
+        return cls(context, public_key, secret_key, slots)
+
+    def save(self, directory: Path):
+        fhe = _openfhe()
+        directory.mkdir(parents=True, exist_ok=True)
+        targets = [(CONTEXT_FILE, self.context), (PUBLIC_KEY_FILE, self.public_key)]
+        if self.secret_key is not None:
+            targets.append((SECRET_KEY_FILE, self.secret_key))
+        for name, obj in targets:
+            if not fhe.SerializeToFile(str(directory / name), obj, fhe.BINARY):
+                raise CryptoError(f'Could not write {directory / name}')
+
+    @classmethod
+    def load_or_create(  # noqa: PLR0913, PLR0917
+        cls, directory: Path, plaintext_modulus: int, depth: int, slots: int
+    ) -> 'CryptoService':
+        with _exclusive(directory):
+            if (directory / CONTEXT_FILE).exists():
+                return cls.load(directory, slots)
+            service = cls.generate(plaintext_modulus, depth, slots)
+            service.save(directory)
+            return service
+
+    def export_bundle(self, path: Path):
+        """Grava o material público (sem a chave secreta) no formato do keystore."""
+        fhe = _openfhe()
+        write_bundle(
+            path,
+            {
+                'context': fhe.Serialize(self.context, fhe.BINARY),
+                'public_key': fhe.Serialize(self.public_key, fhe.BINARY),
+            },
+        )
+
+    @classmethod
+    def attach(cls, path: Path, slots: int) -> 'CryptoService':
+        """
+        Desserializa o contexto e a chave pública do pacote público.
+
+        O binding do OpenFHE só lê de bytes, então cada processo monta os
+        próprios objetos: o pacote acelera a subida dos workers (um arquivo,
+        sem gerar chaves nem ler a chave secreta), não economiza memória.
+        """
+        fhe = _openfhe()
+        bundle = KeyBundle(path)
+        context = fhe.DeserializeCryptoContextString(bytes(bundle['context']), fhe.BINARY)
+        public_key = fhe.DeserializePublicKeyString(
+            bytes(bundle['public_key']), fhe.BINARY
+        )
+        service = cls(context, public_key, slots=slots)
+        service.bundle = bundle
+        return service
+
+    @property
+    def bundles(self) -> list[KeyBundle]:
+        return [] if self.bundle is None else [self.bundle]
+
+    @staticmethod
+    def serialize(ciphertext) -> bytes:
+        fhe = _openfhe()
+        return fhe.Serialize(ciphertext, fhe.BINARY)
+
+    @staticmethod
+    def deserialize(data: bytes):
+        fhe = _openfhe()
+        with fhe_timer('deserialize'):
+            return fhe.DeserializeCiphertextString(data, fhe.BINARY)
+
+    def compact(self, ciphertext):
+        """
+        Descarta as torres RNS além de STORAGE_TOWERS. Idempotente e barato
+        numa cifra já compacta; cifras com números de torres diferentes não
+        podem ser somadas, por isso tudo o que entra passa por aqui.
+        """
+        with fhe_timer('compact'):
+            return self.context.Compress(ciphertext, STORAGE_TOWERS)
+
+    def load_compact(self, data: bytes):
+        return self.compact(self.deserialize(data))
+
+    @cached_property
+    def max_ciphertext_size(self) -> int:
+        """Tamanho de uma cédula recém-cifrada, com todas as torres."""
+        plaintext = self.context.MakePackedPlaintext([0])
+        # Folga para variações do cabeçalho da serialização
+        return (
+            len(self.serialize(self.context.Encrypt(self.public_key, plaintext))) + 1024
+        )
+
+    def import_ballot(self, data: bytes) -> bytes:
+        """
+        Valida uma cédula cifrada pelo cliente e devolve a forma que é
+        guardada (compacta). Confere formato, tamanho e a chave usada, mas não
+        o conteúdo: sem uma prova de conhecimento zero o servidor não tem
+        como saber se o vetor cifrado é mesmo one-hot, e um cliente malicioso
+        pode somar qualquer peso a qualquer candidato. Por isso o recurso vem
+        desligado (ACCEPT_CLIENT_CIPHERTEXTS) e não deve ser usado numa
+        eleição real.
+        """
+        if len(data) > self.max_ciphertext_size:
+            raise CryptoError('Ciphertext too large')
+        try:
+            ciphertext = self.deserialize(data)
+        except RuntimeError as exc:
+            raise CryptoError('Malformed ciphertext') from exc
+        if (
+            ciphertext.GetKeyTag() != self.public_key.GetKeyTag()
+            or len(ciphertext.GetElements()) != 2  # noqa: PLR2004
+        ):
+            raise CryptoError('Ciphertext was not made with the election public key')
+        return self.serialize(self.compact(ciphertext))
+
+    def encrypt_vote(self, candidate: int) -> bytes:
+        if not 0 <= candidate < self.slots:
+            raise CryptoError(f'Candidate {candidate} out of range')
+        selection = [0] * self.slots
+        selection[candidate] = 1
+        with fhe_timer('encrypt'):
+            plaintext = self.context.MakePackedPlaintext(selection)
+            ciphertext = self.context.Encrypt(self.public_key, plaintext)
+        return self.serialize(self.compact(ciphertext))
+
+    def encrypt_ballots(self, ballots: 'np.ndarray') -> list[bytes]:
+        """
+        Cifra um lote de cédulas já montadas (linhas 0/1 de src.ballots). A
+        conversão da matriz inteira para listas é uma só chamada (tolist);
+        o OpenFHE ainda codifica e cifra uma cédula por vez.
+        """
+        if ballots.ndim != 2 or ballots.shape[1] > self.slots:  # noqa: PLR2004
+            raise CryptoError(f'Ballots must fit in {self.slots} slots')
+        ciphertexts = []
+        for selection in ballots.tolist():
+            with fhe_timer('encrypt'):
+                plaintext = self.context.MakePackedPlaintext(selection)
+                ciphertext = self.context.Encrypt(self.public_key, plaintext)
+            ciphertexts.append(self.serialize(self.compact(ciphertext)))
+        return ciphertexts
+
+    def add(self, left: bytes, right: bytes) -> bytes:
+        first, second = self.load_compact(left), self.load_compact(right)
+        with fhe_timer('add'):
+            result = self.context.EvalAdd(first, second)
+        return self.serialize(result)
+
+    def accumulate(self, total, data: bytes):
+        """Soma uma cédula serializada a um total em memória (ou None)."""
+        ciphertext = self.load_compact(data)
+        if total is None:
+            return ciphertext
+        with fhe_timer('add'):
+            return self.context.EvalAdd(total, ciphertext)
+
+    def add_all(self, ciphertexts: Iterable[bytes]) -> bytes | None:
+        """
+        Soma várias cédulas em memória: cada uma é desserializada uma vez e o
+        total é serializado uma vez só, ao contrário de encadear add().
+        """
+        total = None
+        for data in ciphertexts:
+            total = self.accumulate(total, data)
+        return None if total is None else self.serialize(total)
+
+    def canonical(self, data: bytes) -> bytes:
+        """
+        Forma serializada estável de um texto cifrado.
+
+        A serialização do OpenFHE depende de como o objeto foi construído
+        (o mesmo valor calculado em memória ou vindo de bytes gera bytes
+        diferentes); depois de uma ida e volta ela se estabiliza, e dois
+        textos cifrados iguais passam a ter os mesmos bytes. A compactação
+        entra antes, para que uma cifra antiga, com todas as torres, e a sua
+        versão compacta tenham a mesma forma canônica.
+        """
+        return self.serialize(self.load_compact(data))
+
+    def decrypt(self, data: bytes) -> list[int]:
+        if self.secret_key is None:
+            raise CryptoError('Secret key not available on this node')
+        ciphertext = self.deserialize(data)
+        with fhe_timer('decrypt'):
+            plaintext = self.context.Decrypt(ciphertext, self.secret_key)
+        plaintext.SetLength(self.slots)
+        return list(plaintext.GetPackedValue())
+
+
+class MultiModulusCrypto:
+    """
+    Mesma interface do CryptoService sobre vários contextos BFV, um por
+    módulo de texto claro. Cada texto cifrado é o pacote (src.crt) das k
+    cifras da mesma cédula, e decrypt devolve os totais exatos até
+    `capacity` - 1 votos por candidato.
+
+    O binding do OpenFHE não libera o GIL, então os contextos rodam em
+    sequência dentro de um processo; o paralelismo entre contextos vem de
+    processos (tools.retally divide o trabalho por contexto e por lote).
+    """
+
+    def __init__(self, services: list[CryptoService]):
+        self.services = services
+        self.moduli = [service.context.GetPlaintextModulus() for service in services]
+        self.capacity = crt.check_moduli(self.moduli)
+        self.slots = services[0].slots
+
+    @classmethod
+    def generate(cls, moduli: list[int], depth: int, slots: int) -> 'MultiModulusCrypto':
+        return cls([CryptoService.generate(modulus, depth, slots) for modulus in moduli])
+
+    @classmethod
+    def attach(cls, paths: list[Path], slots: int) -> 'MultiModulusCrypto':
+        """Um pacote público por módulo, na ordem dos módulos."""
+        return cls([CryptoService.attach(path, slots) for path in paths])
+
+    def _unpack(self, data: bytes) -> list[memoryview]:
+        try:
+            return crt.unpack(data, self.moduli)
+        except crt.CRTError as exc:
+            raise CryptoError(str(exc)) from exc
+
+    def split(self, data: bytes) -> list[bytes]:
+        """Componentes de um texto cifrado composto, na ordem dos módulos."""
+        # O binding do OpenFHE só aceita bytes
+        return [bytes(part) for part in self._unpack(data)]
+
+    def component(self, data: bytes, index: int) -> bytes:
+        """Só o componente do contexto `index`, sem copiar os outros."""
+        return bytes(self._unpack(data)[index])
+
+    def join(self, components: list[bytes]) -> bytes:
+        return crt.pack(components, self.moduli)
+
+    @property
+    def bundles(self) -> list[KeyBundle]:
+        return [bundle for service in self.services for bundle in service.bundles]
+
+    def import_ballot(self, data: bytes) -> bytes:
+        return self.join([
+            service.import_ballot(part)
+            for service, part in zip(self.services, self.split(data))
+        ])
+
+    def encrypt_vote(self, candidate: int) -> bytes:
+        return self.join([service.encrypt_vote(candidate) for service in self.services])
+
+    def encrypt_ballots(self, ballots: 'np.ndarray') -> list[bytes]:
+        per_service = [service.encrypt_ballots(ballots) for service in self.services]
+        return [self.join(list(components)) for components in zip(*per_service)]
+
+    def add(self, left: bytes, right: bytes) -> bytes:
+        return self.join([
+            service.add(first, second)
+            for service, first, second in zip(
+                self.services, self.split(left), self.split(right)
+            )
+        ])
+
+    def add_all(self, ciphertexts: Iterable[bytes]) -> bytes | None:
+        totals = [None] * len(self.services)
+        for data in ciphertexts:
+            for index, part in enumerate(self.split(data)):
+                totals[index] = self.services[index].accumulate(totals[index], part)
+        if totals[0] is None:
+            return None
+        return self.join([
+            service.serialize(total) for service, total in zip(self.services, totals)
+        ])
+
+    def canonical(self, data: bytes) -> bytes:
+        return self.join([
+            service.canonical(part)
+            for service, part in zip(self.services, self.split(data))
+        ])
+
+    def decrypt(self, data: bytes) -> list[int]:
+        residues = [
+            service.decrypt(part)
+            for service, part in zip(self.services, self.split(data))
+        ]
+        # O BFV decifra em [-t/2, t/2); o CRT quer o resíduo em [0, t)
+        return [crt.reconstruct(slot, self.moduli) for slot in zip(*residues)]
+
+
+def key_locations(settings: Settings) -> list[tuple[int, Path, Path]]:
+    """
+    (módulo, diretório das chaves, pacote público) de cada contexto. Com
+    vários módulos cada um tem o seu subdiretório t<módulo> e o seu pacote
+    public.t<módulo>.bundle.
+    """
+    bundle = settings.FHE_KEY_BUNDLE or settings.KEYS_DIR / BUNDLE_FILE
+    if not settings.FHE_PLAINTEXT_MODULI:
+        return [(settings.FHE_PLAINTEXT_MODULUS, settings.KEYS_DIR, bundle)]
+    return [
+        (
+            modulus,
+            settings.KEYS_DIR / f't{modulus}',
+            bundle.with_name(f'{bundle.stem}.t{modulus}{bundle.suffix}'),
+        )
+        for modulus in settings.FHE_PLAINTEXT_MODULI
+    ]
+
+
+def load_secret(settings: Settings) -> CryptoService | MultiModulusCrypto:
+    """Serviço com a chave secreta, para as ferramentas de apuração."""
+    services = [
+        CryptoService.load(directory, settings.ELECTION_CANDIDATES)
+        for _, directory, _ in key_locations(settings)
+    ]
+    if settings.FHE_PLAINTEXT_MODULI:
+        return MultiModulusCrypto(services)
+    return services[0]
+
+
+def attach(paths: list[Path], slots: int) -> CryptoService | MultiModulusCrypto:
+    if len(paths) == 1:
+        return CryptoService.attach(paths[0], slots)
+    return MultiModulusCrypto.attach(paths, slots)
+
+
+@lru_cache
+def get_crypto() -> CryptoService | MultiModulusCrypto:
+    settings = Settings()
+    locations = key_locations(settings)
+    for modulus, directory, path in locations:
+        if path.exists():
+            continue
+        # Exportar duas vezes é inofensivo: as chaves são as mesmas e a troca
+        # do arquivo é atômica
+        service = CryptoService.load_or_create(
+            directory,
+            modulus,
+            settings.FHE_MULTIPLICATIVE_DEPTH,
+            settings.ELECTION_CANDIDATES,
+        )
+        service.export_bundle(path)
+    return attach([path for _, _, path in locations], settings.ELECTION_CANDIDATES)
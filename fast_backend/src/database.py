@@ -1,10 +1,139 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import asyncio
+from dataclasses import dataclass
 
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import QueuePool
+
+from .metrics import register_pool
 from .settings import Settings
 
-engine = create_async_engine(Settings().DATABASE_URL)
+settings = Settings()
+
+
+def _is_sqlite_file(url: str) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == 'sqlite' and url.database not in {
+        None,
+        '',
+        ':memory:',
+    }
+
+
+def _pragmas(engine, *statements: str):
+    @event.listens_for(engine.sync_engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+
+def create_engine_for(url: str, pool_size: int | None = None, read_only: bool = False):
+    """
+    Engine assíncrono com as configurações de SQLite do projeto.
+
+    Em arquivo, o banco usa WAL: leitores não bloqueiam o escritor nem são
+    bloqueados por ele, o que é o que permite separar leitura e escrita.
+    O engine somente leitura liga query_only em cada conexão. pool_size só
+    se aplica a pools com fila; com outro pool é ValueError, em vez de o
+    valor ser ignorado.
+    """
+    options = {}
+    if pool_size is not None:
+        parsed = make_url(url)
+        pool_class = parsed.get_dialect().get_pool_class(parsed)
+        if not issubclass(pool_class, QueuePool):
+            raise ValueError(
+                f'pool_size needs a QueuePool, {parsed.render_as_string()} uses '
+                f'{pool_class.__name__}'
+            )
+        options['pool_size'] = pool_size
+    engine = create_async_engine(url, **options)
+
+    if make_url(url).get_backend_name() == 'sqlite':
+        if read_only:
+            _pragmas(engine, 'PRAGMA query_only = ON')
+        elif _is_sqlite_file(url):
+            _pragmas(engine, 'PRAGMA journal_mode = WAL')
+    return engine
+
+
+def enable_sqlite_savepoints(engine, begin: str = 'BEGIN'):
+    """
+    O driver sqlite3 abre e fecha transações por conta própria, o que quebra
+    SAVEPOINT. Desliga esse controle e deixa o SQLAlchemy emitir o BEGIN.
+
+    Só vale para engines que escrevem em toda transação (com BEGIN IMMEDIATE):
+    num engine de uso geral, o BEGIN explícito faz leituras segurarem lock e
+    sessões que leem e depois escrevem entram em deadlock de upgrade.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine.sync_engine, 'connect')
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine.sync_engine, 'begin')
+    def do_begin(conn):
+        conn.exec_driver_sql(begin)
+
+
+engine = create_engine_for(settings.DATABASE_URL, settings.DATABASE_POOL_SIZE)
+register_pool(engine, 'write')
+
+# Engine do group commit de votos: só escreve, então já toma o lock no BEGIN
+vote_engine = create_engine_for(settings.DATABASE_URL)
+enable_sqlite_savepoints(vote_engine, begin='BEGIN IMMEDIATE')
+register_pool(vote_engine, 'votes')
+
+# Leituras pesadas (listagens, resultados) têm pool próprio e não disputam
+# conexões com as escritas
+read_engine = create_engine_for(
+    settings.READ_DATABASE_URL or settings.DATABASE_URL,
+    settings.READ_DATABASE_POOL_SIZE,
+    read_only=True,
+)
+register_pool(read_engine, 'read')
+
+
+@dataclass(frozen=True)
+class Engines:
+    write: AsyncEngine
+    read: AsyncEngine
+    votes: AsyncEngine
+
+
+def get_engines() -> Engines:
+    # O lifespan pega daqui os engines da fila de votos, do contador de
+    # comparecimento e do aquecimento; ferramentas que sobem o app contra
+    # outro banco (tools.loadtest) substituem em dependency_overrides
+    return Engines(write=engine, read=read_engine, votes=vote_engine)
+
+
+def resolve_engines(app) -> Engines:
+    return app.dependency_overrides.get(get_engines, get_engines)()
+
+
+async def warm_pool(engine, connections: int | None = None):
+    """Abre as conexões do pool de uma vez e confere cada uma com SELECT 1."""
+    pool_size = getattr(engine.pool, 'size', None)
+    count = connections or (pool_size() if pool_size else 1)
+
+    async def ping():
+        async with engine.connect() as connection:
+            await connection.execute(text('SELECT 1'))
+
+    await asyncio.gather(*(ping() for _ in range(count)))
 
 
 async def get_session():
     async with AsyncSession(engine, expire_on_commit=False) as session:
         yield session
+
+
+async def get_read_session():
+    async with AsyncSession(read_engine, expire_on_commit=False) as session:
+        yield session
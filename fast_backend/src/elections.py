@@ -0,0 +1,66 @@
+"""
+Eleição, candidatos e contadores desnormalizados.
+
+O sistema apura uma eleição por banco, como o acumulador de apuracoes: a
+linha ELECTION_ID de eleicoes. Os contadores eligible (eleitores), voted
+(eleitores que já votaram) e ballots (cédulas gravadas) são atualizados com
+UPDATE relativo (coluna + delta) na mesma transação que o voto ou a
+alteração de cadastro que os muda. Assim nunca divergem do que foi gravado, e
+o comparecimento vira a leitura de uma linha em vez de COUNT(*) sobre
+usuarios.
+
+Enquanto a eleição não existe não há o que atualizar: na criação os
+contadores partem de um COUNT, feito uma única vez. O primeiro voto cria a
+eleição com o título padrão se nenhum administrador a criou antes.
+"""
+
+from collections.abc import Sequence
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models import Ballot, Candidate, Election, User
+
+ELECTION_ID = 1
+DEFAULT_TITLE = 'Eleição'
+
+
+async def count_election(session: AsyncSession) -> dict[str, int]:
+    eligible, voted = (
+        await session.execute(
+            select(
+                func.count(User.id),
+                func.count(User.id).filter(User.statusVotacao.is_(True)),
+            )
+        )
+    ).one()
+    ballots = await session.scalar(select(func.count(Ballot.id)))
+    return {'eligible': eligible, 'voted': voted, 'ballots': ballots}
+
+
+async def adjust_counters(session: AsyncSession, **deltas: int) -> bool:
+    """Soma os deltas aos contadores; False se a eleição ainda não existe."""
+    values = {
+        name: getattr(Election, name) + delta for name, delta in deltas.items() if delta
+    }
+    if not values:
+        return True
+    result = await session.execute(
+        update(Election).where(Election.id == ELECTION_ID).values(values)
+    )
+    return result.rowcount == 1
+
+
+async def create_election(
+    session: AsyncSession, title: str = DEFAULT_TITLE, candidates: Sequence[str] = ()
+) -> Election:
+    """Cria a eleição na transação corrente, sem commit, com os contadores atuais."""
+    election = Election(id=ELECTION_ID, title=title, **await count_election(session))
+    session.add(election)
+    # Sem relationship o flush não ordena eleicoes antes de candidatos
+    await session.flush()
+    session.add_all(
+        Candidate(election_id=ELECTION_ID, slot=slot, name=name)
+        for slot, name in enumerate(candidates)
+    )
+    return election
@@ -0,0 +1,122 @@
+"""
+Aquecimento no startup e sondas de saúde.
+
+O lifespan chama warm_up antes de o servidor aceitar conexões: abre e testa
+os pools dos três engines de get_engines (menos os trocados por
+dependency_overrides), carrega o pacote de chaves e cifra uma cédula de
+teste, e roda um hash argon2. Assim a primeira requisição de um worker
+recém-criado não paga nada disso.
+
+/health/live só diz que o processo responde. /health/ready responde 503
+enquanto algum passo do aquecimento tiver falhado, durante o desligamento e
+quando o banco não responde: é a sonda que o balanceador deve usar.
+"""
+
+import asyncio
+import logging
+import time
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, FastAPI, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from src.crypto import get_crypto
+from src.database import (
+    get_engines,
+    get_read_session,
+    get_session,
+    resolve_engines,
+    warm_pool,
+)
+from src.security import get_password_hash
+from src.write_queue import get_vote_queue
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix='/health', tags=['health'])
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+
+
+async def _warm_database(app: FastAPI):
+    # Com a sessão trocada (testes) e os engines não, o engine do módulo aponta
+    # para o banco das configurações, que não é o usado: não é aberto
+    engines = resolve_engines(app)
+    overridden = app.dependency_overrides
+    await asyncio.gather(
+        *(
+            warm_pool(pool, connections)
+            for provider, pool, connections in (
+                (get_session, engines.write, None),
+                (get_read_session, engines.read, None),
+                (get_vote_queue, engines.votes, 1),
+            )
+            if get_engines in overridden or provider not in overridden
+        )
+    )
+
+
+async def _warm_crypto(app: FastAPI):
+    # Respeita os overrides para que testes e ferramentas usem o mesmo serviço
+    provider = app.dependency_overrides.get(get_crypto, get_crypto)
+    crypto = await run_in_threadpool(provider)
+    await run_in_threadpool(crypto.encrypt_vote, 0)
+
+
+async def _warm_password_hash(app: FastAPI):
+    await run_in_threadpool(get_password_hash, 'warm-up')
+
+
+WARM_UP_STEPS = {
+    'database': _warm_database,
+    'crypto': _warm_crypto,
+    'password_hash': _warm_password_hash,
+}
+
+
+async def _run_step(app: FastAPI, name: str, step) -> str:
+    start = time.perf_counter()
+    try:
+        await step(app)
+    except Exception as exc:  # noqa: BLE001
+        logger.exception('Warm-up step %s failed', name)
+        return f'{type(exc).__name__}: {exc}'
+    logger.info('Warm-up step %s took %.3fs', name, time.perf_counter() - start)
+    return 'ok'
+
+
+async def warm_up(app: FastAPI):
+    """
+    Roda os passos em paralelo (o OpenFHE e o argon2 vão para threads) e
+    guarda o resultado de cada um em app.state.warm_up.
+    """
+    results = await asyncio.gather(
+        *(_run_step(app, name, step) for name, step in WARM_UP_STEPS.items())
+    )
+    app.state.warm_up = dict(zip(WARM_UP_STEPS, results))
+    app.state.ready = all(result == 'ok' for result in results)
+
+
+@router.get('/live', status_code=HTTPStatus.OK)
+async def live():
+    return {'status': 'ok'}
+
+
+@router.get('/ready', status_code=HTTPStatus.OK)
+async def ready(request: Request, session: ReadSession):
+    checks = dict(getattr(request.app.state, 'warm_up', {}))
+    is_ready = getattr(request.app.state, 'ready', False)
+    try:
+        await session.execute(text('SELECT 1'))
+        checks['database_ping'] = 'ok'
+    except Exception as exc:  # noqa: BLE001
+        checks['database_ping'] = f'{type(exc).__name__}: {exc}'
+        is_ready = False
+
+    return JSONResponse(
+        {'status': 'ready' if is_ready else 'unavailable', 'checks': checks},
+        status_code=HTTPStatus.OK if is_ready else HTTPStatus.SERVICE_UNAVAILABLE,
+    )
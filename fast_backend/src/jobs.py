@@ -0,0 +1,233 @@
+"""
+Fila de tarefas demoradas (reapuração, decifragem do total) no SQLite.
+
+A API só grava a tarefa na tabela tarefas e responde 202; quem executa são
+processos separados (tools.worker), cada um com uma tarefa por vez. A
+concorrência do trabalho pesado fica limitada ao número de workers, e a
+fila a JOB_MAX_QUEUED tarefas pendentes ou em execução.
+
+Ciclo de uma tarefa:
+
+    pending -> running -> done | failed | cancelled
+
+Um worker toma a próxima tarefa com um UPDATE condicional (só um vence).
+Enquanto ela roda, uma thread grava o progresso e o heartbeat_at a cada
+JOB_HEARTBEAT segundos e lê o pedido de cancelamento; a função da tarefa vê
+o pedido na próxima chamada de progress(), que levanta JobCancelled. Uma
+tarefa em running sem heartbeat há JOB_STALE_AFTER segundos perdeu o worker
+e é marcada como failed.
+
+As funções de cada tipo são registradas em TASKS pelo caminho de import e
+só são importadas no worker: a API não carrega o OpenFHE por causa delas.
+"""
+
+import importlib
+import logging
+import os
+import socket
+import threading
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import Engine, create_engine, select, update
+from sqlalchemy.engine import make_url
+
+from src.models import Job, Tally
+from src.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+TASKS = {
+    'retally': 'tools.retally:retally_job',
+    'decrypt_tally': 'src.jobs:decrypt_tally',
+}
+ACTIVE = ('pending', 'running')
+FINISHED = ('done', 'failed', 'cancelled')
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def now() -> datetime:
+    # Mesmo formato do CURRENT_TIMESTAMP do SQLite: UTC, sem fuso
+    return datetime.now(tz=ZoneInfo('UTC')).replace(tzinfo=None)
+
+
+def sync_engine(database_url: str) -> Engine:
+    """Engine síncrono para o mesmo banco da API (sem o driver aiosqlite)."""
+    url = make_url(database_url)
+    if url.drivername == 'sqlite+aiosqlite':
+        url = url.set(drivername='sqlite')
+    return create_engine(url)
+
+
+def resolve(kind: str) -> Callable:
+    module, name = TASKS[kind].split(':')
+    return getattr(importlib.import_module(module), name)
+
+
+class JobContext:
+    """O que a função da tarefa recebe: banco, progresso e cancelamento."""
+
+    def __init__(self, engine: Engine, job_id: int, heartbeat: float = 2.0):
+        self.engine = engine
+        self.job_id = job_id
+        self.heartbeat = heartbeat
+        self._progress = 0.0
+        self._cancelled = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._beat, daemon=True)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def progress(self, done: float, total: float = 1.0):
+        """Registra o avanço; levanta JobCancelled se pediram o cancelamento."""
+        self._progress = min(done / total, 1.0) if total else 1.0
+        if self.cancelled:
+            raise JobCancelled
+
+    def _flush(self):
+        with self.engine.begin() as connection:
+            cancel = connection.execute(
+                update(Job)
+                .where(Job.id == self.job_id)
+                .values(progress=self._progress, heartbeat_at=now())
+                .returning(Job.cancel_requested)
+            ).scalar()
+        if cancel:
+            self._cancelled.set()
+
+    def _beat(self):
+        while not self._stopped.wait(self.heartbeat):
+            try:
+                self._flush()
+            except Exception:  # noqa: BLE001
+                logger.exception('Heartbeat failed for job %s', self.job_id)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+
+def claim(engine: Engine, worker: str) -> tuple[int, str, dict] | None:
+    """Passa a tarefa pendente mais antiga para running; None se não há."""
+    oldest = (
+        select(Job.id)
+        .where(Job.status == 'pending')
+        .order_by(Job.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    started = now()
+    with engine.begin() as connection:
+        row = connection.execute(
+            update(Job)
+            .where(Job.id == oldest, Job.status == 'pending')
+            .values(
+                status='running', worker=worker, started_at=started, heartbeat_at=started
+            )
+            .returning(Job.id, Job.kind, Job.params)
+        ).first()
+    return None if row is None else tuple(row)
+
+
+def _finish(engine: Engine, job_id: int, worker: str, **values):
+    # Só fecha a tarefa que ainda é deste worker: se recover_stale já a deu
+    # como perdida, o resultado tardio não sobrescreve o failed
+    with engine.begin() as connection:
+        result = connection.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == 'running', Job.worker == worker)
+            .values(finished_at=now(), **values)
+        )
+    if result.rowcount != 1:
+        logger.warning(
+            'Job %s is no longer running on %s; %s discarded',
+            job_id,
+            worker,
+            values['status'],
+        )
+
+
+def run(  # noqa: PLR0913, PLR0917
+    engine: Engine,
+    job_id: int,
+    kind: str,
+    params: dict,
+    worker: str,
+    heartbeat: float = 2.0,
+):
+    try:
+        with JobContext(engine, job_id, heartbeat) as context:
+            result = resolve(kind)(context, params)
+    except JobCancelled:
+        _finish(engine, job_id, worker, status='cancelled')
+    except Exception as exc:  # noqa: BLE001
+        logger.exception('Job %s (%s) failed', job_id, kind)
+        _finish(
+            engine,
+            job_id,
+            worker,
+            status='failed',
+            error=f'{type(exc).__name__}: {exc}',
+        )
+    else:
+        _finish(engine, job_id, worker, status='done', progress=1.0, result=result)
+
+
+def recover_stale(engine: Engine, stale_after: float) -> int:
+    """Marca como failed as tarefas cujo worker parou de dar sinal."""
+    with engine.begin() as connection:
+        result = connection.execute(
+            update(Job)
+            .where(
+                Job.status == 'running',
+                Job.heartbeat_at < now() - timedelta(seconds=stale_after),
+            )
+            .values(status='failed', error='Worker lost', finished_at=now())
+        )
+    return result.rowcount
+
+
+def work(database_url: str, once: bool = False, settings: Settings | None = None):
+    """Laço de um processo worker. Com once=True para quando a fila esvazia."""
+    settings = settings or Settings()
+    engine = sync_engine(database_url)
+    name = f'{socket.gethostname()}:{os.getpid()}'
+    try:
+        while True:
+            recover_stale(engine, settings.JOB_STALE_AFTER)
+            job = claim(engine, name)
+            if job is None:
+                if once:
+                    return
+                time.sleep(settings.JOB_POLL_INTERVAL)
+                continue
+            run(engine, *job, name, heartbeat=settings.JOB_HEARTBEAT)
+    finally:
+        engine.dispose()
+
+
+def decrypt_tally(context: JobContext, params: dict) -> dict:
+    """Decifra o acumulador guardado. Só roda onde está a chave secreta."""
+    from src.crypto import load_secret  # noqa: PLC0415
+    from src.voting import TALLY_ID  # noqa: PLC0415
+
+    with context.engine.connect() as connection:
+        row = connection.execute(
+            select(Tally.ciphertext, Tally.ballots).where(Tally.id == TALLY_ID)
+        ).first()
+    if row is None:
+        return {'ballots': 0, 'totals': None}
+    context.progress(0.5)
+    totals = load_secret(Settings()).decrypt(row.ciphertext)
+    return {'ballots': row.ballots, 'totals': totals}
@@ -0,0 +1,108 @@
+"""
+Pacote somente leitura com o material público do BFV (contexto, chave
+pública e, se existirem, chaves de avaliação), lido por todos os workers.
+
+O arquivo é gravado uma vez, de forma atômica, por quem gera as chaves. Cada
+worker do uvicorn o abre com mmap somente leitura e desserializa dele os
+objetos do OpenFHE, que são do próprio processo: o ganho é na subida (um
+único arquivo, sem gerar chaves nem tocar na chave secreta), não na memória
+de cada worker. FHE_KEY_BUNDLE pode apontar para um tmpfs (/dev/shm) para a
+leitura não depender do disco.
+
+Formato (little-endian):
+    cabeçalho: magic (8 bytes) | quantidade de entradas (u32)
+    entrada:   nome (16 bytes, completado com NUL) | offset (u64) | tamanho (u64)
+    blobs, na ordem das entradas
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+from pathlib import Path
+
+MAGIC = b'FHEKEYS1'
+NAME_SIZE = 16
+HEADER = struct.Struct('<8sI')
+ENTRY = struct.Struct(f'<{NAME_SIZE}sQQ')
+
+
+class KeyBundleError(Exception):
+    pass
+
+
+def write_bundle(path: Path, entries: dict[str, bytes]):
+    """Grava o pacote num arquivo temporário e o troca pelo definitivo."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    offset = HEADER.size + ENTRY.size * len(entries)
+    temporary = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    with open(temporary, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, len(entries)))
+        for name, data in entries.items():
+            encoded = name.encode()
+            if len(encoded) > NAME_SIZE:
+                raise KeyBundleError(f'Entry name too long: {name}')
+            file.write(ENTRY.pack(encoded, offset, len(data)))
+            offset += len(data)
+        for data in entries.values():
+            file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    # Quem já mapeou o arquivo antigo continua vendo o inode antigo
+    os.replace(temporary, path)
+
+
+class KeyBundle:
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        self._entries = self._read_index()
+        self._digest = None
+
+    def _read_index(self) -> dict[str, tuple[int, int]]:
+        size = len(self._mmap)
+        if size < HEADER.size:
+            raise KeyBundleError(f'{self.path} is not a key bundle')
+        magic, count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise KeyBundleError(f'{self.path} is not a key bundle')
+
+        entries = {}
+        for index in range(count):
+            position = HEADER.size + index * ENTRY.size
+            if position + ENTRY.size > size:
+                raise KeyBundleError(f'{self.path} is truncated')
+            name, offset, length = ENTRY.unpack_from(self._mmap, position)
+            if offset + length > size:
+                raise KeyBundleError(f'{self.path} is truncated')
+            entries[name.rstrip(b'\0').decode()] = (offset, length)
+        return entries
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def __getitem__(self, name: str) -> memoryview:
+        """Fatia (memoryview) do mapeamento."""
+        offset, length = self._entries[name]
+        return self._view[offset : offset + length]
+
+    def names(self) -> list[str]:
+        return list(self._entries)
+
+    @property
+    def data(self) -> memoryview:
+        """O arquivo inteiro, como é servido aos clientes (src.routers.keys)."""
+        return self._view
+
+    @property
+    def digest(self) -> str:
+        """SHA-256 do pacote inteiro, calculado uma vez."""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self._view).hexdigest()
+        return self._digest
+
+    def close(self):
+        self._view.release()
+        self._mmap.close()
@@ -0,0 +1,293 @@
+"""
+Métricas operacionais no formato texto do Prometheus.
+
+Implementação mínima e sem dependências: contadores e histogramas ficam em
+dicionários indexados pela tupla de rótulos, protegidos por um lock (o hash
+de senha e o OpenFHE podem rodar em threads). Gauges são calculados só no
+momento da coleta.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from http import HTTPStatus
+
+from src.tracing import span
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HASH_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.2, 0.4, 0.8, 1.6, 3.2)
+FHE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(names, values, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric(ABC):
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def header(self) -> list[str]:
+        return [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.kind}',
+        ]
+
+    @abstractmethod
+    def clear(self):
+        """Zera os valores registrados."""
+
+    @abstractmethod
+    def render(self) -> list[str]:
+        """Linhas do formato de texto do Prometheus, com o cabeçalho."""
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}'
+            for key, value in items
+        ]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Por rótulo: [contagens por balde (não cumulativas) + +Inf, soma]
+        self._values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def count(self, *labels) -> int:
+        entry = self._values.get(labels)
+        return sum(entry[0]) if entry else 0
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> list[str]:
+        with self._lock:
+            items = [
+                (key, list(counts), total)
+                for key, (counts, total) in self._values.items()
+            ]
+        lines = self.header()
+        bounds = [_format_value(b) for b in self.buckets] + ['+Inf']
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(self.labels, key, f'le="{bound}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labels, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class GaugeCallback(Metric):
+    """Gauge cujo valor é lido de uma função no momento da coleta."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels, collect):
+        super().__init__(name, documentation, labels)
+        self.collect = collect
+
+    def clear(self):
+        pass
+
+    def render(self) -> list[str]:
+        return self.header() + [
+            f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}'
+            for key, value in self.collect()
+        ]
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: list[Metric] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> GaugeCallback:
+        return self.register(GaugeCallback(*args, **kwargs))
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.counter(
+    'http_requests_total',
+    'Requisições HTTP atendidas.',
+    ('method', 'route', 'status'),
+)
+HTTP_REQUEST_SECONDS = registry.histogram(
+    'http_request_duration_seconds',
+    'Latência das requisições HTTP.',
+    ('method', 'route', 'status'),
+)
+PASSWORD_HASH_SECONDS = registry.histogram(
+    'password_hash_duration_seconds',
+    'Tempo gasto no argon2 para gerar ou verificar um hash.',
+    ('operation',),
+    buckets=HASH_BUCKETS,
+)
+LOGIN_REJECTIONS = registry.counter(
+    'login_rejections_total',
+    'Tentativas de login recusadas com 429, por motivo (client, account, busy).',
+    ('reason',),
+)
+FHE_OPERATIONS = registry.counter(
+    'fhe_operations_total',
+    'Operações de criptografia homomórfica executadas.',
+    ('operation',),
+)
+FHE_OPERATION_SECONDS = registry.histogram(
+    'fhe_operation_duration_seconds',
+    'Tempo de cada operação de criptografia homomórfica.',
+    ('operation',),
+    buckets=FHE_BUCKETS,
+)
+
+
+@contextmanager
+def fhe_timer(operation: str):
+    """Mede uma operação do OpenFHE (encrypt, add, decrypt, deserialize)."""
+    FHE_OPERATIONS.inc(operation)
+    with FHE_OPERATION_SECONDS.time(operation), span(f'fhe.{operation}', 'crypto'):
+        yield
+
+
+_pools: dict[str, object] = {}
+
+
+def _collect_pools():
+    for name, engine in _pools.items():
+        pool = engine.sync_engine.pool if hasattr(engine, 'sync_engine') else engine.pool
+        for state in ('size', 'checkedin', 'checkedout', 'overflow'):
+            method = getattr(pool, state, None)
+            if method is not None:
+                yield (name, state), method()
+
+
+DB_POOL_CONNECTIONS = registry.gauge(
+    'db_pool_connections',
+    'Conexões do pool do banco por estado.',
+    ('engine', 'state'),
+    _collect_pools,
+)
+
+
+def register_pool(engine, name: str = 'default'):
+    """Passa a expor a ocupação do pool de conexões de um engine SQLAlchemy."""
+    _pools[name] = engine
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro: mede cada requisição HTTP pela rota (o template,
+    como /users/{user_id}, nunca o caminho bruto) e pelo status de resposta.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        method = scope['method']
+        status = HTTPStatus.INTERNAL_SERVER_ERROR
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = scope.get('route')
+            path = route.path if route is not None else '<unmatched>'
+            HTTP_REQUESTS.inc(method, path, status)
+            HTTP_REQUEST_SECONDS.observe(elapsed, method, path, status)
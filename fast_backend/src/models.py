@@ -1,6 +1,14 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, func, text
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    ForeignKey,
+    LargeBinary,
+    UniqueConstraint,
+    func,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column, registry
 
 table_registry = registry()
@@ -26,3 +34,104 @@ class User:
         server_default=func.now(),
         onupdate=func.now(),
     )
+
+
+# jti de tokens revogados (logout e rotação do refresh token), vistos por
+# todos os workers; as linhas vencidas são apagadas nas próximas revogações
+@table_registry.mapped_as_dataclass
+class RevokedToken:
+    __tablename__ = 'tokens_revogados'
+
+    jti: Mapped[str] = mapped_column(primary_key=True)
+    expires_at: Mapped[int] = mapped_column(nullable=False, index=True)
+
+
+# Contadores desnormalizados: atualizados na mesma transação que o voto ou o
+# cadastro que os altera, para que painéis leiam uma linha em vez de COUNT(*)
+@table_registry.mapped_as_dataclass
+class Election:
+    __tablename__ = 'eleicoes'
+
+    id: Mapped[int] = mapped_column(primary_key=True, nullable=False)
+    title: Mapped[str] = mapped_column(nullable=False)
+    eligible: Mapped[int] = mapped_column(nullable=False, default=0)
+    voted: Mapped[int] = mapped_column(nullable=False, default=0)
+    ballots: Mapped[int] = mapped_column(nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, nullable=False, server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        init=False,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
+# slot é a posição do candidato no vetor da cédula cifrada
+@table_registry.mapped_as_dataclass
+class Candidate:
+    __tablename__ = 'candidatos'
+    __table_args__ = (UniqueConstraint('election_id', 'slot'),)
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True, nullable=False)
+    election_id: Mapped[int] = mapped_column(ForeignKey('eleicoes.id'), nullable=False)
+    slot: Mapped[int] = mapped_column(nullable=False)
+    name: Mapped[str] = mapped_column(nullable=False)
+
+
+# Cédula cifrada. Não guarda o eleitor: a chave de idempotência é um hash
+@table_registry.mapped_as_dataclass
+class Ballot:
+    __tablename__ = 'votos'
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True, nullable=False)
+    idempotency_key: Mapped[str] = mapped_column(nullable=False, unique=True)
+    ciphertext: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    ballot_hash: Mapped[str] = mapped_column(nullable=False)
+    election_id: Mapped[int | None] = mapped_column(
+        ForeignKey('eleicoes.id'), default=None, index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, nullable=False, server_default=func.now()
+    )
+
+
+# Acumulador homomórfico: soma (EvalAdd) de todas as cédulas
+@table_registry.mapped_as_dataclass
+class Tally:
+    __tablename__ = 'apuracoes'
+
+    id: Mapped[int] = mapped_column(primary_key=True, nullable=False)
+    ciphertext: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    ballots: Mapped[int] = mapped_column(nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        init=False,
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+
+
+# Tarefa demorada (reapuração, decifragem) executada pelos workers de src.jobs
+@table_registry.mapped_as_dataclass
+class Job:
+    __tablename__ = 'tarefas'
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True, nullable=False)
+    kind: Mapped[str] = mapped_column(nullable=False)
+    params: Mapped[dict] = mapped_column(JSON, nullable=False, default_factory=dict)
+    status: Mapped[str] = mapped_column(nullable=False, default='pending', index=True)
+    progress: Mapped[float] = mapped_column(nullable=False, default=0.0)
+    result: Mapped[dict | None] = mapped_column(JSON, default=None)
+    error: Mapped[str | None] = mapped_column(default=None)
+    cancel_requested: Mapped[bool] = mapped_column(
+        Boolean, nullable=False, default=False, server_default=text('0')
+    )
+    worker: Mapped[str | None] = mapped_column(default=None)
+    created_at: Mapped[datetime] = mapped_column(
+        init=False, nullable=False, server_default=func.now()
+    )
+    started_at: Mapped[datetime | None] = mapped_column(default=None)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(default=None)
+    finished_at: Mapped[datetime | None] = mapped_column(default=None)
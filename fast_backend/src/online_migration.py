@@ -0,0 +1,271 @@
+"""
+Reconstrução de tabelas grandes do SQLite sem travar as escritas.
+
+O SQLite não altera colunas no lugar: o modo batch do Alembic (ver
+render_as_batch em migrations/env.py) cria a tabela nova, copia tudo com um
+único INSERT ... SELECT e troca as tabelas, com o lock de escrita preso do
+começo ao fim. Com usuarios grande, isso para os votos por minutos.
+
+rebuild_table faz a mesma troca em etapas curtas:
+
+    1. cria a tabela sombra _<tabela>_nova com o esquema final e gatilhos
+       na tabela antiga que repetem nela cada INSERT, UPDATE e DELETE;
+    2. copia as linhas em lotes de `batch_size` pela chave primária, cada
+       lote numa transação própria, gravando a última chave copiada em
+       _migracao_estado: uma cópia interrompida continua de onde parou;
+    3. numa transação curta, remove os gatilhos e a tabela antiga, renomeia
+       a sombra e cria os índices.
+
+Entre os lotes o lock fica livre e a API continua gravando; os gatilhos
+levam essas escritas para a sombra com um upsert na chave primária. O lote
+copiado pula só as chaves que já estão na sombra (ON CONFLICT na chave
+primária DO NOTHING), já que uma linha escrita pelo gatilho é sempre a
+versão mais nova. Qualquer outra restrição violada no esquema novo (um
+UNIQUE, por exemplo) é IntegrityError, como no modo batch: a migração para
+em vez de descartar linhas.
+
+O esquema final é dado como em op.create_table (colunas, restrições e
+índices). As colunas novas recebem expressões SQL sobre a linha antiga
+(`expressions`); colunas sem expressão que existem na tabela antiga são
+copiadas, e as demais ficam com o server_default. A tabela precisa de uma
+chave primária inteira.
+"""
+
+import logging
+import time
+from collections.abc import Callable, Mapping, Sequence
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import SchemaItem
+
+STATE_TABLE = '_migracao_estado'
+
+Progress = Callable[[int, int], None]
+
+
+def shadow_name(table: str) -> str:
+    return f'_{table}_nova'
+
+
+def _quote(connection: Connection, name: str) -> str:
+    return connection.dialect.identifier_preparer.quote(name)
+
+
+@contextmanager
+def _atomic(connection: Connection):
+    # Em AUTOCOMMIT o driver não abre transação: o BEGIN IMMEDIATE explícito
+    # toma o lock de escrita já no início e agrupa os comandos da etapa
+    connection.exec_driver_sql('BEGIN IMMEDIATE')
+    try:
+        yield
+    except BaseException:
+        connection.exec_driver_sql('ROLLBACK')
+        raise
+    connection.exec_driver_sql('COMMIT')
+
+
+class OnlineRebuild:
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        connection: Connection,
+        table: str,
+        schema: Sequence[SchemaItem],
+        expressions: Mapping[str, str] | None = None,
+        key: str = 'id',
+    ):
+        # O autocommit_block do Alembic já entrega a conexão em AUTOCOMMIT
+        if connection.get_execution_options().get('isolation_level') != 'AUTOCOMMIT':
+            connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+        self.connection = connection
+        self.table = table
+        self.final = sa.Table(table, sa.MetaData(), *schema)
+        self.shadow = self.final.to_metadata(sa.MetaData(), name=shadow_name(table))
+        self.key = key
+
+        existing = {
+            row[1]
+            for row in self.connection.exec_driver_sql(
+                f'PRAGMA table_info({_quote(self.connection, table)})'
+            )
+        }
+        expressions = dict(expressions or {})
+        for column in self.shadow.columns:
+            if column.name not in expressions and column.name in existing:
+                expressions[column.name] = _quote(self.connection, column.name)
+        self.expressions = expressions
+
+    def _sql(self, name: str) -> str:
+        return _quote(self.connection, name)
+
+    def _select(self, where: str, conflict: str) -> str:
+        """
+        INSERT na sombra das linhas da tabela antiga que satisfazem `where`;
+        `conflict` é a ação (DO NOTHING / DO UPDATE) quando a chave já existe.
+        """
+        columns = ', '.join(self._sql(name) for name in self.expressions)
+        values = ', '.join(self.expressions.values())
+        return (
+            f'INSERT INTO {self._sql(self.shadow.name)} ({columns}) '
+            f'SELECT {values} FROM {self._sql(self.table)} WHERE {where} '
+            f'ON CONFLICT ({self._sql(self.key)}) {conflict}'
+        )
+
+    def _trigger(self, event: str) -> str:
+        return self._sql(f'{self.shadow.name}_{event.lower()}')
+
+    def _create_triggers(self):
+        table, shadow, key = (
+            self._sql(self.table),
+            self._sql(self.shadow.name),
+            self._sql(self.key),
+        )
+        assignments = ', '.join(
+            f'{self._sql(name)} = excluded.{self._sql(name)}'
+            for name in self.expressions
+            if name != self.key
+        )
+        copy_new = self._select(
+            f'{key} = NEW.{key}',
+            f'DO UPDATE SET {assignments}' if assignments else 'DO NOTHING',
+        )
+        delete_old = f'DELETE FROM {shadow} WHERE {key} = OLD.{key}'
+        for event, body in (
+            ('INSERT', f'{copy_new};'),
+            ('UPDATE', f'{delete_old}; {copy_new};'),
+            ('DELETE', f'{delete_old};'),
+        ):
+            self.connection.exec_driver_sql(
+                f'CREATE TRIGGER IF NOT EXISTS {self._trigger(event)} '
+                f'AFTER {event} ON {table} FOR EACH ROW BEGIN {body} END'
+            )
+
+    def prepare(self):
+        """Sombra, gatilhos e estado. Numa retomada, não recria nada."""
+        with _atomic(self.connection):
+            self.connection.exec_driver_sql(
+                f'CREATE TABLE IF NOT EXISTS {self._sql(STATE_TABLE)} '
+                '(table_name TEXT PRIMARY KEY, last_key INTEGER NOT NULL)'
+            )
+            # Só a tabela: os índices da sombra teriam nomes provisórios
+            self.connection.execute(
+                sa.schema.CreateTable(self.shadow, if_not_exists=True)
+            )
+            self._create_triggers()
+            self.connection.execute(
+                sa.text(
+                    f'INSERT OR IGNORE INTO {self._sql(STATE_TABLE)} '
+                    '(table_name, last_key) VALUES (:table, :start)'
+                ),
+                {'table': self.table, 'start': -(2**63)},
+            )
+
+    def _last_key(self) -> int:
+        return self.connection.execute(
+            sa.text(
+                f'SELECT last_key FROM {self._sql(STATE_TABLE)} WHERE table_name = :table'
+            ),
+            {'table': self.table},
+        ).scalar_one()
+
+    def _count(self, table: str) -> int:
+        return self.connection.exec_driver_sql(
+            f'SELECT COUNT(*) FROM {self._sql(table)}'
+        ).scalar_one()
+
+    def copy(
+        self, batch_size: int = 5000, pause: float = 0.0, progress: Progress | None = None
+    ) -> int:
+        """Copia os lotes que faltam; devolve quantas linhas copiou agora."""
+        key = self._sql(self.key)
+        last = self._last_key()
+        total = self._count(self.table)
+        done = self._count(self.shadow.name)
+        copied = 0
+        statement = sa.text(
+            self._select(
+                f'{key} > :last AND {key} <= :until ORDER BY {key}', 'DO NOTHING'
+            )
+        )
+        while True:
+            with _atomic(self.connection):
+                until = self.connection.execute(
+                    sa.text(
+                        f'SELECT MAX({key}) FROM (SELECT {key} FROM '
+                        f'{self._sql(self.table)} WHERE {key} > :last '
+                        f'ORDER BY {key} LIMIT :size)'
+                    ),
+                    {'last': last, 'size': batch_size},
+                ).scalar()
+                if until is None:
+                    return copied
+                result = self.connection.execute(
+                    statement, {'last': last, 'until': until}
+                )
+                self.connection.execute(
+                    sa.text(
+                        f'UPDATE {self._sql(STATE_TABLE)} SET last_key = :until '
+                        'WHERE table_name = :table'
+                    ),
+                    {'until': until, 'table': self.table},
+                )
+            last = until
+            copied += max(result.rowcount, 0)
+            if progress is not None:
+                progress(min(done + copied, total), total)
+            if pause:
+                time.sleep(pause)
+
+    def swap(self):
+        """Troca as tabelas. Os índices são criados aqui, já com o nome final."""
+        with _atomic(self.connection):
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                self.connection.exec_driver_sql(
+                    f'DROP TRIGGER IF EXISTS {self._trigger(event)}'
+                )
+            # Remover antes de renomear: renomear a antiga reescreveria as
+            # chaves estrangeiras das outras tabelas para o nome temporário
+            self.connection.exec_driver_sql(f'DROP TABLE {self._sql(self.table)}')
+            self.connection.exec_driver_sql(
+                f'ALTER TABLE {self._sql(self.shadow.name)} '
+                f'RENAME TO {self._sql(self.table)}'
+            )
+            for index in self.final.indexes:
+                self.connection.execute(sa.schema.CreateIndex(index))
+            self.connection.execute(
+                sa.text(
+                    f'DELETE FROM {self._sql(STATE_TABLE)} WHERE table_name = :table'
+                ),
+                {'table': self.table},
+            )
+            if not self._count(STATE_TABLE):
+                self.connection.exec_driver_sql(f'DROP TABLE {self._sql(STATE_TABLE)}')
+
+
+def rebuild_table(  # noqa: PLR0913, PLR0917
+    connection: Connection,
+    table: str,
+    schema: Sequence[SchemaItem],
+    expressions: Mapping[str, str] | None = None,
+    batch_size: int = 5000,
+    pause: float = 0.0,
+    progress: Progress | None = None,
+):
+    """
+    Reconstrói `table` com o esquema `schema` em lotes. A conexão não pode
+    estar numa transação: numa migração do Alembic, chame dentro de
+    autocommit_block, por exemplo
+
+        with op.get_context().autocommit_block():
+            rebuild_table(op.get_bind(), 'usuarios', [...], progress=log_progress)
+    """
+    rebuild = OnlineRebuild(connection, table, schema, expressions)
+    rebuild.prepare()
+    rebuild.copy(batch_size, pause, progress)
+    rebuild.swap()
+
+
+def log_progress(done: int, total: int):
+    # No logger do Alembic, que o alembic.ini já mostra em INFO
+    logging.getLogger('alembic.runtime.migration').info('Copied %d/%d rows', done, total)
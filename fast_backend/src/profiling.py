@@ -0,0 +1,158 @@
+"""
+Perfilamento sob demanda de requisições individuais.
+
+Desligado por padrão (PROFILING_ENABLED). Quando ligado, uma requisição é
+perfilada se trouxer o cabeçalho X-Profile-Token com o PROFILING_TOKEN dos
+administradores ou se for sorteada por PROFILING_SAMPLE_RATE.
+
+Modos:
+    sampling: uma thread amostra a pilha de todas as threads do processo a
+        cada PROFILING_INTERVAL segundos e grava pilhas "folded" (.folded),
+        prontas para flamegraph.pl, speedscope ou inferno. Cada pilha começa
+        pelo nome da thread, então o trabalho levado para a threadpool
+        (argon2, OpenFHE via run_in_threadpool) aparece separado do event
+        loop. É perfil de tempo de relógio: inclui espera de I/O, threads
+        ociosas e trabalho de outras requisições que dividem o processo.
+        Chamadas C aparecem atribuídas ao frame Python que as chamou.
+    deterministic: cProfile em volta da requisição, gravado como .prof
+        (pstats; abre no snakeviz e no flameprof). Mede com precisão o que
+        roda na thread do event loop, com overhead maior; o que vai para a
+        threadpool só aparece como o tempo de espera do await.
+
+Só uma requisição é perfilada por vez; as demais seguem sem perfil.
+"""
+
+import cProfile
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+HEADER = b'x-profile-token'
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    marker = filename.rfind('site-packages' + os.sep)
+    if marker != -1:
+        filename = filename[marker + len('site-packages') + 1 :]
+    name = getattr(code, 'co_qualname', code.co_name)
+    return f'{name} ({filename}:{code.co_firstlineno})'
+
+
+def fold_stack(frame) -> str:
+    """Pilha no formato folded: da raiz para a folha, separada por ';'."""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame).replace(';', ':'))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+class StackSampler:
+    """Amostra periodicamente a pilha de todas as threads, de outra thread."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.samples: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()  # noqa: SLF001
+            for thread_id, frame in frames.items():
+                if thread_id == self._thread.ident:
+                    continue
+                name = names.get(thread_id, str(thread_id)).replace(';', ':')
+                self.samples[f'{name};{fold_stack(frame)}'] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def dump(self, path: Path):
+        path.write_text(
+            ''.join(f'{stack} {count}\n' for stack, count in self.samples.items()),
+            encoding='utf-8',
+        )
+
+
+class ProfilingMiddleware:
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        app,
+        directory: Path,
+        token: str = '',
+        sample_rate: float = 0.0,
+        mode: str = 'sampling',
+        interval: float = 0.001,
+    ):
+        self.app = app
+        self.directory = Path(directory)
+        self.token = token.encode()
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.interval = interval
+        self._busy = threading.Lock()
+
+    def _wants_profile(self, scope) -> bool:
+        if self.token:
+            for name, value in scope['headers']:
+                if name == HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _output_path(self, scope, suffix: str) -> Path:
+        route = scope.get('route')
+        path = route.path if route is not None else scope['path']
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', path).strip('_') or 'root'
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        name = f'{stamp}-{time.perf_counter_ns() % 10**6:06d}-{scope["method"]}-{slug}'
+        return self.directory / f'{name}{suffix}'
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        if not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            if self.mode == 'deterministic':
+                await self._deterministic(scope, receive, send)
+            else:
+                await self._sampling(scope, receive, send)
+        finally:
+            self._busy.release()
+
+    async def _sampling(self, scope, receive, send):
+        sampler = StackSampler(self.interval)
+        sampler.start()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            sampler.stop()
+            sampler.dump(self._output_path(scope, '.folded'))
+
+    async def _deterministic(self, scope, receive, send):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.disable()
+            profiler.dump_stats(self._output_path(scope, '.prof'))
@@ -0,0 +1,155 @@
+"""
+Proteção de CPU do login.
+
+Cada tentativa em /auth/token custa uma consulta e um argon2 verify (dezenas
+de milissegundos de CPU). Três camadas, todas em memória do processo:
+
+    por cliente: token bucket por endereço; toda tentativa gasta uma ficha.
+    por conta:   token bucket por e-mail e endereço, gasto só nas falhas e
+                 consultado antes do argon2: esgotado, a tentativa vira 429
+                 sem verificar a senha. Como a chave inclui o endereço, quem
+                 inunda uma conta de outros endereços não tranca o dono do
+                 lado de fora.
+    global:      teto de verificações argon2 simultâneas (padrão: um por CPU).
+                 Acima dele a resposta é 429 imediato, sem enfileirar, e quem
+                 já está verificando não divide os núcleos com a enxurrada.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.settings import Settings
+
+
+class TokenBucketLimiter:
+    """
+    Um balde por chave com `capacity` fichas, repostas a `rate` por segundo.
+    Guarda no máximo `max_keys` chaves; as usadas há mais tempo saem primeiro.
+    """
+
+    def __init__(
+        self, rate: float, capacity: int, max_keys: int = 100_000, clock=time.monotonic
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _tokens(self, key: str, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def _store(self, key: str, tokens: float, now: float):
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def _wait(self, tokens: float) -> float:
+        if self.rate <= 0:
+            return float('inf')
+        return (1 - tokens) / self.rate
+
+    def retry_after(self, key: str) -> float:
+        """Segundos até haver uma ficha; 0 se já há. Não gasta nada."""
+        with self._lock:
+            tokens = self._tokens(key, self.clock())
+        return 0.0 if tokens >= 1 else self._wait(tokens)
+
+    def acquire(self, key: str) -> float:
+        """Gasta uma ficha se houver e devolve 0; senão, os segundos de espera."""
+        with self._lock:
+            now = self.clock()
+            tokens = self._tokens(key, now)
+            if tokens < 1:
+                return self._wait(tokens)
+            self._store(key, tokens - 1, now)
+            return 0.0
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class ConcurrencyCap:
+    """Semáforo que nunca espera: try_acquire falha na hora se está cheio."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self.active >= self.limit:
+                return False
+            self.active += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.active -= 1
+
+
+class LoginGuard:
+    def __init__(
+        self,
+        clients: TokenBucketLimiter | None,
+        accounts: TokenBucketLimiter | None,
+        verifications: ConcurrencyCap,
+    ):
+        self.clients = clients
+        self.accounts = accounts
+        self.verifications = verifications
+
+    def admit(self, client: str) -> float:
+        """0 se o cliente pode tentar; senão a espera em segundos."""
+        if self.clients is None:
+            return 0.0
+        return self.clients.acquire(client)
+
+    @staticmethod
+    def _account_key(account: str, client: str) -> str:
+        return f'{account}\n{client}'
+
+    def locked(self, account: str, client: str) -> float:
+        """Espera em segundos se a conta está trancada para o cliente; senão 0."""
+        if self.accounts is None:
+            return 0.0
+        return self.accounts.retry_after(self._account_key(account, client))
+
+    def failed(self, account: str, client: str) -> float:
+        """Gasta uma ficha da conta; sem fichas, devolve a espera em segundos."""
+        if self.accounts is None:
+            return 0.0
+        return self.accounts.acquire(self._account_key(account, client))
+
+    def clear(self):
+        for limiter in (self.clients, self.accounts):
+            if limiter is not None:
+                limiter.clear()
+
+
+def build_login_guard(settings: Settings) -> LoginGuard:
+    return LoginGuard(
+        clients=TokenBucketLimiter(
+            settings.LOGIN_CLIENT_RATE, settings.LOGIN_CLIENT_BURST
+        ),
+        accounts=TokenBucketLimiter(
+            settings.LOGIN_ACCOUNT_RATE, settings.LOGIN_ACCOUNT_BURST
+        ),
+        verifications=ConcurrencyCap(
+            settings.LOGIN_MAX_VERIFICATIONS or os.cpu_count() or 1
+        ),
+    )
+
+
+login_guard = build_login_guard(Settings())
+
+
+def get_login_guard() -> LoginGuard:
+    return login_guard
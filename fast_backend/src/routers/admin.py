@@ -0,0 +1,124 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+from typing import Annotated, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_read_session
+from src.models import User
+from src.routers.users import PUBLIC_COLUMNS
+from src.security import get_current_admin
+from src.settings import Settings
+from src.tracing import Tracer
+
+router = APIRouter(
+    prefix='/admin', tags=['admin'], dependencies=[Depends(get_current_admin)]
+)
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+ExportFormat = Annotated[Literal['ndjson', 'csv'], Query(alias='format')]
+
+settings = Settings()
+
+MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+
+# json.dumps com argumentos fora do padrão monta um encoder novo a cada chamada
+_encode_json = json.JSONEncoder(ensure_ascii=False).encode
+_EXPORT_KEYS = tuple(column.key for column in PUBLIC_COLUMNS)
+
+
+def _ndjson(rows) -> bytes:
+    return ''.join(
+        _encode_json(dict(zip(_EXPORT_KEYS, row))) + '\n' for row in rows
+    ).encode()
+
+
+def _csv(rows) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+async def _stream_rows(session: AsyncSession, statement, encode, header: bytes = b''):
+    """
+    Lê com cursor do lado do servidor, um lote de EXPORT_BATCH_SIZE linhas por
+    vez, e codifica cada lote num único pedaço da resposta: a memória fica
+    constante qualquer que seja o tamanho da tabela.
+    """
+    if header:
+        yield header
+    result = await session.stream(
+        statement.execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+    )
+    async for rows in result.partitions():
+        yield encode(rows)
+
+
+@router.get('/export/users', status_code=HTTPStatus.OK)
+async def export_users(
+    session: ReadSession,
+    export_format: ExportFormat = 'ndjson',
+    voted: bool | None = None,
+):
+    """Cadastro de eleitores completo; com voted=true, a lista de comparecimento."""
+    statement = select(*PUBLIC_COLUMNS).order_by(User.id)
+    if voted is not None:
+        statement = statement.where(User.statusVotacao.is_(voted))
+
+    if export_format == 'csv':
+        header = ','.join(_EXPORT_KEYS) + '\r\n'
+        body = _stream_rows(session, statement, _csv, header.encode())
+    else:
+        body = _stream_rows(session, statement, _ndjson)
+
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename="users.{export_format}"'},
+    )
+
+
+def get_tracer(request: Request) -> Tracer | None:
+    return getattr(request.app.state, 'tracer', None)
+
+
+CurrentTracer = Annotated[Tracer | None, Depends(get_tracer)]
+
+
+def _require(tracer: Tracer | None) -> Tracer:
+    if tracer is None:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail='Tracing disabled'
+        )
+    return tracer
+
+
+@router.get('/traces', status_code=HTTPStatus.OK)
+async def list_traces(
+    tracer: CurrentTracer,
+    limit: Annotated[int, Query(ge=1, le=1000)] = 50,
+    min_duration_ms: float = 0.0,
+):
+    """Traces recentes (src.tracing), do mais novo para o mais antigo."""
+    traces = [
+        trace
+        for trace in _require(tracer).buffer.snapshot()
+        if trace['duration_ms'] >= min_duration_ms
+    ]
+    return {'traces': traces[:limit]}
+
+
+@router.get('/traces/{trace_id}', status_code=HTTPStatus.OK)
+async def get_trace(trace_id: str, tracer: CurrentTracer):
+    trace = _require(tracer).buffer.get(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Trace not found')
+    return trace
@@ -1,17 +1,26 @@
+import math
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from src.database import get_session
+from src.metrics import LOGIN_REJECTIONS
 from src.models import User
-from src.schemas import Token
+from src.ratelimit import LoginGuard, get_login_guard
+from src.schemas import Message, Token
 from src.security import (
     create_access_token,
-    get_current_user,
+    create_refresh_token,
+    credentials_exception,
+    decode_token,
+    load_token_user,
+    oauth2_scheme,
+    revoke_token,
     verify_password,
 )
 
@@ -19,32 +28,97 @@ router = APIRouter(prefix='/auth', tags=['auth'])
 
 OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+BearerToken = Annotated[str, Depends(oauth2_scheme)]
+Guard = Annotated[LoginGuard, Depends(get_login_guard)]
+
+MAX_RETRY_AFTER = 3600
+
+
+def too_many_requests(reason: str, retry_after: float) -> HTTPException:
+    LOGIN_REJECTIONS.inc(reason)
+    return HTTPException(
+        status_code=HTTPStatus.TOO_MANY_REQUESTS,
+        detail='Too many login attempts',
+        headers={
+            'Retry-After': str(max(math.ceil(min(retry_after, MAX_RETRY_AFTER)), 1))
+        },
+    )
+
+
+def login_failed(guard: LoginGuard, account: str, client: str) -> HTTPException:
+    retry_after = guard.failed(account, client)
+    if retry_after:
+        return too_many_requests('account', retry_after)
+    return HTTPException(
+        status_code=HTTPStatus.UNAUTHORIZED,
+        detail='Incorrect email or password',
+    )
 
 
 @router.post('/token', response_model=Token)
-async def login_for_access_token(form_data: OAuth2Form, session: Session):
+async def login_for_access_token(
+    form_data: OAuth2Form, session: Session, guard: Guard, request: Request
+):
+    account = form_data.username.lower()
+    client = request.client.host if request.client else ''
+    retry_after = guard.admit(client)
+    if retry_after:
+        raise too_many_requests('client', retry_after)
+    # Conta trancada para este cliente: 429 antes da consulta e do argon2
+    retry_after = guard.locked(account, client)
+    if retry_after:
+        raise too_many_requests('account', retry_after)
+
     user = await session.scalar(select(User).where(User.email == form_data.username))
 
     if not user:
-        raise HTTPException(
-            status_code=HTTPStatus.UNAUTHORIZED,
-            detail='Incorrect email or password',
-        )
+        raise login_failed(guard, account, client)
 
-    if not verify_password(form_data.password, user.password):
-        raise HTTPException(
-            status_code=HTTPStatus.UNAUTHORIZED,
-            detail='Incorrect email or password',
+    if not guard.verifications.try_acquire():
+        raise too_many_requests('busy', 1)
+    try:
+        # O argon2 solta a GIL: na threadpool ele não trava o event loop
+        valid = await run_in_threadpool(
+            verify_password, form_data.password, user.password
         )
+    finally:
+        guard.verifications.release()
 
-    access_token = create_access_token(data={'sub': user.email})
+    if not valid:
+        raise login_failed(guard, account, client)
 
-    return {'access_token': access_token, 'token_type': 'bearer'}
+    return {
+        'access_token': create_access_token(data={'sub': user.email}),
+        'refresh_token': create_refresh_token(data={'sub': user.email}),
+        'token_type': 'bearer',
+    }
 
 
 @router.post('/refresh_token', response_model=Token)
-async def refresh_access_token(user: CurrentUser):
-    new_access_token = create_access_token(data={'sub': user.email})
+async def refresh_access_token(token: BearerToken, session: Session):
+    """
+    Com um refresh token, devolve também um novo e revoga o usado (rotação);
+    com um token de acesso, só renova o acesso. Confere no banco que o
+    usuário existe e que o token não foi revogado em nenhum worker.
+    """
+    claims = decode_token(token)
+    await load_token_user(session, claims)
+    response = {
+        'access_token': create_access_token(data={'sub': claims['sub']}),
+        'token_type': 'bearer',
+    }
+    if claims.get('typ') == 'refresh':
+        # Dois refresh simultâneos com o mesmo token: só o primeiro revoga
+        if not await revoke_token(session, claims):
+            raise credentials_exception
+        response['refresh_token'] = create_refresh_token(data={'sub': claims['sub']})
+    return response
+
 
-    return {'access_token': new_access_token, 'token_type': 'bearer'}
+@router.post('/logout', response_model=Message)
+async def logout(token: BearerToken, session: Session):
+    """Revoga o token enviado, de acesso ou de refresh, até ele expirar."""
+    claims = decode_token(token)
+    if claims.get('jti'):
+        await revoke_token(session, claims)
+    return {'message': 'Token revoked'}
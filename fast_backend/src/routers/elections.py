@@ -0,0 +1,92 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_read_session, get_session
+from src.elections import ELECTION_ID, create_election
+from src.models import Candidate, Election
+from src.schemas import CandidatoPublic, CandidatoSchema, ElectionPublic, ElectionSchema
+from src.security import get_current_admin
+from src.settings import Settings
+
+router = APIRouter(prefix='/elections', tags=['elections'])
+Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+Admin = [Depends(get_current_admin)]
+
+settings = Settings()
+
+
+async def _election_view(session: AsyncSession, election: Election) -> dict:
+    candidates = await session.scalars(
+        select(Candidate)
+        .where(Candidate.election_id == election.id)
+        .order_by(Candidate.slot)
+    )
+    return {
+        'id': election.id,
+        'title': election.title,
+        'eligible': election.eligible,
+        'voted': election.voted,
+        'ballots': election.ballots,
+        'turnout': election.voted / election.eligible if election.eligible else 0.0,
+        'candidates': candidates.all(),
+    }
+
+
+@router.post(
+    '/',
+    status_code=HTTPStatus.CREATED,
+    response_model=ElectionPublic,
+    dependencies=Admin,
+)
+async def create(election: ElectionSchema, session: Session):
+    if len(election.candidates) > settings.ELECTION_CANDIDATES:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail='Too many candidates'
+        )
+    if await session.get(Election, ELECTION_ID):
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT, detail='Election already exists'
+        )
+
+    db_election = await create_election(session, election.title, election.candidates)
+    await session.commit()
+    await session.refresh(db_election)
+    return await _election_view(session, db_election)
+
+
+@router.get('/{election_id}', status_code=HTTPStatus.OK, response_model=ElectionPublic)
+async def get_election(election_id: int, session: ReadSession):
+    """Os contadores vêm prontos da linha da eleição: nenhum COUNT por leitura."""
+    db_election = await session.get(Election, election_id)
+    if not db_election:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Election not found')
+    return await _election_view(session, db_election)
+
+
+@router.post(
+    '/{election_id}/candidates',
+    status_code=HTTPStatus.CREATED,
+    response_model=CandidatoPublic,
+    dependencies=Admin,
+)
+async def add_candidate(election_id: int, candidate: CandidatoSchema, session: Session):
+    if not await session.get(Election, election_id):
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Election not found')
+    slots = await session.scalar(
+        select(func.count(Candidate.id)).where(Candidate.election_id == election_id)
+    )
+    if slots >= settings.ELECTION_CANDIDATES:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail='Too many candidates'
+        )
+
+    db_candidate = Candidate(election_id=election_id, slot=slots, name=candidate.name)
+    session.add(db_candidate)
+    await session.commit()
+    await session.refresh(db_candidate)
+    return db_candidate
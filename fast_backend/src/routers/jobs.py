@@ -0,0 +1,101 @@
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import JSON, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import get_read_session, get_session
+from src.jobs import ACTIVE, TASKS, now
+from src.models import Job
+from src.schemas import FilterJobs, JobCreate, JobList, JobPublic
+from src.security import get_current_admin
+from src.settings import Settings
+
+router = APIRouter(
+    prefix='/admin/jobs', tags=['jobs'], dependencies=[Depends(get_current_admin)]
+)
+Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+
+settings = Settings()
+
+
+@router.post('/', status_code=HTTPStatus.ACCEPTED, response_model=JobPublic)
+async def create_job(job: JobCreate, session: Session):
+    """Enfileira a tarefa; quem executa é um processo de tools.worker."""
+    if job.kind not in TASKS:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=f'Unknown job kind: {job.kind}',
+        )
+    # Contagem e INSERT num só comando: duas requisições simultâneas não
+    # passam as duas pela última vaga
+    active = select(func.count(Job.id)).where(Job.status.in_(ACTIVE)).scalar_subquery()
+    job_id = await session.scalar(
+        insert(Job)
+        .from_select(
+            ['kind', 'params'],
+            select(literal(job.kind), literal(job.params, JSON)).where(
+                active < settings.JOB_MAX_QUEUED
+            ),
+        )
+        .returning(Job.id)
+    )
+    if job_id is None:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail='Job queue is full'
+        )
+    await session.commit()
+    db_job = await session.get(Job, job_id)
+    return db_job
+
+
+@router.get('/', status_code=HTTPStatus.OK, response_model=JobList)
+async def list_jobs(session: ReadSession, filter_jobs: Annotated[FilterJobs, Query()]):
+    statement = select(Job).order_by(Job.id.desc())
+    if filter_jobs.status is not None:
+        statement = statement.where(Job.status == filter_jobs.status)
+    jobs = await session.scalars(
+        statement.offset(filter_jobs.offset).limit(filter_jobs.limit)
+    )
+    return {'jobs': jobs.all()}
+
+
+@router.get('/{job_id}', status_code=HTTPStatus.OK, response_model=JobPublic)
+async def get_job(job_id: int, session: ReadSession):
+    db_job = await session.scalar(select(Job).where(Job.id == job_id))
+    if not db_job:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Job not found')
+    return db_job
+
+
+@router.post('/{job_id}/cancel', status_code=HTTPStatus.OK, response_model=JobPublic)
+async def cancel_job(job_id: int, session: Session):
+    """
+    Pendente: cancela na hora. Em execução: só marca o pedido, que o worker
+    vê no próximo heartbeat. Os UPDATEs são condicionais porque o worker pode
+    tomar ou terminar a tarefa entre a leitura e a escrita.
+    """
+    db_job = await session.scalar(select(Job).where(Job.id == job_id))
+    if not db_job:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Job not found')
+
+    cancelled = await session.execute(
+        update(Job)
+        .where(Job.id == job_id, Job.status == 'pending')
+        .values(status='cancelled', cancel_requested=True, finished_at=now())
+    )
+    if not cancelled.rowcount:
+        requested = await session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == 'running')
+            .values(cancel_requested=True)
+        )
+        if not requested.rowcount:
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT, detail='Job already finished'
+            )
+    await session.commit()
+    await session.refresh(db_job)
+    return db_job
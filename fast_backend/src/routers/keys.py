@@ -0,0 +1,90 @@
+"""
+Distribuição do material público do BFV para a cifragem no cliente.
+
+/keys/public é um manifesto pequeno com o resumo SHA-256 de cada pacote
+(um por contexto; vários na apuração por CRT). Ele muda quando as chaves
+mudam, então é revalidado a cada uso, com ETag e 304. Cada pacote é servido
+em /keys/public/{resumo}: o endereço muda junto com o conteúdo, e a resposta
+pode ficar em cache (navegador, CDN) por um ano sem revalidação.
+
+Os bytes saem direto do mapeamento do keystore, sem ler o arquivo de novo.
+"""
+
+import hashlib
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+
+from src.crypto import CryptoService, MultiModulusCrypto, get_crypto
+
+router = APIRouter(prefix='/keys', tags=['keys'])
+Crypto = Annotated[CryptoService | MultiModulusCrypto, Depends(get_crypto)]
+IfNoneMatch = Annotated[str | None, Header()]
+
+MANIFEST_CACHE = 'no-cache'
+BUNDLE_CACHE = 'public, max-age=31536000, immutable'
+
+
+def _etag(value: str) -> str:
+    return f'"{value}"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    candidates = {item.strip().removeprefix('W/') for item in if_none_match.split(',')}
+    return '*' in candidates or etag in candidates
+
+
+def _not_modified(etag: str, cache_control: str) -> Response:
+    return Response(
+        status_code=HTTPStatus.NOT_MODIFIED,
+        headers={'ETag': etag, 'Cache-Control': cache_control},
+    )
+
+
+@router.get('/public')
+async def public_manifest(
+    request: Request, crypto: Crypto, if_none_match: IfNoneMatch = None
+):
+    bundles = crypto.bundles
+    if not bundles:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='Public key not available'
+        )
+    digests = [bundle.digest for bundle in bundles]
+    etag = _etag(
+        hashlib.sha256(f'{crypto.slots}:{",".join(digests)}'.encode()).hexdigest()
+    )
+    if _matches(if_none_match, etag):
+        return _not_modified(etag, MANIFEST_CACHE)
+
+    manifest = {
+        'slots': crypto.slots,
+        'bundles': [
+            {
+                'digest': bundle.digest,
+                'size': len(bundle.data),
+                'url': request.app.url_path_for('public_bundle', digest=bundle.digest),
+            }
+            for bundle in bundles
+        ],
+    }
+    return JSONResponse(manifest, headers={'ETag': etag, 'Cache-Control': MANIFEST_CACHE})
+
+
+@router.get('/public/{digest}', name='public_bundle')
+async def public_bundle(digest: str, crypto: Crypto, if_none_match: IfNoneMatch = None):
+    bundle = next((b for b in crypto.bundles if b.digest == digest), None)
+    if bundle is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Unknown key bundle')
+    etag = _etag(digest)
+    if _matches(if_none_match, etag):
+        return _not_modified(etag, BUNDLE_CACHE)
+    return Response(
+        bundle.data,
+        media_type='application/octet-stream',
+        headers={'ETag': etag, 'Cache-Control': BUNDLE_CACHE},
+    )
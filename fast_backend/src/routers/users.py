@@ -1,23 +1,60 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from pydantic import TypeAdapter
+from sqlalchemy import delete, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import get_session
+from src.database import get_read_session, get_session
+from src.elections import adjust_counters
 from src.models import User
-from src.schemas import FilterPage, Message, UserList, UserPublic, UserSchema
-from src.security import get_current_user, get_password_hash
+from src.schemas import (
+    FilterPage,
+    Message,
+    UserList,
+    UserPublic,
+    UserRecordList,
+    UserSchema,
+)
+from src.security import get_current_user, get_password_hash, is_admin_email
 
 router = APIRouter(prefix='/users', tags=['users'])
 Session = Annotated[AsyncSession, Depends(get_session)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
+# Valida a página inteira de uma vez e serializa direto para JSON no pydantic-core
+user_list_adapter = TypeAdapter(UserRecordList)
+PUBLIC_COLUMNS = (User.id, User.username, User.email, User.statusVotacao)
+
+
+def _check_voting_status(user: UserSchema, current_user: User):
+    """
+    statusVotacao só muda pelo voto (src.voting): voltar para False liberaria
+    uma segunda cédula do mesmo eleitor.
+    """
+    if user.statusVotacao != current_user.statusVotacao:
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN,
+            detail='Voting status cannot be changed',
+        )
+
+
+def _check_admin_email(email: str | None, current_email: str | None = None):
+    """
+    E-mails de ADMIN_EMAILS não são cadastrados nem assumidos pela API: quem
+    chegasse primeiro a um deles ganharia acesso administrativo.
+    """
+    if email is not None and email != current_email and is_admin_email(email):
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Email is reserved')
+
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
 async def create_user(user: UserSchema, session: Session):
+    _check_admin_email(user.email)
+
     db_user = await session.scalar(
         select(User).where((User.username == user.username) | (User.email == user.email))
     )
@@ -43,6 +80,7 @@ async def create_user(user: UserSchema, session: Session):
         statusVotacao=user.statusVotacao,
     )
     session.add(db_user)
+    await adjust_counters(session, eligible=1, voted=int(user.statusVotacao))
     await session.commit()
     await session.refresh(db_user)
 
@@ -50,16 +88,20 @@ async def create_user(user: UserSchema, session: Session):
 
 
 @router.get('/', status_code=HTTPStatus.OK, response_model=UserList)
-async def get_users(session: Session, filter_users: Annotated[FilterPage, Query()]):
-    query = await session.scalars(
-        select(User).offset(filter_users.offset).limit(filter_users.limit)
+async def get_users(session: ReadSession, filter_users: Annotated[FilterPage, Query()]):
+    result = await session.execute(
+        select(*PUBLIC_COLUMNS).offset(filter_users.offset).limit(filter_users.limit)
+    )
+    users = user_list_adapter.validate_python(
+        {'users': result.all()}, from_attributes=True
+    )
+    return Response(
+        content=user_list_adapter.dump_json(users), media_type='application/json'
     )
-    users = query.all()
-    return {'users': users}
 
 
 @router.get('/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic)
-async def get_user_by_id(user_id: int, session: Session):
+async def get_user_by_id(user_id: int, session: ReadSession):
     db_user = await session.scalar(select(User).where(User.id == user_id))
     if not db_user:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='User not found')
@@ -78,11 +120,13 @@ async def update_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
 
+    _check_voting_status(user, current_user)
+    _check_admin_email(user.email, current_user.email)
+
     try:
         current_user.username = user.username
         current_user.password = get_password_hash(user.password)
         current_user.email = user.email
-        current_user.statusVotacao = user.statusVotacao
         await session.commit()
         await session.refresh(current_user)
 
@@ -107,6 +151,9 @@ async def update_user_partial(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
 
+    _check_voting_status(user, current_user)
+    _check_admin_email(user.email, current_user.email)
+
     try:
         if user.username is not None:
             current_user.username = user.username
@@ -114,8 +161,6 @@ async def update_user_partial(
             current_user.password = get_password_hash(user.password)
         if user.email is not None:
             current_user.email = user.email
-        if user.statusVotacao is not None:
-            current_user.statusVotacao = user.statusVotacao
         await session.commit()
         await session.refresh(current_user)
 
@@ -138,7 +183,18 @@ async def delete_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
 
-    await session.delete(current_user)
+    # A cédula de quem votou segue na apuração: apagar a conta baixaria
+    # `voted` e um novo cadastro da mesma pessoa liberaria um segundo voto
+    result = await session.execute(
+        delete(User).where(User.id == user_id, User.statusVotacao.is_(False))
+    )
+    if result.rowcount != 1:
+        await session.rollback()
+        raise HTTPException(
+            status_code=HTTPStatus.CONFLICT,
+            detail='Users who have voted cannot be deleted',
+        )
+    await adjust_counters(session, eligible=-1)
     await session.commit()
 
     return {'message': 'User deleted'}
@@ -0,0 +1,101 @@
+import secrets
+from functools import partial
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from src.archive import BallotArchive, get_ballot_archive
+from src.crypto import CryptoError, CryptoService, MultiModulusCrypto, get_crypto
+from src.database import get_session
+from src.models import User
+from src.schemas import VoteReceipt, VoteSchema
+from src.security import get_current_user
+from src.settings import Settings
+from src.turnout import Turnout
+from src.voting import AlreadyVotedError, find_receipt, idempotency_hash, record_vote
+from src.write_queue import WriteCoalescer, get_vote_queue
+
+router = APIRouter(prefix='/votes', tags=['votes'])
+Session = Annotated[AsyncSession, Depends(get_session)]
+CurrentUser = Annotated[User, Depends(get_current_user)]
+Crypto = Annotated[CryptoService | MultiModulusCrypto, Depends(get_crypto)]
+VoteQueue = Annotated[WriteCoalescer | None, Depends(get_vote_queue)]
+Archive = Annotated[BallotArchive | None, Depends(get_ballot_archive)]
+IdempotencyKey = Annotated[str | None, Header(max_length=128)]
+
+settings = Settings()
+
+
+async def _ballot(vote: VoteSchema, crypto) -> bytes:
+    """Cédula a guardar: a do cliente, validada, ou cifrada aqui."""
+    if vote.candidate is not None:
+        return await run_in_threadpool(crypto.encrypt_vote, vote.candidate)
+    try:
+        return await run_in_threadpool(crypto.import_ballot, vote.ciphertext)
+    except CryptoError as exc:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(exc)
+        ) from exc
+
+
+@router.post('/', status_code=HTTPStatus.CREATED, response_model=VoteReceipt)
+async def cast_vote(  # noqa: PLR0913, PLR0917
+    vote: VoteSchema,
+    session: Session,
+    current_user: CurrentUser,
+    crypto: Crypto,
+    queue: VoteQueue,
+    archive: Archive,
+    turnout: Turnout,
+    response: Response,
+    idempotency_key: IdempotencyKey = None,
+):
+    if vote.candidate is not None and vote.candidate >= crypto.slots:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail='Invalid candidate'
+        )
+    if vote.ciphertext is not None and not settings.ACCEPT_CLIENT_CIPHERTEXTS:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail='Client-side encryption is disabled',
+        )
+
+    key_hash = idempotency_hash(current_user.id, idempotency_key or secrets.token_hex(16))
+
+    try:
+        if current_user.statusVotacao:
+            raise AlreadyVotedError
+        ciphertext = await _ballot(vote, crypto)
+        operation = partial(
+            record_vote,
+            crypto=crypto,
+            user_id=current_user.id,
+            key_hash=key_hash,
+            ciphertext=ciphertext,
+        )
+        if queue is None:
+            ballot = await operation(session)
+            await session.commit()
+        else:
+            # Encerra a transação de leitura da requisição antes de esperar o
+            # lote: ela não pode segurar lock enquanto o COMMIT do lote roda
+            await session.commit()
+            ballot = await queue.submit(operation)
+        ballot_hash = ballot.ballot_hash
+        if archive is not None:
+            await run_in_threadpool(archive.append, ballot.id, ciphertext)
+        if turnout is not None:
+            turnout.ballot_cast()
+    except AlreadyVotedError:
+        await session.rollback()
+        ballot_hash = await find_receipt(session, key_hash)
+        if ballot_hash is None:
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT, detail='User already voted'
+            )
+        response.status_code = HTTPStatus.OK
+
+    return {'ballot_hash': ballot_hash}
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from datetime import datetime
+
+from pydantic import Base64Bytes, BaseModel, ConfigDict, EmailStr, Field, model_validator
 
 
 class Message(BaseModel):
@@ -27,19 +29,101 @@ class UserList(BaseModel):
     users: list[UserPublic]
 
 
-class CandidatoPublic(UserSchema):
+# Linhas lidas do banco: o e-mail já passou pelo EmailStr na escrita e
+# revalidá-lo na saída custava mais que todo o resto da serialização
+class UserRecord(BaseModel):
+    id: int
+    username: str
+    email: str
+    statusVotacao: bool
+    model_config = ConfigDict(from_attributes=True)
+
+
+class UserRecordList(BaseModel):
+    users: list[UserRecord]
+
+
+class CandidatoSchema(BaseModel):
+    name: str = Field(min_length=1)
+
+
+class CandidatoPublic(CandidatoSchema):
     id: int
+    election_id: int
+    slot: int
+    model_config = ConfigDict(from_attributes=True)
 
 
 class AdminPublic(UserSchema):
     id: int
 
 
+class ElectionSchema(BaseModel):
+    title: str = Field(min_length=1)
+    candidates: list[str] = []
+
+
+class ElectionPublic(BaseModel):
+    id: int
+    title: str
+    eligible: int
+    voted: int
+    ballots: int
+    turnout: float
+    candidates: list[CandidatoPublic]
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: str | None = None
+
+
+class VoteSchema(BaseModel):
+    # Um dos dois: o candidato, cifrado no servidor, ou a cédula já cifrada
+    # pelo cliente com a chave de /keys/public, em base64
+    candidate: int | None = Field(default=None, ge=0)
+    ciphertext: Base64Bytes | None = None
+
+    @model_validator(mode='after')
+    def exactly_one_choice(self):
+        if (self.candidate is None) == (self.ciphertext is None):
+            raise ValueError('Send either candidate or ciphertext')
+        return self
+
+
+class VoteReceipt(BaseModel):
+    ballot_hash: str
+
+
+class JobCreate(BaseModel):
+    kind: str
+    params: dict = {}
+
+
+class JobPublic(BaseModel):
+    id: int
+    kind: str
+    params: dict
+    status: str
+    progress: float
+    result: dict | None
+    error: str | None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+    model_config = ConfigDict(from_attributes=True)
+
+
+class JobList(BaseModel):
+    jobs: list[JobPublic]
 
 
 class FilterPage(BaseModel):
     limit: int = Field(default=10, ge=1, le=100)
     offset: int = Field(default=0, ge=0)
+
+
+class FilterJobs(FilterPage):
+    status: str | None = None
@@ -1,67 +1,232 @@
+"""
+Senhas e tokens JWT.
+
+As rotas de leitura validam o token sem tocar no banco (get_token_claims):
+assinatura, validade, tipo e o jti contra o cache de revogados do processo.
+Refresh tokens carregam ainda a versão TOKEN_VERSION, que invalida de uma
+vez todos os emitidos antes de ela mudar.
+
+Revogações (logout e rotação do refresh token) são gravadas em
+tokens_revogados, para valerem em todos os workers. O refresh, as rotas que
+alteram o próprio usuário e as administrativas conferem no banco que o
+usuário do token ainda existe e que o jti não foi revogado; nas demais, um
+token de acesso revogado por outro worker vale até expirar.
+
+O refresh não é sem banco de propósito: o cache local não vê a rotação feita
+em outro worker, e sem o INSERT do jti o mesmo refresh token usado em dois
+workers renderia duas sessões. O custo fica em uma consulta e um INSERT; a
+limpeza dos jti expirados roda no máximo uma vez por PRUNE_INTERVAL segundos
+em cada processo.
+
+Administradores são os usuários cujo e-mail está em ADMIN_EMAILS. Esses
+e-mails não podem ser cadastrados nem assumidos pela API: a conta é criada
+antes de o e-mail entrar na lista.
+
+A chave de assinatura é interpretada uma única vez, na importação.
+"""
+
+import heapq
+import secrets
+import threading
+import time
 from datetime import datetime, timedelta
 from http import HTTPStatus
 from zoneinfo import ZoneInfo
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
-from jwt import DecodeError, ExpiredSignatureError, decode, encode
+from jwt import DecodeError, ExpiredSignatureError, decode, encode, get_algorithm_by_name
 from pwdlib import PasswordHash
-from sqlalchemy import select
+from sqlalchemy import delete, exists, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database import get_session
-from src.models import User
+from src.database import get_read_session, get_session
+from src.metrics import PASSWORD_HASH_SECONDS
+from src.models import RevokedToken, User
 from src.settings import Settings
+from src.tracing import span
 
 settings = Settings()
 pwd_context = PasswordHash.recommended()
 
+# Chaves já interpretadas: o PyJWT só converte str/PEM, objetos passam direto.
+# Em algoritmos assimétricos SECRET_KEY é a chave privada e a verificação usa
+# a pública correspondente
+_algorithm = get_algorithm_by_name(settings.ALGORITHM)
+_signing_key = _algorithm.prepare_key(settings.SECRET_KEY)
+_verifying_key = (
+    _signing_key.public_key() if hasattr(_signing_key, 'public_key') else _signing_key
+)
 
-def create_access_token(data: dict):
+
+PRUNE_INTERVAL = 60
+
+
+class RevocationSet:
+    """Cache local dos jti revogados, cada um guardado só até o token expirar."""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._expires: dict[str, float] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._stored_pruned_at = float('-inf')
+
+    def _prune(self, now: float):
+        while self._heap and self._heap[0][0] <= now:
+            _, jti = heapq.heappop(self._heap)
+            self._expires.pop(jti, None)
+
+    def revoke(self, jti: str, expires: float):
+        with self._lock:
+            self._prune(self.clock())
+            self._expires[jti] = expires
+            heapq.heappush(self._heap, (expires, jti))
+
+    def stored_prune_due(self) -> bool:
+        """True no máximo uma vez por PRUNE_INTERVAL: hora de limpar o banco."""
+        with self._lock:
+            now = self.clock()
+            if now - self._stored_pruned_at < PRUNE_INTERVAL:
+                return False
+            self._stored_pruned_at = now
+            return True
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._expires
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._prune(self.clock())
+            return len(self._expires)
+
+    def clear(self):
+        with self._lock:
+            self._expires.clear()
+            self._heap.clear()
+
+
+revoked_tokens = RevocationSet()
+
+
+def _create_token(data: dict, minutes: int, token_type: str) -> str:
     to_encode = data.copy()
-    expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(
-        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    expire = datetime.now(tz=ZoneInfo('UTC')) + timedelta(minutes=minutes)
+    to_encode.update({'exp': expire, 'typ': token_type, 'jti': secrets.token_hex(16)})
+    return encode(to_encode, _signing_key, algorithm=settings.ALGORITHM)
+
+
+def create_access_token(data: dict):
+    return _create_token(data, settings.ACCESS_TOKEN_EXPIRE_MINUTES, 'access')
+
+
+def create_refresh_token(data: dict):
+    return _create_token(
+        {**data, 'ver': settings.TOKEN_VERSION},
+        settings.REFRESH_TOKEN_EXPIRE_MINUTES,
+        'refresh',
     )
-    to_encode.update({'exp': expire})
-    encoded_jwt = encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
-    return encoded_jwt
 
 
 def get_password_hash(password: str):
-    return pwd_context.hash(password)
+    with PASSWORD_HASH_SECONDS.time('hash'), span('argon2.hash', 'crypto'):
+        return pwd_context.hash(password)
 
 
 # ? Incluir o PEPPER ao verificar a senha
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    with PASSWORD_HASH_SECONDS.time('verify'), span('argon2.verify', 'crypto'):
+        return pwd_context.verify(plain_password, hashed_password)
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token', refreshUrl='auth/refresh')
 
 
-async def get_current_user(
-    session: AsyncSession = Depends(get_session),
-    token: str = Depends(oauth2_scheme),
-):
-    credentials_exception = HTTPException(
-        status_code=HTTPStatus.UNAUTHORIZED,
-        detail='Could not validate credentials',
-        headers={'WWW-Authenticate': 'Bearer'},
-    )
+credentials_exception = HTTPException(
+    status_code=HTTPStatus.UNAUTHORIZED,
+    detail='Could not validate credentials',
+    headers={'WWW-Authenticate': 'Bearer'},
+)
+
+
+def decode_token(token: str) -> dict:
+    """Claims de um token válido e não revogado, sem consultar o banco."""
     try:
-        payload = decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        subject_email = payload.get('sub')
-        if not subject_email:
-            raise credentials_exception
-    except DecodeError:
+        payload = decode(token, _verifying_key, algorithms=[settings.ALGORITHM])
+    except (DecodeError, ExpiredSignatureError):
         raise credentials_exception
 
-    except ExpiredSignatureError:
+    if not payload.get('sub') or payload.get('jti') in revoked_tokens:
+        raise credentials_exception
+    if payload.get('typ') == 'refresh' and payload.get('ver') != settings.TOKEN_VERSION:
         raise credentials_exception
+    return payload
 
-    user = await session.scalar(select(User).where(User.email == subject_email))
+
+async def get_token_claims(token: str = Depends(oauth2_scheme)) -> dict:
+    """Caminho sem banco para rotas de leitura: só tokens de acesso."""
+    payload = decode_token(token)
+    if payload.get('typ') == 'refresh':
+        raise credentials_exception
+    return payload
+
+
+async def revoke_token(session: AsyncSession, claims: dict) -> bool:
+    """
+    Revoga o jti no banco e no cache local. False se ele já estava revogado:
+    numa rotação, é o mesmo refresh token usado duas vezes.
+    """
+    revoked_tokens.revoke(claims['jti'], claims['exp'])
+    if revoked_tokens.stored_prune_due():
+        await session.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at <= int(time.time()))
+        )
+    try:
+        async with session.begin_nested():
+            session.add(RevokedToken(jti=claims['jti'], expires_at=int(claims['exp'])))
+    except IntegrityError:
+        return False
+    finally:
+        await session.commit()
+    return True
+
+
+async def load_token_user(session: AsyncSession, claims: dict) -> User:
+    """Usuário do token, se ele ainda existe e o jti não foi revogado."""
+    user = await session.scalar(
+        select(User).where(
+            User.email == claims['sub'],
+            ~exists().where(RevokedToken.jti == claims.get('jti')),
+        )
+    )
 
     if not user:
         raise credentials_exception
 
     return user
+
+
+async def get_current_user(
+    session: AsyncSession = Depends(get_session),
+    claims: dict = Depends(get_token_claims),
+):
+    return await load_token_user(session, claims)
+
+
+def is_admin_email(email: str) -> bool:
+    return email in settings.ADMIN_EMAILS
+
+
+async def get_current_admin(
+    session: AsyncSession = Depends(get_read_session),
+    claims: dict = Depends(get_token_claims),
+):
+    # Confere no banco: o e-mail de um administrador removido ou renomeado
+    # não vale mais, mesmo com o token ainda válido
+    user = await load_token_user(session, claims)
+    if not is_admin_email(user.email):
+        raise HTTPException(
+            status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
+        )
+    return user
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -15,3 +16,69 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
+    # Assinada nos refresh tokens: aumentar invalida todos os já emitidos
+    TOKEN_VERSION: int = 1
+
+    # Só vale para contas já cadastradas: a API recusa cadastrar estes e-mails
+    ADMIN_EMAILS: list[str] = []
+
+    # Conexões mantidas por pool; só valem para pools com fila (QueuePool, o
+    # do SQLite em arquivo). Com outro pool (SQLite em memória) um valor aqui
+    # é erro; None usa o padrão do SQLAlchemy
+    DATABASE_POOL_SIZE: int | None = None
+    READ_DATABASE_URL: str | None = None
+    READ_DATABASE_POOL_SIZE: int | None = None
+    EXPORT_BATCH_SIZE: int = 1000
+
+    LOGIN_CLIENT_RATE: float = 1.0
+    LOGIN_CLIENT_BURST: int = 10
+    LOGIN_ACCOUNT_RATE: float = 0.05
+    LOGIN_ACCOUNT_BURST: int = 5
+    LOGIN_MAX_VERIFICATIONS: int | None = None
+
+    KEYS_DIR: Path = BASE_DIR / 'keys'
+    FHE_KEY_BUNDLE: Path | None = None
+    FHE_PLAINTEXT_MODULUS: int = 65537
+    # Vários primos ≡ 1 (mod 2·dimensão do anel) ativam a apuração por CRT,
+    # ex.: [65537, 786433]; vazio mantém o contexto único acima
+    FHE_PLAINTEXT_MODULI: list[int] = []
+    # Aceita cédulas cifradas pelo cliente (src.client). INSEGURO enquanto não
+    # houver prova de conhecimento zero de que a cédula é one-hot: o servidor
+    # não confere o conteúdo, e um vetor com pesos 1000 ou -1000 desloca a
+    # apuração sem deixar rastro (ver import_ballot). Só para experimentos
+    ACCEPT_CLIENT_CIPHERTEXTS: bool = False
+    # Só há somas: profundidade 0 dá anel de 4096 e cédulas de 66 KB. Vale só
+    # para chaves novas; as já geradas em KEYS_DIR mantêm os seus parâmetros
+    FHE_MULTIPLICATIVE_DEPTH: int = 0
+    ELECTION_CANDIDATES: int = 8
+
+    BALLOT_ARCHIVE_PATH: Path | None = None
+
+    JOB_WORKERS: int = 1
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_HEARTBEAT: float = 2.0
+    JOB_STALE_AFTER: float = 60.0
+    JOB_MAX_QUEUED: int = 20
+
+    TURNOUT_INTERVAL: float = 1.0
+    TURNOUT_RESYNC: float = 10.0
+    TURNOUT_HEARTBEAT: float = 15.0
+    TURNOUT_STREAM_MAX_AGE: float = 3600.0
+
+    VOTE_GROUP_COMMIT: bool = True
+    VOTE_GROUP_COMMIT_WINDOW: float = 0.002
+    VOTE_GROUP_COMMIT_MAX_BATCH: int = 256
+
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ''
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_MODE: Literal['sampling', 'deterministic'] = 'sampling'
+    PROFILING_INTERVAL: float = 0.001
+    PROFILING_DIR: Path = BASE_DIR / 'profiles'
+
+    TRACING_ENABLED: bool = False
+    TRACING_BUFFER_SIZE: int = 200
+    TRACING_FILE: Path | None = None
+    TRACING_MIN_DURATION: float = 0.0
+    TRACING_MAX_SPANS: int = 1000
@@ -0,0 +1,293 @@
+"""
+Rastreamento local de requisições: onde foi o tempo de um voto lento.
+
+Desligado por padrão (TRACING_ENABLED). Ligado, o TracingMiddleware abre um
+trace por requisição HTTP e guarda nele os spans de:
+
+    handler:  a função da rota (o que vem antes dele são as dependências,
+              como a autenticação);
+    db:       cada comando enviado ao banco (eventos do SQLAlchemy);
+    crypto:   cada operação do OpenFHE (src.metrics.fhe_timer) e do argon2.
+
+O trace corrente fica numa ContextVar, então acompanha as chamadas async e
+os run_in_threadpool (o anyio copia o contexto para a thread). Fora de uma
+requisição rastreada span() não faz nada, e ferramentas como a reapuração
+não pagam por isso.
+
+Os traces concluídos vão para um buffer circular em memória, exposto em
+GET /admin/traces, e opcionalmente para um arquivo JSON lines
+(TRACING_FILE). Só entram os que duraram pelo menos TRACING_MIN_DURATION.
+"""
+
+import asyncio
+import functools
+import itertools
+import json
+import secrets
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+from sqlalchemy import event
+
+_current: ContextVar[tuple['Trace', int] | None] = ContextVar('trace', default=None)
+
+STATEMENT_LENGTH = 200
+
+
+class Span:
+    __slots__ = ('attributes', 'duration', 'error', 'kind', 'name', 'parent', 'span_id')
+
+    def __init__(self, name: str, kind: str, span_id: int, parent: int | None, **attrs):
+        self.name = name
+        self.kind = kind
+        self.span_id = span_id
+        self.parent = parent
+        self.attributes = attrs
+        self.duration = 0.0
+        self.error: str | None = None
+
+
+class Trace:
+    def __init__(self, name: str, max_spans: int):
+        self.trace_id = secrets.token_hex(8)
+        self.name = name
+        self.started_at = time.time()
+        self.max_spans = max_spans
+        self.status: int | None = None
+        self.duration = 0.0
+        self.dropped = 0
+        # (span, início relativo ao trace); list.append é atômico entre threads
+        self.spans: list[tuple[Span, float]] = []
+        self._origin = time.perf_counter()
+        self._ids = itertools.count(1)
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._origin
+
+    def start_span(
+        self, name: str, kind: str, parent: int, **attrs
+    ) -> tuple[Span, float]:
+        return Span(name, kind, next(self._ids), parent, **attrs), self.elapsed()
+
+    def finish_span(self, span: Span, start: float):
+        span.duration = self.elapsed() - start
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return
+        self.spans.append((span, start))
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'status': self.status,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 3),
+            'dropped_spans': self.dropped,
+            'spans': [
+                {
+                    'id': span.span_id,
+                    'parent': span.parent,
+                    'name': span.name,
+                    'kind': span.kind,
+                    'start_ms': round(start * 1000, 3),
+                    'duration_ms': round(span.duration * 1000, 3),
+                    'error': span.error,
+                    **span.attributes,
+                }
+                for span, start in sorted(self.spans, key=lambda item: item[1])
+            ],
+        }
+
+
+class RingBuffer:
+    """Os últimos `size` traces concluídos, do mais novo para o mais antigo."""
+
+    def __init__(self, size: int):
+        self._traces: deque[dict] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, trace: dict):
+        with self._lock:
+            self._traces.appendleft(trace)
+
+    def snapshot(self) -> list[dict]:
+        with self._lock:
+            return list(self._traces)
+
+    def get(self, trace_id: str) -> dict | None:
+        return next((t for t in self.snapshot() if t['trace_id'] == trace_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._traces.clear()
+
+
+class JsonLinesSink:
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._file = path.open('a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def __call__(self, trace: dict):
+        line = json.dumps(trace, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Tracer:
+    def __init__(
+        self,
+        buffer_size: int = 200,
+        path: Path | None = None,
+        min_duration: float = 0.0,
+        max_spans: int = 1000,
+    ):
+        self.buffer = RingBuffer(buffer_size)
+        self.file = JsonLinesSink(path) if path is not None else None
+        self.min_duration = min_duration
+        self.max_spans = max_spans
+
+    @contextmanager
+    def trace(self, name: str):
+        trace = Trace(name, self.max_spans)
+        token = _current.set((trace, 0))
+        try:
+            yield trace
+        finally:
+            _current.reset(token)
+            trace.duration = trace.elapsed()
+            if trace.duration >= self.min_duration:
+                self.record(trace.to_dict())
+
+    def record(self, trace: dict):
+        self.buffer.add(trace)
+        if self.file is not None:
+            self.file(trace)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+@contextmanager
+def span(name: str, kind: str = 'internal', **attrs):
+    """Span filho do atual; sem trace ativo, não faz nada."""
+    current = _current.get()
+    if current is None:
+        yield None
+        return
+    trace, parent = current
+    new, start = trace.start_span(name, kind, parent, **attrs)
+    token = _current.set((trace, new.span_id))
+    try:
+        yield new
+    except BaseException as exc:
+        new.error = type(exc).__name__
+        raise
+    finally:
+        _current.reset(token)
+        trace.finish_span(new, start)
+
+
+class TracingMiddleware:
+    """Middleware ASGI puro: um trace por requisição, nomeado pela rota."""
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        with self.tracer.trace(scope['method']) as trace:
+
+            async def send_wrapper(message):
+                if message['type'] == 'http.response.start':
+                    trace.status = message['status']
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get('route')
+                path = route.path if route is not None else '<unmatched>'
+                trace.name = f'{scope["method"]} {path}'
+
+
+def instrument_engine(engine):
+    """Um span por comando enviado ao banco, no trace de quem o executou."""
+    sync_engine = getattr(engine, 'sync_engine', engine)
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def before(conn, cursor, statement, parameters, context, executemany):  # noqa: PLR0913, PLR0917
+        current = _current.get()
+        if current is not None and context is not None:
+            trace, parent = current
+            context._trace_span = (
+                trace,
+                *trace.start_span(
+                    'db.query', 'db', parent, statement=statement[:STATEMENT_LENGTH]
+                ),
+            )
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def after(conn, cursor, statement, parameters, context, executemany):  # noqa: PLR0913, PLR0917
+        pending = getattr(context, '_trace_span', None)
+        if pending is not None:
+            context._trace_span = None
+            trace, new, start = pending
+            trace.finish_span(new, start)
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def error(exception_context):
+        context = exception_context.execution_context
+        pending = getattr(context, '_trace_span', None)
+        if pending is not None:
+            context._trace_span = None
+            trace, new, start = pending
+            new.error = type(exception_context.original_exception).__name__
+            trace.finish_span(new, start)
+
+
+def _traced_call(call, name: str):
+    if asyncio.iscoroutinefunction(call):
+
+        @functools.wraps(call)
+        async def traced(*args, **kwargs):
+            with span('handler', 'handler', endpoint=name):
+                return await call(*args, **kwargs)
+
+    else:
+
+        @functools.wraps(call)
+        def traced(*args, **kwargs):
+            with span('handler', 'handler', endpoint=name):
+                return call(*args, **kwargs)
+
+    traced.traced = True
+    return traced
+
+
+def instrument_routes(app):
+    """
+    Envolve a função de cada rota num span 'handler'. O FastAPI lê
+    dependant.call a cada requisição, então a troca vale para as rotas já
+    montadas; chame depois de incluir todos os routers.
+    """
+    for route in app.routes:
+        dependant = getattr(route, 'dependant', None)
+        if dependant is not None and not getattr(dependant.call, 'traced', False):
+            dependant.call = _traced_call(dependant.call, route.endpoint.__name__)
@@ -0,0 +1,214 @@
+"""
+Comparecimento ao vivo por Server-Sent Events.
+
+Painéis que consultam GET /users em laço para acompanhar o comparecimento
+fazem uma consulta por observador a cada atualização. Aqui um único produtor
+por processo monta o evento a cada TURNOUT_INTERVAL e todos os assinantes
+recebem os mesmos bytes: mil observadores custam o mesmo que um, mais o
+envio de cada conexão.
+
+Os números vêm de um contador em memória alimentado pela rota de votos
+(ballot_cast, depois do COMMIT) e são acertados com o banco a cada
+TURNOUT_RESYNC segundos, o que também traz os votos gravados por outros
+workers. O acerto lê os contadores da eleição (src.elections), uma linha, e
+só conta usuarios se ela ainda não existe. A taxa de ingestão é a variação
+de `voted` na janela recente.
+
+O produtor só roda enquanto há assinantes. Cada conexão dura no máximo
+TURNOUT_STREAM_MAX_AGE segundos; o EventSource do navegador reconecta sozinho
+depois do intervalo indicado em `retry`.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from src.elections import ELECTION_ID
+from src.models import Election, User
+from src.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix='/turnout', tags=['turnout'])
+
+settings = Settings()
+
+RETRY_MILLISECONDS = 3000
+HEARTBEAT = b': ping\n\n'
+
+Counter = Callable[[], Awaitable[tuple[int, int]]]
+
+
+async def count_voters(session: AsyncSession) -> tuple[int, int]:
+    """(eleitores, eleitores que já votaram)."""
+    counters = (
+        await session.execute(
+            select(Election.eligible, Election.voted).where(Election.id == ELECTION_ID)
+        )
+    ).first()
+    if counters is not None:
+        return tuple(counters)
+    eligible, voted = (
+        await session.execute(
+            select(
+                func.count(User.id),
+                func.count(User.id).filter(User.statusVotacao.is_(True)),
+            )
+        )
+    ).one()
+    return eligible, voted
+
+
+def database_counter(engine: AsyncEngine) -> Counter:
+    async def count() -> tuple[int, int]:
+        async with AsyncSession(engine) as session:
+            return await count_voters(session)
+
+    return count
+
+
+class TurnoutBroadcaster:
+    def __init__(  # noqa: PLR0913, PLR0917
+        self,
+        count: Counter,
+        interval: float = 1.0,
+        resync: float = 10.0,
+        window: float = 30.0,
+        clock=time.monotonic,
+    ):
+        self.count = count
+        self.interval = interval
+        self.resync = resync
+        self.window = window
+        self.clock = clock
+        self.eligible = 0
+        self.voted = 0
+        self.subscribers = 0
+        self.sequence = 0
+        self.message: bytes | None = None
+        self._payload: str | None = None
+        self._changed = asyncio.Event()
+        self._history: deque[tuple[float, int]] = deque()
+        self._synced_at = float('-inf')
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    def ballot_cast(self):
+        """Chamado pela rota de votos depois do COMMIT de uma cédula nova."""
+        self.voted += 1
+
+    def _rate(self, now: float) -> float:
+        self._history.append((now, self.voted))
+        while self._history[0][0] < now - self.window:
+            self._history.popleft()
+        start, first = self._history[0]
+        return (self.voted - first) / (now - start) if now > start else 0.0
+
+    async def _tick(self):
+        now = self.clock()
+        if now - self._synced_at >= self.resync:
+            self._synced_at = now
+            try:
+                self.eligible, self.voted = await self.count()
+            except Exception:  # noqa: BLE001
+                logger.exception('Turnout resync failed')
+
+        payload = json.dumps({
+            'eligible': self.eligible,
+            'voted': self.voted,
+            'turnout': self.voted / self.eligible if self.eligible else 0.0,
+            'ballots_per_second': round(self._rate(now), 3),
+        })
+        if payload == self._payload:
+            return
+        self._payload = payload
+        self.sequence += 1
+        self.message = (
+            f'id: {self.sequence}\nevent: turnout\ndata: {payload}\n\n'.encode()
+        )
+        self._wake()
+
+    def _wake(self):
+        # Um Event por versão: quem já esperava acorda, quem chega depois
+        # espera a próxima
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def _run(self):
+        while self.subscribers and not self._closed:
+            await self._tick()
+            await asyncio.sleep(self.interval)
+
+    def _ensure_producer(self):
+        if self._task is None or self._task.done():
+            # Sem assinantes ninguém acertou o contador com o banco
+            self._synced_at = float('-inf')
+            self._task = asyncio.create_task(self._run())
+
+    async def subscribe(self, heartbeat: float, max_age: float) -> AsyncIterator[bytes]:
+        """Eventos SSE já codificados, começando pelo estado atual."""
+        self.subscribers += 1
+        try:
+            self._ensure_producer()
+            yield f'retry: {RETRY_MILLISECONDS}\n\n'.encode()
+            deadline = self.clock() + max_age
+            seen = 0
+            while not self._closed:
+                if self.sequence != seen:
+                    seen = self.sequence
+                    yield self.message
+                    continue
+                remaining = deadline - self.clock()
+                if remaining <= 0:
+                    return
+                try:
+                    await asyncio.wait_for(
+                        self._changed.wait(), min(heartbeat, remaining)
+                    )
+                except asyncio.TimeoutError:
+                    yield HEARTBEAT
+        finally:
+            self.subscribers -= 1
+
+    async def stop(self):
+        """Encerra o produtor e as conexões abertas (desligamento do app)."""
+        self._closed = True
+        self._wake()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def get_turnout(request: Request) -> TurnoutBroadcaster | None:
+    return getattr(request.app.state, 'turnout', None)
+
+
+Turnout = Annotated[TurnoutBroadcaster | None, Depends(get_turnout)]
+
+
+@router.get('/stream')
+async def stream(turnout: Turnout):
+    if turnout is None:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail='Turnout stream disabled'
+        )
+    return StreamingResponse(
+        turnout.subscribe(settings.TURNOUT_HEARTBEAT, settings.TURNOUT_STREAM_MAX_AGE),
+        media_type='text/event-stream',
+        # Proxies (nginx) não podem segurar os eventos em buffer
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
@@ -0,0 +1,86 @@
+"""
+Registro atômico de votos.
+
+Um voto é uma única transação curta de escrita: o UPDATE condicional em
+usuarios (statusVotacao de falso para verdadeiro) é quem decide se o voto
+vale, e na mesma transação a cédula é gravada e somada ao acumulador.
+No SQLite o primeiro UPDATE já toma o lock de escrita, então a leitura e a
+regravação do acumulador ficam serializadas entre votos concorrentes. Os
+contadores da eleição (src.elections) sobem na mesma transação.
+"""
+
+import hashlib
+import hmac
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from src.crypto import CryptoService
+from src.elections import ELECTION_ID, adjust_counters, create_election
+from src.models import Ballot, Tally, User
+from src.settings import Settings
+
+TALLY_ID = 1
+
+settings = Settings()
+
+
+class AlreadyVotedError(Exception):
+    pass
+
+
+def idempotency_hash(user_id: int, key: str) -> str:
+    # HMAC com segredo do servidor: amarra a chave ao eleitor sem que quem lê
+    # a cédula consiga testar ids e chaves previsíveis para achar o dono
+    return hmac.new(
+        settings.SECRET_KEY.encode(), f'{user_id}:{key}'.encode(), hashlib.sha256
+    ).hexdigest()
+
+
+async def find_receipt(session: AsyncSession, key_hash: str) -> str | None:
+    return await session.scalar(
+        select(Ballot.ballot_hash).where(Ballot.idempotency_key == key_hash)
+    )
+
+
+async def record_vote(
+    session: AsyncSession,
+    crypto: CryptoService,
+    user_id: int,
+    key_hash: str,
+    ciphertext: bytes,
+) -> Ballot:
+    """Aplica o voto na transação corrente, sem commit. Devolve a cédula."""
+    result = await session.execute(
+        update(User)
+        .where(User.id == user_id, User.statusVotacao.is_(False))
+        .values(statusVotacao=True)
+    )
+    if result.rowcount != 1:
+        raise AlreadyVotedError
+
+    if not await adjust_counters(session, voted=1, ballots=1):
+        # O COUNT da criação já vê o UPDATE acima, mas não esta cédula
+        election = await create_election(session)
+        election.ballots += 1
+
+    ballot = Ballot(
+        idempotency_key=key_hash,
+        ciphertext=ciphertext,
+        ballot_hash=hashlib.sha256(ciphertext).hexdigest(),
+        election_id=ELECTION_ID,
+    )
+    session.add(ballot)
+
+    # No group commit a sessão do lote reaproveita o acumulador já carregado
+    tally = await session.get(Tally, TALLY_ID)
+    if tally is None:
+        session.add(Tally(id=TALLY_ID, ciphertext=ciphertext, ballots=1))
+    else:
+        tally.ciphertext = await run_in_threadpool(
+            crypto.add, tally.ciphertext, ciphertext
+        )
+        tally.ballots += 1
+
+    return ballot
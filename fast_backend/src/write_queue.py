@@ -0,0 +1,140 @@
+"""
+Group commit das escritas de voto.
+
+O SQLite aceita um escritor por vez e cada COMMIT custa um fsync. Em vez de
+cada requisição abrir a própria transação, os votos entram numa fila; um
+único consumidor junta o que chegou durante a janela (ou durante o commit
+anterior), aplica cada operação num SAVEPOINT próprio e faz um só COMMIT
+para o lote. O future de cada requisição só é resolvido depois que esse
+COMMIT retorna, então a durabilidade de cada voto é a mesma de antes.
+
+Uma operação que falha (voto repetido, por exemplo) desfaz apenas o seu
+SAVEPOINT e propaga a exceção para a sua requisição; as demais seguem.
+
+stop enfileira um marcador de fim: o consumidor termina o lote em andamento
+e tudo o que entrou antes do marcador, e só então encerra. Nenhum future
+fica pendente, nem se o consumidor for cancelado no meio de um lote.
+
+Cada operação roda numa cópia do contexto de quem a enfileirou, então o
+trace da requisição (src.tracing) recebe os spans das consultas do lote.
+"""
+
+import asyncio
+import contextvars
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi import Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+Operation = Callable[[AsyncSession], Awaitable[Any]]
+# Marcador de fim da fila, enfileirado por stop
+_STOP = object()
+
+
+class WriteCoalescer:
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession],
+        window: float = 0.002,
+        max_batch: int = 256,
+    ):
+        self.session_factory = session_factory
+        self.window = window
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    async def start(self):
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Processa o que já está na fila e espera o consumidor encerrar."""
+        if self._task is None:
+            return
+        self._stopping = True
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(self, operation: Operation):
+        """Enfileira a operação e espera o COMMIT do lote em que ela entrou."""
+        if self._task is None or self._stopping:
+            raise RuntimeError('WriteCoalescer is not running')
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((operation, future, contextvars.copy_context()))
+        return await future
+
+    def _drain(self, batch: list) -> bool:
+        """Completa o lote com o que está na fila; True se encontrou o fim."""
+        while len(batch) < self.max_batch and not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is _STOP:
+                return True
+            batch.append(item)
+        return False
+
+    async def _run(self):
+        while True:
+            item = await self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            if self.window:
+                await asyncio.sleep(self.window)
+            stopped = self._drain(batch)
+            await self._commit(batch)
+            if stopped:
+                return
+
+    async def _commit(self, batch: list):
+        outcomes = []
+        try:
+            async with self.session_factory() as session:
+                for operation, future, context in batch:
+                    if future.cancelled():
+                        continue
+                    try:
+                        async with session.begin_nested():
+                            # A task criada dentro do contexto roda numa cópia dele
+                            result = await context.run(
+                                asyncio.create_task, operation(session)
+                            )
+                    except Exception as exc:  # noqa: BLE001
+                        outcomes.append((future, None, exc))
+                    else:
+                        outcomes.append((future, result, None))
+                await session.commit()
+        except BaseException as exc:
+            _fail(batch, exc)
+            if not isinstance(exc, Exception):
+                raise
+            return
+
+        for future, result, exc in outcomes:
+            if future.done():
+                continue
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+
+def _fail(batch: list, exc: BaseException):
+    # Sem COMMIT nenhum voto do lote vale: todos recebem o erro, ou são
+    # cancelados junto com o consumidor
+    for _, future, _ in batch:
+        if future.done():
+            continue
+        if isinstance(exc, Exception):
+            future.set_exception(exc)
+        else:
+            future.cancel()
+
+
+def get_vote_queue(request: Request) -> WriteCoalescer | None:
+    # None quando o group commit está desligado ou fora do lifespan do app
+    return getattr(request.app.state, 'vote_queue', None)
@@ -0,0 +1,6 @@
+import os
+
+# Antes de qualquer import de src: os engines de src.database nunca apontam
+# para o banco de verdade, mesmo com DATABASE_URL no ambiente ou no .env
+os.environ['DATABASE_URL'] = 'sqlite+aiosqlite:///:memory:'
+os.environ['READ_DATABASE_URL'] = ''
@@ -1,3 +1,5 @@
+import asyncio
+import json
 from contextlib import contextmanager
 from datetime import datetime
 
@@ -5,49 +7,162 @@ import factory
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.pool import StaticPool
 
+from src import security
 from src.app import app
-from src.database import get_session
+from src.archive import get_ballot_archive
+from src.crypto import CryptoError, get_crypto
+from src.database import enable_sqlite_savepoints, get_read_session, get_session
 from src.models import User, table_registry
+from src.ratelimit import build_login_guard, get_login_guard
+from src.routers import votes
 from src.security import get_password_hash
+from src.settings import Settings
+from src.turnout import get_turnout
+from src.write_queue import get_vote_queue
+
+
+class FakeCrypto:
+    """
+    Substituto determinístico do CryptoService nos testes de rota.
+    A "cifra" é o próprio vetor one-hot em JSON, então somas e decifragem
+    podem ser conferidas sem o OpenFHE.
+    """
+
+    slots = 4
+    bundles = ()
+
+    def encrypt_vote(self, candidate):
+        selection = [0] * self.slots
+        selection[candidate] = 1
+        return json.dumps(selection).encode()
+
+    @staticmethod
+    def add(left, right):
+        return json.dumps([
+            a + b for a, b in zip(json.loads(left), json.loads(right))
+        ]).encode()
+
+    def add_all(self, ciphertexts):
+        total = None
+        for data in ciphertexts:
+            total = data if total is None else self.add(total, data)
+        return total
+
+    def import_ballot(self, data):
+        try:
+            selection = json.loads(data)
+        except ValueError as exc:
+            raise CryptoError('Malformed ciphertext') from exc
+        if not isinstance(selection, list) or len(selection) != self.slots:
+            raise CryptoError('Malformed ciphertext')
+        return json.dumps(selection).encode()
+
+    @staticmethod
+    def canonical(data):
+        return json.dumps(json.loads(data)).encode()
+
+    @staticmethod
+    def decrypt(data):
+        return json.loads(data)
+
+
+@pytest.fixture
+def crypto():
+    return FakeCrypto()
 
 
 @pytest.fixture
-def client(session):
+def client_ciphertexts(monkeypatch):
+    # Desligado por padrão: inseguro sem prova de que a cédula é one-hot
+    monkeypatch.setattr(votes.settings, 'ACCEPT_CLIENT_CIPHERTEXTS', True)
+
+
+@pytest.fixture
+def login_guard():
+    return build_login_guard(Settings())
+
+
+@pytest.fixture
+def client(session, crypto, login_guard):
     def get_session_override():
         return session
 
+    # Antes do TestClient: o aquecimento do lifespan usa o crypto de teste
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_read_session] = get_session_override
+    app.dependency_overrides[get_crypto] = lambda: crypto
+    app.dependency_overrides[get_vote_queue] = lambda: None
+    app.dependency_overrides[get_ballot_archive] = lambda: None
+    app.dependency_overrides[get_turnout] = lambda: None
+    app.dependency_overrides[get_login_guard] = lambda: login_guard
     with TestClient(app) as client:
-        app.dependency_overrides[get_session] = get_session_override
         yield client
 
     app.dependency_overrides.clear()
 
 
-@pytest_asyncio.fixture
-async def session():
+@pytest.fixture(scope='session', autouse=True)
+def _cheap_password_hashing():
     """
-    Configura e limpa um banco de dados de teste
-    para cada teste que o solicita,
-    assegurando que cada teste seja isolado
-    e tenha seu próprio ambiente limpo para trabalhar.
+    argon2 com custo mínimo nos testes: o formato do hash e a verificação
+    são os mesmos, mas cada hash leva microssegundos em vez de ~50 ms.
+    """
+    hasher = Argon2Hasher(time_cost=1, memory_cost=8, parallelism=1)
+    with pytest.MonkeyPatch.context() as patch:
+        patch.setattr(security, 'pwd_context', PasswordHash((hasher,)))
+        yield
+
+
+@pytest.fixture(scope='session')
+def engine():
+    """
+    Um banco em memória por processo (e por worker do pytest-xdist), com o
+    esquema criado uma única vez para a sessão de testes inteira.
     """
     engine = create_async_engine(
         'sqlite+aiosqlite:///:memory:',
         connect_args={'check_same_thread': False},
         poolclass=StaticPool,
-    )  # cria uma sessão em memória
-    async with engine.begin() as conn:
-        await conn.run_sync(table_registry.metadata.create_all)
+    )
+    enable_sqlite_savepoints(engine)
+
+    async def create_schema():
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
 
-    async with AsyncSession(engine, expire_on_commit=False) as session:
-        yield session
+    asyncio.run(create_schema())
+    yield engine
+    asyncio.run(engine.dispose())
 
-    async with engine.begin() as conn:
-        await conn.run_sync(table_registry.metadata.drop_all)
+
+@pytest.fixture(autouse=True)
+def _reset_factory_sequences():
+    # Nomes gerados não podem depender da ordem nem da divisão entre workers
+    UserFactory.reset_sequence()
+
+
+@pytest_asyncio.fixture
+async def session(engine):
+    """
+    Cada teste roda dentro de uma transação que é desfeita no final.
+    Os commits do teste e das rotas viram SAVEPOINTs dentro dela, então
+    nada do que um teste grava é visto pelo próximo.
+    """
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        async with AsyncSession(
+            bind=connection,
+            join_transaction_mode='create_savepoint',
+            expire_on_commit=False,
+        ) as session:
+            yield session
+        await transaction.rollback()
 
 
 @contextmanager
@@ -107,6 +222,20 @@ async def other_user(session):
     return user
 
 
+@pytest_asyncio.fixture
+async def voter(session):
+    password = 'testtest'
+    user = UserFactory(password=get_password_hash(password), statusVotacao=False)
+
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+
+    user.clean_password = password
+
+    return user
+
+
 @pytest.fixture
 def token(client, user):
     response = client.post(
@@ -119,6 +248,18 @@ def token(client, user):
     return response.json()['access_token']
 
 
+@pytest.fixture
+def voter_token(client, voter):
+    response = client.post(
+        '/auth/token',
+        data={
+            'username': voter.email,
+            'password': voter.clean_password,
+        },
+    )
+    return response.json()['access_token']
+
+
 class UserFactory(factory.Factory):
     class Meta:
         model = User
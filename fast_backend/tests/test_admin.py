@@ -0,0 +1,151 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import select
+
+from src import security
+from src.models import User
+from src.routers import admin
+from src.routers.users import PUBLIC_COLUMNS
+from tests.conftest import UserFactory
+
+
+@pytest.fixture
+def admin_token(token, user, monkeypatch):
+    monkeypatch.setattr(security.settings, 'ADMIN_EMAILS', [user.email])
+    return token
+
+
+def test_export_users_ndjson(client, admin_token, user, voter):
+    response = client.get(
+        '/admin/export/users', headers={'Authorization': f'Bearer {admin_token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows == [
+        {
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'statusVotacao': True,
+        },
+        {
+            'id': voter.id,
+            'username': voter.username,
+            'email': voter.email,
+            'statusVotacao': False,
+        },
+    ]
+
+
+def test_export_turnout_csv(client, admin_token, user, voter):
+    response = client.get(
+        '/admin/export/users',
+        params={'format': 'csv', 'voted': True},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows == [
+        ['id', 'username', 'email', 'statusVotacao'],
+        [str(user.id), user.username, user.email, 'True'],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_encodes_one_chunk_per_batch(session, monkeypatch):
+    session.add_all([UserFactory(password='x') for _ in range(5)])
+    await session.commit()
+    monkeypatch.setattr(admin.settings, 'EXPORT_BATCH_SIZE', 2)
+
+    chunks = [
+        chunk
+        async for chunk in admin._stream_rows(
+            session,
+            select(*PUBLIC_COLUMNS).order_by(User.id),
+            admin._ndjson,
+        )
+    ]
+
+    assert [chunk.count(b'\n') for chunk in chunks] == [2, 2, 1]
+
+
+def test_export_requires_admin(client, token):
+    response = client.get(
+        '/admin/export/users', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json() == {'detail': 'Not enough permissions'}
+
+
+@pytest.mark.asyncio
+async def test_removed_admin_loses_access(client, admin_token, session, user):
+    await session.delete(user)
+    await session.commit()
+
+    response = client.get(
+        '/admin/export/users', headers={'Authorization': f'Bearer {admin_token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_renamed_admin_loses_access(client, admin_token, user):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    client.patch(
+        f'/users/{user.id}',
+        headers=headers,
+        json={
+            'username': user.username,
+            'password': user.clean_password,
+            'email': 'renamed@test.com',
+            'statusVotacao': True,
+        },
+    )
+
+    response = client.get('/admin/export/users', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_admin_email_cannot_be_registered(client, monkeypatch):
+    monkeypatch.setattr(security.settings, 'ADMIN_EMAILS', ['admin@test.com'])
+
+    response = client.post(
+        '/users',
+        json={
+            'username': 'intruder',
+            'password': 'secret',
+            'email': 'admin@test.com',
+            'statusVotacao': False,
+        },
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json() == {'detail': 'Email is reserved'}
+
+
+def test_admin_email_cannot_be_taken_over(client, user, token, monkeypatch):
+    monkeypatch.setattr(security.settings, 'ADMIN_EMAILS', ['admin@test.com'])
+
+    response = client.patch(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': user.username,
+            'password': user.clean_password,
+            'email': 'admin@test.com',
+            'statusVotacao': True,
+        },
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json() == {'detail': 'Email is reserved'}
@@ -0,0 +1,227 @@
+import asyncio
+import mmap
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from src import app as app_module
+from src.app import app
+from src.archive import (
+    ArchiveError,
+    ArchiveReader,
+    BallotArchive,
+    backfill,
+    default_archive_path,
+    get_ballot_archive,
+)
+from src.crypto import get_crypto
+from src.database import (
+    Engines,
+    create_engine_for,
+    get_engines,
+    get_read_session,
+    get_session,
+)
+from src.models import Ballot, table_registry
+from src.turnout import get_turnout
+from src.write_queue import get_vote_queue
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = BallotArchive(tmp_path / 'database.ballots')
+    yield archive
+    archive.close()
+
+
+def test_append_and_read_records(archive):
+    archive.append(1, b'first')
+    archive.append(2, b'second' * 100)
+
+    reader = ArchiveReader(archive.path)
+
+    assert [(i, bytes(payload)) for i, payload in reader] == [
+        (1, b'first'),
+        (2, b'second' * 100),
+    ]
+    assert reader.ids() == [1, 2]
+    assert reader.truncated == 0
+
+
+def test_reader_hands_out_views_over_the_mapping(archive):
+    archive.append(1, b'ciphertext')
+
+    _, payload = next(iter(ArchiveReader(archive.path)))
+
+    assert isinstance(payload.obj, mmap.mmap)
+
+
+def test_reader_detects_corrupted_record(archive):
+    archive.append(1, b'ciphertext')
+    data = bytearray(archive.path.read_bytes())
+    data[-1] ^= 0xFF
+    archive.path.write_bytes(bytes(data))
+
+    with pytest.raises(ArchiveError):
+        list(ArchiveReader(archive.path))
+
+
+def test_reader_ignores_incomplete_tail(archive):
+    archive.append(1, b'complete')
+    archive.append(2, b'interrupted')
+    archive.path.write_bytes(archive.path.read_bytes()[:-4])
+
+    reader = ArchiveReader(archive.path)
+
+    assert reader.ids() == [1]
+    assert reader.truncated > 0
+
+
+def test_reopening_keeps_existing_records(archive):
+    archive.append(1, b'ballot')
+
+    again = BallotArchive(archive.path)
+    again.append(2, b'ballot')
+    again.close()
+
+    assert ArchiveReader(archive.path).ids() == [1, 2]
+
+
+def test_partial_write_is_truncated_before_next_append(archive):
+    archive.append(1, b'first')
+    archive.append(2, b'second')
+    # Outro worker caiu no meio do write do registro 3
+    with open(archive.path, 'ab') as file:
+        file.write(b'\x40\x00\x00\x00garbage')
+
+    archive.append(3, b'third')
+
+    reader = ArchiveReader(archive.path)
+    assert [(ballot_id, bytes(payload)) for ballot_id, payload in reader] == [
+        (1, b'first'),
+        (2, b'second'),
+        (3, b'third'),
+    ]
+    assert reader.truncated == 0
+
+
+def test_reopening_truncates_corrupted_tail(archive):
+    archive.append(1, b'first')
+    archive.append(2, b'second')
+    archive.close()
+    archive.path.write_bytes(archive.path.read_bytes()[:-3] + b'xyz')
+
+    again = BallotArchive(archive.path)
+    again.append(3, b'third')
+    again.close()
+
+    assert ArchiveReader(archive.path).ids() == [1, 3]
+
+
+def test_append_skips_ballot_already_archived(archive):
+    assert archive.append(1, b'ballot')
+    other_worker = BallotArchive(archive.path)
+
+    assert not other_worker.append(1, b'ballot')
+    other_worker.close()
+    assert ArchiveReader(archive.path).ids() == [1]
+
+
+def test_default_archive_path():
+    assert default_archive_path('sqlite+aiosqlite:///database.db') == Path(
+        'database.ballots'
+    )
+    assert default_archive_path('sqlite+aiosqlite:///:memory:') is None
+
+
+@pytest.mark.asyncio
+async def test_backfill_appends_missing_ballots(session, archive):
+    session.add_all([
+        Ballot(idempotency_key=f'key{n}', ciphertext=f'ct{n}'.encode(), ballot_hash='h')
+        for n in range(3)
+    ])
+    await session.commit()
+    archive.append(1, b'ct0')
+
+    added = await backfill(session, archive)
+
+    assert added == 2  # noqa: PLR2004
+    assert sorted(ArchiveReader(archive.path).ids()) == [1, 2, 3]
+
+
+def test_vote_is_archived_after_commit(client, voter_token, archive):
+    app.dependency_overrides[get_ballot_archive] = lambda: archive
+
+    response = client.post(
+        '/votes/',
+        headers={'Authorization': f'Bearer {voter_token}'},
+        json={'candidate': 1},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    [(ballot_id, payload)] = list(ArchiveReader(archive.path))
+    assert ballot_id == 1
+    assert bytes(payload) == b'[0, 1, 0, 0]'
+
+
+@pytest.fixture
+def lifespan_overrides(crypto):
+    # Tudo o que o lifespan aquece ou abre, menos o arquivo de cédulas
+    app.dependency_overrides[get_session] = lambda: None
+    app.dependency_overrides[get_read_session] = lambda: None
+    app.dependency_overrides[get_crypto] = lambda: crypto
+    app.dependency_overrides[get_vote_queue] = lambda: None
+    app.dependency_overrides[get_turnout] = lambda: None
+    yield
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.usefixtures('lifespan_overrides')
+def test_startup_recovers_ballots_missing_from_archive(tmp_path, monkeypatch):
+    database = create_engine_for(f'sqlite+aiosqlite:///{tmp_path / "database.db"}')
+
+    async def seed():
+        async with database.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+            await conn.execute(
+                insert(Ballot),
+                [
+                    {
+                        'idempotency_key': f'key{n}',
+                        'ciphertext': b'ct',
+                        'ballot_hash': 'h',
+                    }
+                    for n in range(3)
+                ],
+            )
+        await database.dispose()
+
+    asyncio.run(seed())
+    # Parada sem close: só a primeira cédula chegou ao arquivo
+    archive = BallotArchive(tmp_path / 'database.ballots')
+    archive.append(1, b'ct')
+    archive.close()
+    app.dependency_overrides[get_engines] = lambda: Engines(
+        write=database, read=database, votes=database
+    )
+    monkeypatch.setattr(app_module.settings, 'BALLOT_ARCHIVE_PATH', archive.path)
+
+    with TestClient(app):
+        pass
+
+    assert ArchiveReader(archive.path).ids() == [1, 2, 3]
+
+
+@pytest.mark.usefixtures('lifespan_overrides')
+def test_overridden_archive_is_not_opened(tmp_path, monkeypatch):
+    path = tmp_path / 'database.ballots'
+    monkeypatch.setattr(app_module.settings, 'BALLOT_ARCHIVE_PATH', path)
+    app.dependency_overrides[get_ballot_archive] = lambda: None
+
+    with TestClient(app):
+        pass
+
+    assert not path.exists()
@@ -1,7 +1,10 @@
 from http import HTTPStatus
 
+import pytest
 from freezegun import freeze_time
 
+from src import security
+
 
 def test_get_token(client, user):
     response = client.post(
@@ -86,3 +89,92 @@ def test_token_expired_dont_refresh(client, user):
         )
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+@pytest.fixture
+def tokens(client, user):
+    return client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    ).json()
+
+
+def test_refresh_token_rotates(client, tokens):
+    headers = {'Authorization': f'Bearer {tokens["refresh_token"]}'}
+
+    response = client.post('/auth/refresh_token', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['refresh_token'] != tokens['refresh_token']
+    response = client.post('/auth/refresh_token', headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_refresh_token_reuse_is_rejected_by_other_workers(client, tokens):
+    headers = {'Authorization': f'Bearer {tokens["refresh_token"]}'}
+    client.post('/auth/refresh_token', headers=headers)
+    # Outro worker: o cache local não conhece a revogação, o banco sim
+    security.revoked_tokens.clear()
+
+    response = client.post('/auth/refresh_token', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_logout_is_seen_by_other_workers(client, user, tokens):
+    client.post(
+        '/auth/logout',
+        headers={'Authorization': f'Bearer {tokens["refresh_token"]}'},
+    )
+    security.revoked_tokens.clear()
+
+    response = client.post(
+        '/auth/refresh_token',
+        headers={'Authorization': f'Bearer {tokens["refresh_token"]}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_refresh_rejects_deleted_user(client, session, user, tokens):
+    await session.delete(user)
+    await session.commit()
+
+    response = client.post(
+        '/auth/refresh_token',
+        headers={'Authorization': f'Bearer {tokens["refresh_token"]}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_refresh_token_is_not_an_access_token(client, user, tokens):
+    response = client.delete(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {tokens["refresh_token"]}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_token_version_invalidates_refresh_tokens(client, tokens, monkeypatch):
+    monkeypatch.setattr(security.settings, 'TOKEN_VERSION', 2)
+
+    response = client.post(
+        '/auth/refresh_token',
+        headers={'Authorization': f'Bearer {tokens["refresh_token"]}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_logout_revokes_token(client, user, tokens):
+    headers = {'Authorization': f'Bearer {tokens["access_token"]}'}
+
+    response = client.post('/auth/logout', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'message': 'Token revoked'}
+    response = client.delete(f'/users/{user.id}', headers=headers)
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from src.ballots import BallotError, BallotLayout
+
+
+@pytest.fixture
+def layout():
+    return BallotLayout([3, 2, 1])
+
+
+def test_encode_lays_out_races_side_by_side(layout):
+    ballots = layout.encode(np.array([[1, 0, 0], [2, 1, 0]]))
+
+    assert ballots.tolist() == [
+        [0, 1, 0, 1, 0, 1],
+        [0, 0, 1, 0, 1, 1],
+    ]
+    assert ballots.dtype == np.int64
+
+
+def test_encode_large_batch_is_one_hot_per_race(layout):
+    rng = np.random.default_rng(1)
+    choices = rng.integers(0, layout.races, size=(5000, 3))
+
+    ballots = layout.encode(choices)
+
+    assert layout.validate(ballots) is ballots
+    assert layout.split(ballots.sum(axis=0)) == [
+        np.bincount(choices[:, race], minlength=size).tolist()
+        for race, size in enumerate(layout.races)
+    ]
+
+
+@pytest.mark.parametrize(
+    ('choices', 'message'),
+    [
+        ([[0, 2, 0]], 'Ballot 0: candidate out of range in race 1'),
+        ([[0, 0, 0], [-1, 0, 0]], 'Ballot 1: candidate out of range in race 0'),
+        ([[0, 0]], 'one choice per race'),
+        ([[0.0, 0.0, 0.0]], 'must be integers'),
+    ],
+)
+def test_encode_rejects_invalid_choices(layout, choices, message):
+    with pytest.raises(BallotError, match=message):
+        layout.encode(np.array(choices))
+
+
+@pytest.mark.parametrize(
+    ('ballots', 'message'),
+    [
+        ([[1, 1, 0, 1, 0, 1]], 'Ballot 0: expected one selection in race 0'),
+        ([[1, 0, 0, 1, 0, 0]], 'Ballot 0: expected one selection in race 2'),
+        ([[1, 0, 0, 2, -1, 1]], 'must be 0 or 1'),
+        ([[1, 0, 0, 1, 0]], 'Expected 6 slots'),
+    ],
+)
+def test_validate_rejects_invalid_ballots(layout, ballots, message):
+    with pytest.raises(BallotError, match=message):
+        layout.validate(np.array(ballots))
+
+
+def test_layout_needs_candidates():
+    with pytest.raises(BallotError):
+        BallotLayout([2, 0])
+
+
+def test_split_checks_length(layout):
+    with pytest.raises(BallotError, match='Expected 6 totals'):
+        layout.split([1, 2, 3])
@@ -0,0 +1,136 @@
+import json
+
+import pytest
+
+from tools.bench import Measurement, classify, compare, main, run_benchmarks
+
+THRESHOLD = 0.25
+
+
+def result(median, q1, q3):
+    return {'median_ms': median, 'q1_ms': q1, 'q3_ms': q3}
+
+
+def test_measurement_summary_in_milliseconds():
+    summary = Measurement(
+        number=10, samples=[0.001, 0.002, 0.003, 0.004, 0.100]
+    ).summary()
+
+    assert summary['median_ms'] == 3.0  # noqa: PLR2004
+    assert summary['q1_ms'] == 2.0  # noqa: PLR2004
+    assert summary['q3_ms'] == 4.0  # noqa: PLR2004
+    assert summary['mad_ms'] == 1.0
+    assert summary['min_ms'] == 1.0
+    assert summary['rounds'] == 5  # noqa: PLR2004
+
+
+@pytest.mark.parametrize(
+    ('current', 'status'),
+    [
+        (result(2.0, 1.9, 2.1), 'regression'),
+        (result(2.0, 1.0, 3.0), 'noise'),
+        (result(1.1, 1.0, 1.2), 'ok'),
+        (result(0.5, 0.4, 0.6), 'faster'),
+    ],
+)
+def test_classify(current, status):
+    baseline = result(1.0, 0.9, 1.1)
+
+    assert classify(baseline, current, THRESHOLD) == status
+
+
+def test_compare_reports_missing_cases():
+    baseline = {
+        'a.x': result(1.0, 0.9, 1.1),
+        'a.y': result(1.0, 0.9, 1.1),
+        'b.z': result(1.0, 0.9, 1.1),
+    }
+
+    changes = compare(
+        baseline, {'a.x': result(1.0, 0.9, 1.1), 'a.w': result(1, 1, 1)}, THRESHOLD, ['a']
+    )
+
+    assert [(change.name, change.status) for change in changes] == [
+        ('a.w', 'new'),
+        ('a.x', 'ok'),
+        ('a.y', 'missing'),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_run_benchmarks_measures_every_case():
+    results = await run_benchmarks(
+        ['api', 'hash', 'db', 'ballots'], rounds=2, min_time=0.0
+    )
+
+    assert set(results) == {
+        'api.get_user',
+        'api.list_users',
+        'hash.argon2_hash',
+        'hash.argon2_verify',
+        'db.insert_user',
+        'db.mark_voted',
+        'ballots.encode_batch',
+    }
+    assert all(summary['median_ms'] > 0 for summary in results.values())
+
+
+def run_main(tmp_path, *extra):
+    return main([
+        '--only',
+        'hash',
+        '--rounds',
+        '3',
+        '--min-time',
+        '0',
+        '--baseline',
+        str(tmp_path / 'baseline.json'),
+        *extra,
+    ])
+
+
+def test_main_update_then_compare(tmp_path):
+    path = tmp_path / 'baseline.json'
+    path.write_text(json.dumps({'environment': {}, 'benchmarks': {'outro': {}}}))
+
+    assert run_main(tmp_path, '--update') == 0
+    baseline = json.loads(path.read_text())
+    assert set(baseline['benchmarks']) == {
+        'outro',
+        'hash.argon2_hash',
+        'hash.argon2_verify',
+    }
+
+
+def test_main_fails_on_regression(tmp_path, capsys):
+    tiny = result(1e-6, 1e-6, 1e-6)
+    (tmp_path / 'baseline.json').write_text(
+        json.dumps({
+            'environment': {},
+            'benchmarks': {'hash.argon2_hash': tiny, 'hash.argon2_verify': tiny},
+        })
+    )
+
+    assert run_main(tmp_path) == 1
+    assert 'regression' in capsys.readouterr().out
+
+
+def test_main_fails_on_missing_cases(tmp_path, capsys):
+    path = tmp_path / 'baseline.json'
+    assert run_main(tmp_path, '--update') == 0
+    baseline = json.loads(path.read_text())
+    baseline['benchmarks']['hash.removido'] = baseline['benchmarks']['hash.argon2_hash']
+    path.write_text(json.dumps(baseline))
+
+    assert run_main(tmp_path, '--threshold', '100') == 1
+    assert 'missing' in capsys.readouterr().out
+    assert run_main(tmp_path, '--threshold', '100', '--allow-missing') == 0
+
+
+def test_main_without_baseline_passes(tmp_path, capsys):
+    assert run_main(tmp_path, '--json', str(tmp_path / 'atual.json')) == 0
+    assert 'new' in capsys.readouterr().out
+    assert (
+        'hash.argon2_hash'
+        in json.loads((tmp_path / 'atual.json').read_text())['benchmarks']
+    )
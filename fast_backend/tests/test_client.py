@@ -0,0 +1,61 @@
+import base64
+from http import HTTPStatus
+
+import pytest
+
+pytest.importorskip('openfhe')
+
+from src.client import BallotClient  # noqa: E402
+from src.crypto import CryptoService  # noqa: E402
+from src.models import Tally  # noqa: E402
+from src.voting import TALLY_ID  # noqa: E402
+
+pytestmark = pytest.mark.usefixtures('client_ciphertexts')
+
+
+@pytest.fixture(scope='module')
+def keys(tmp_path_factory):
+    path = tmp_path_factory.mktemp('keys') / 'public.bundle'
+    secret = CryptoService.generate(plaintext_modulus=65537, depth=0, slots=4)
+    secret.export_bundle(path)
+    return secret, path
+
+
+@pytest.fixture
+def crypto(keys):
+    # O servidor dos testes usa o OpenFHE de verdade, só com a chave pública
+    _, path = keys
+    return CryptoService.attach(path, slots=4)
+
+
+@pytest.mark.asyncio
+async def test_client_encrypts_and_casts(client, session, keys, voter_token, tmp_path):
+    secret, _ = keys
+    ballots = BallotClient(http=client, cache_dir=tmp_path)
+
+    receipt = ballots.cast(voter_token, candidate=3)
+
+    tally = await session.get(Tally, TALLY_ID)
+    assert len(receipt) == 64  # noqa: PLR2004
+    assert secret.decrypt(tally.ciphertext) == [0, 0, 0, 1]
+    assert len(list(tmp_path.glob('*.bundle'))) == 1
+
+
+def test_client_revalidates_manifest(client, tmp_path):
+    ballots = BallotClient(http=client, cache_dir=tmp_path)
+    ballots.refresh()
+
+    assert ballots.refresh() is False
+
+
+def test_server_rejects_ballot_from_other_key(client, voter, voter_token):
+    stranger = CryptoService.generate(plaintext_modulus=65537, depth=0, slots=4)
+
+    response = client.post(
+        '/votes/',
+        headers={'Authorization': f'Bearer {voter_token}'},
+        json={'ciphertext': base64.b64encode(stranger.encrypt_vote(0)).decode()},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert 'public key' in response.json()['detail']
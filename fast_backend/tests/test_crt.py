@@ -0,0 +1,47 @@
+import pytest
+
+from src.crt import CRTError, check_moduli, pack, reconstruct, unpack
+
+MODULI = [65537, 786433]
+
+
+def test_reconstruct_beyond_each_modulus():
+    for total in [0, 1, 65536, 65537, 2**17, 10**9, 65537 * 786433 - 1]:
+        residues = [total % modulus for modulus in MODULI]
+
+        assert reconstruct(residues, MODULI) == total
+
+
+def test_reconstruct_accepts_centered_residues():
+    # O BFV decifra no intervalo centrado: 65536 vem como -1
+    total = 65536
+    assert reconstruct([-1, total], MODULI) == total
+
+
+def test_check_moduli():
+    assert check_moduli(MODULI) == 65537 * 786433
+
+    with pytest.raises(CRTError):
+        check_moduli([65537])
+    with pytest.raises(CRTError):
+        check_moduli([12, 18])
+
+
+def test_pack_round_trip():
+    data = pack([b'abc', b'defgh'], MODULI)
+
+    assert [bytes(part) for part in unpack(data, MODULI)] == [b'abc', b'defgh']
+
+
+@pytest.mark.parametrize(
+    ('data', 'moduli'),
+    [
+        (b'not a ciphertext', MODULI),
+        (pack([b'abc', b'defgh'], MODULI)[:-1], MODULI),
+        (pack([b'abc', b'defgh'], MODULI), [65537, 5767169]),
+        (pack([b'abc', b'defgh'], MODULI), [*MODULI, 5767169]),
+    ],
+)
+def test_unpack_rejects_invalid(data, moduli):
+    with pytest.raises(CRTError):
+        unpack(data, moduli)
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('openfhe')
+
+from src.ballots import BallotLayout  # noqa: E402
+from src.crypto import CryptoError, CryptoService, MultiModulusCrypto  # noqa: E402
+
+
+@pytest.fixture(scope='module')
+def service():
+    return CryptoService.generate(plaintext_modulus=65537, depth=1, slots=4)
+
+
+def test_encrypt_add_decrypt(service):
+    first = service.encrypt_vote(1)
+    second = service.encrypt_vote(1)
+    third = service.encrypt_vote(3)
+
+    total = service.add(service.add(first, second), third)
+
+    assert service.decrypt(total) == [0, 2, 0, 1]
+
+
+def test_ballots_are_stored_compact(service):
+    context = service.context
+    full = service.serialize(
+        context.Encrypt(service.public_key, context.MakePackedPlaintext([0, 1, 0, 0]))
+    )
+    compact = service.encrypt_vote(1)
+
+    assert len(compact) < len(full) * 0.6  # noqa: PLR2004
+    # Cédulas antigas, com todas as torres, continuam somando com as novas
+    assert service.decrypt(service.add(full, compact)) == [0, 2, 0, 0]
+    assert service.canonical(full) == service.canonical(
+        service.serialize(service.load_compact(full))
+    )
+
+
+def test_encrypt_vote_out_of_range(service):
+    with pytest.raises(CryptoError):
+        service.encrypt_vote(4)
+
+
+def test_save_and_load_keys(service, tmp_path):
+    service.save(tmp_path)
+
+    loaded = CryptoService.load(tmp_path, slots=4)
+
+    assert loaded.decrypt(service.encrypt_vote(0)) == [1, 0, 0, 0]
+
+
+def test_attach_to_public_bundle(service, tmp_path):
+    service.export_bundle(tmp_path / 'public.bundle')
+
+    worker = CryptoService.attach(tmp_path / 'public.bundle', slots=4)
+    ballot = worker.add(worker.encrypt_vote(2), worker.encrypt_vote(2))
+
+    assert worker.secret_key is None
+    assert service.decrypt(ballot) == [0, 0, 2, 0]
+
+
+@pytest.fixture(scope='module')
+def multi_modulus():
+    return MultiModulusCrypto.generate([65537, 786433], depth=1, slots=4)
+
+
+def test_crt_tally_beyond_plaintext_modulus(service, multi_modulus):
+    # 2**17 votos no candidato 1: passa de 65537 e daria a volta num contexto só
+    single, multi = service.encrypt_vote(1), multi_modulus.encrypt_vote(1)
+    for _ in range(17):
+        single = service.add(single, single)
+        multi = multi_modulus.add(multi, multi)
+
+    assert service.decrypt(single)[1] != 2**17
+    assert multi_modulus.decrypt(multi) == [0, 2**17, 0, 0]
+
+
+def test_crt_add_all_and_canonical(multi_modulus):
+    ballots = [multi_modulus.encrypt_vote(candidate) for candidate in [0, 3, 3]]
+
+    total = multi_modulus.add_all(ballots)
+    chained = multi_modulus.add(multi_modulus.add(ballots[0], ballots[1]), ballots[2])
+
+    assert multi_modulus.decrypt(total) == [1, 0, 0, 2]
+    assert multi_modulus.canonical(total) == multi_modulus.canonical(chained)
+
+
+def test_crt_rejects_foreign_ciphertext(service, multi_modulus):
+    with pytest.raises(CryptoError):
+        multi_modulus.decrypt(service.encrypt_vote(0))
+
+
+def test_encrypt_ballots_multi_race(service):
+    layout = BallotLayout([2, 2])
+    ballots = layout.encode(np.array([[0, 1], [1, 1], [0, 0]]))
+
+    total = service.add_all(service.encrypt_ballots(ballots))
+
+    assert layout.split(service.decrypt(total)) == [[2, 1], [1, 2]]
+
+
+def test_encrypt_ballots_too_many_slots(service):
+    with pytest.raises(CryptoError, match='4 slots'):
+        service.encrypt_ballots(BallotLayout([3, 2]).encode(np.array([[0, 0]])))
+
+
+def test_crt_encrypt_ballots(multi_modulus):
+    layout = BallotLayout([3, 1])
+    ballots = layout.encode(np.array([[2, 0], [2, 0]]))
+
+    total = multi_modulus.add_all(multi_modulus.encrypt_ballots(ballots))
+
+    assert layout.split(multi_modulus.decrypt(total)) == [[0, 0, 2], [2]]
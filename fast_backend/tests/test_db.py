@@ -1,9 +1,12 @@
 from dataclasses import asdict
 
 import pytest
-from sqlalchemy import Select
+from sqlalchemy import Select, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.models import User
+from src.database import create_engine_for
+from src.models import User, table_registry
 
 
 @pytest.mark.asyncio
@@ -40,3 +43,40 @@ async def test_create_user(session, mock_db_time):
     }
 
     assert user.username == 'test'
+
+
+@pytest.mark.asyncio
+async def test_read_engine_rejects_writes(tmp_path):
+    url = f'sqlite+aiosqlite:///{tmp_path / "ro.db"}'
+    engine = create_engine_for(url)
+    read_engine = create_engine_for(url, read_only=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        journal = await conn.scalar(text('PRAGMA journal_mode'))
+
+    async with AsyncSession(read_engine) as session:
+        users = (await session.scalars(Select(User))).all()
+        session.add(
+            User(username='x', password='x', email='x@x.com', statusVotacao=False)
+        )
+        with pytest.raises(OperationalError, match='readonly'):
+            await session.commit()
+
+    await read_engine.dispose()
+    await engine.dispose()
+
+    assert users == []
+    assert journal == 'wal'
+
+
+@pytest.mark.asyncio
+async def test_pool_size_applies_to_queue_pool(tmp_path):
+    engine = create_engine_for(f'sqlite+aiosqlite:///{tmp_path / "pool.db"}', 3)
+
+    assert engine.pool.size() == 3  # noqa: PLR2004
+    await engine.dispose()
+
+
+def test_pool_size_without_queue_pool_is_an_error():
+    with pytest.raises(ValueError, match='StaticPool'):
+        create_engine_for('sqlite+aiosqlite:///:memory:', 3)
@@ -0,0 +1,172 @@
+from http import HTTPStatus
+
+import pytest
+
+from src import security
+from src.elections import ELECTION_ID, adjust_counters, create_election
+from src.models import Election
+from src.routers import elections
+from src.turnout import count_voters
+
+
+@pytest.fixture
+def admin_token(token, user, monkeypatch):
+    monkeypatch.setattr(security.settings, 'ADMIN_EMAILS', [user.email])
+    return token
+
+
+async def _counters(session):
+    election = await session.get(Election, ELECTION_ID, populate_existing=True)
+    return election.eligible, election.voted, election.ballots
+
+
+def test_create_election(client, admin_token, voter):
+    response = client.post(
+        '/elections/',
+        json={'title': 'Reitoria 2026', 'candidates': ['Ana', 'Bruno']},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json() == {
+        'id': ELECTION_ID,
+        'title': 'Reitoria 2026',
+        'eligible': 2,
+        'voted': 1,
+        'ballots': 0,
+        'turnout': 0.5,
+        'candidates': [
+            {'id': 1, 'election_id': ELECTION_ID, 'slot': 0, 'name': 'Ana'},
+            {'id': 2, 'election_id': ELECTION_ID, 'slot': 1, 'name': 'Bruno'},
+        ],
+    }
+    assert client.get(f'/elections/{ELECTION_ID}').json() == response.json()
+
+
+def test_create_election_twice(client, admin_token):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    client.post('/elections/', json={'title': 'A'}, headers=headers)
+
+    response = client.post('/elections/', json={'title': 'B'}, headers=headers)
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Election already exists'}
+
+
+def test_create_election_too_many_candidates(client, admin_token, monkeypatch):
+    monkeypatch.setattr(elections.settings, 'ELECTION_CANDIDATES', 1)
+
+    response = client.post(
+        '/elections/',
+        json={'title': 'A', 'candidates': ['Ana', 'Bruno']},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': 'Too many candidates'}
+
+
+def test_create_election_requires_admin(client, token):
+    response = client.post(
+        '/elections/', json={'title': 'A'}, headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_get_election_not_found(client):
+    response = client.get('/elections/1')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Election not found'}
+
+
+def test_add_candidate(client, admin_token, monkeypatch):
+    monkeypatch.setattr(elections.settings, 'ELECTION_CANDIDATES', 2)
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    client.post(
+        '/elections/', json={'title': 'A', 'candidates': ['Ana']}, headers=headers
+    )
+
+    response = client.post(
+        f'/elections/{ELECTION_ID}/candidates', json={'name': 'Bruno'}, headers=headers
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['slot'] == 1
+
+    response = client.post(
+        f'/elections/{ELECTION_ID}/candidates', json={'name': 'Carla'}, headers=headers
+    )
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_vote_updates_counters(client, session, voter, voter_token):
+    await create_election(session)
+    await session.commit()
+
+    response = client.post(
+        '/votes/',
+        headers={'Authorization': f'Bearer {voter_token}'},
+        json={'candidate': 0},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert await _counters(session) == (1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_first_vote_creates_election(client, session, user, voter, voter_token):
+    client.post(
+        '/votes/',
+        headers={'Authorization': f'Bearer {voter_token}'},
+        json={'candidate': 0},
+    )
+
+    election = await session.get(Election, ELECTION_ID)
+    assert election.title == 'Eleição'
+    assert await _counters(session) == (2, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_user_changes_update_counters(  # noqa: PLR0913, PLR0917
+    client, session, user, token, voter, voter_token
+):
+    await create_election(session)
+    await session.commit()
+    assert await _counters(session) == (2, 1, 0)
+
+    client.post(
+        '/users/',
+        json={
+            'username': 'novo',
+            'email': 'novo@test.com',
+            'password': 'secret',
+            'statusVotacao': False,
+        },
+    )
+    assert await _counters(session) == (3, 1, 0)
+
+    client.delete(
+        f'/users/{voter.id}', headers={'Authorization': f'Bearer {voter_token}'}
+    )
+    assert await _counters(session) == (2, 1, 0)
+
+    # Quem já votou não sai da eleição
+    client.delete(f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'})
+    assert await _counters(session) == (2, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_adjust_counters_without_election(session):
+    assert not await adjust_counters(session, voted=1)
+    assert await adjust_counters(session, voted=0)
+
+
+@pytest.mark.asyncio
+async def test_count_voters_reads_election_row(session, user):
+    await create_election(session)
+    await adjust_counters(session, eligible=10)
+    await session.commit()
+
+    assert await count_voters(session) == (11, 1)
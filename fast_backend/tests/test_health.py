@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src import health
+from src.app import app
+from src.archive import get_ballot_archive
+from src.crypto import CryptoError, get_crypto
+from src.database import get_read_session, get_session, vote_engine
+from src.write_queue import get_vote_queue
+
+
+def test_live(client):
+    response = client.get('/health/live')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'status': 'ok'}
+
+
+def test_ready_after_warm_up(client):
+    response = client.get('/health/ready')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'status': 'ready',
+        'checks': {
+            'database': 'ok',
+            'crypto': 'ok',
+            'password_hash': 'ok',
+            'database_ping': 'ok',
+        },
+    }
+
+
+def test_not_ready_when_warm_up_fails(session):
+    def broken_crypto():
+        raise CryptoError('Could not read keys')
+
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_read_session] = lambda: session
+    app.dependency_overrides[get_vote_queue] = lambda: None
+    app.dependency_overrides[get_ballot_archive] = lambda: None
+    app.dependency_overrides[get_crypto] = broken_crypto
+    try:
+        with TestClient(app) as client:
+            response = client.get('/health/ready')
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json()['status'] == 'unavailable'
+    assert response.json()['checks']['crypto'] == 'CryptoError: Could not read keys'
+
+
+@pytest.mark.asyncio
+async def test_warm_up_skips_overridden_databases(monkeypatch):
+    warmed = []
+
+    async def fake_warm_pool(engine, connections=None):
+        warmed.append(engine)
+
+    monkeypatch.setattr(health, 'warm_pool', fake_warm_pool)
+    overridden = FastAPI()
+    overridden.dependency_overrides[get_session] = lambda: None
+    overridden.dependency_overrides[get_read_session] = lambda: None
+
+    await health._warm_database(overridden)
+
+    assert warmed == [vote_engine]
@@ -0,0 +1,246 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import select, update
+
+from src import jobs, security
+from src.models import Job, table_registry
+from src.routers import jobs as jobs_router
+
+
+@pytest.fixture
+def admin_token(token, user, monkeypatch):
+    monkeypatch.setattr(security.settings, 'ADMIN_EMAILS', [user.email])
+    return token
+
+
+@pytest.fixture
+def queue_engine(tmp_path):
+    engine = jobs.sync_engine(f'sqlite+aiosqlite:///{tmp_path / "jobs.db"}')
+    table_registry.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def tasks(monkeypatch):
+    registered = {
+        'echo': 'tests.test_jobs:echo_task',
+        'boom': 'tests.test_jobs:failing_task',
+        'slow': 'tests.test_jobs:cancelled_task',
+    }
+    monkeypatch.setattr(jobs, 'TASKS', registered)
+    return registered
+
+
+def echo_task(context, params):
+    context.progress(1, 2)
+    return {'echo': params}
+
+
+def failing_task(context, params):
+    raise ValueError('bad params')
+
+
+def cancelled_task(context, params):
+    with context.engine.begin() as connection:
+        connection.execute(
+            update(Job).where(Job.id == context.job_id).values(cancel_requested=True)
+        )
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline:
+        context.progress(0, 1)
+        time.sleep(0.01)
+    return {}
+
+
+def enqueue(engine, kind, **values):
+    with engine.begin() as connection:
+        return connection.execute(
+            Job.__table__.insert()
+            .values(kind=kind, params={}, **values)
+            .returning(Job.id)
+        ).scalar()
+
+
+def status(engine, job_id):
+    with engine.connect() as connection:
+        return connection.execute(select(Job).where(Job.id == job_id)).one()
+
+
+def test_create_job(client, admin_token):
+    response = client.post(
+        '/admin/jobs/',
+        json={'kind': 'retally', 'params': {'workers': 4}},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    job = response.json()
+    assert job['kind'] == 'retally'
+    assert job['params'] == {'workers': 4}
+    assert job['status'] == 'pending'
+    assert job['progress'] == 0.0
+
+    response = client.get(
+        f'/admin/jobs/{job["id"]}', headers={'Authorization': f'Bearer {admin_token}'}
+    )
+    assert response.json() == job
+
+
+def test_create_job_unknown_kind(client, admin_token):
+    response = client.post(
+        '/admin/jobs/',
+        json={'kind': 'rm -rf'},
+        headers={'Authorization': f'Bearer {admin_token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': 'Unknown job kind: rm -rf'}
+
+
+def test_create_job_queue_full(client, admin_token, monkeypatch):
+    monkeypatch.setattr(jobs_router.settings, 'JOB_MAX_QUEUED', 1)
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    assert (
+        client.post('/admin/jobs/', json={'kind': 'retally'}, headers=headers).status_code
+        == HTTPStatus.ACCEPTED
+    )
+    response = client.post('/admin/jobs/', json={'kind': 'retally'}, headers=headers)
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'detail': 'Job queue is full'}
+
+
+def test_jobs_require_admin(client, token):
+    response = client.get('/admin/jobs/', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_list_jobs_by_status(client, admin_token):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    first = client.post('/admin/jobs/', json={'kind': 'retally'}, headers=headers)
+    client.post('/admin/jobs/', json={'kind': 'decrypt_tally'}, headers=headers)
+    client.post(f'/admin/jobs/{first.json()["id"]}/cancel', headers=headers)
+
+    response = client.get('/admin/jobs/', params={'status': 'pending'}, headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert [job['kind'] for job in response.json()['jobs']] == ['decrypt_tally']
+
+
+def test_get_job_not_found(client, admin_token):
+    response = client.get(
+        '/admin/jobs/999', headers={'Authorization': f'Bearer {admin_token}'}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Job not found'}
+
+
+def test_cancel_pending_job(client, admin_token):
+    headers = {'Authorization': f'Bearer {admin_token}'}
+    job = client.post('/admin/jobs/', json={'kind': 'retally'}, headers=headers).json()
+
+    response = client.post(f'/admin/jobs/{job["id"]}/cancel', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['status'] == 'cancelled'
+    assert response.json()['finished_at'] is not None
+
+    response = client.post(f'/admin/jobs/{job["id"]}/cancel', headers=headers)
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Job already finished'}
+
+
+@pytest.mark.asyncio
+async def test_cancel_running_job(client, admin_token, session):
+    job = Job(kind='retally', status='running')
+    session.add(job)
+    await session.commit()
+
+    response = client.post(
+        f'/admin/jobs/{job.id}/cancel', headers={'Authorization': f'Bearer {admin_token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['status'] == 'running'
+    assert response.json()['cancel_requested'] is True
+
+
+def test_claim_oldest_pending(queue_engine):
+    enqueue(queue_engine, 'echo', status='cancelled')
+    first = enqueue(queue_engine, 'echo')
+    enqueue(queue_engine, 'echo')
+
+    assert jobs.claim(queue_engine, 'worker-1') == (first, 'echo', {})
+    claimed = status(queue_engine, first)
+    assert claimed.status == 'running'
+    assert claimed.worker == 'worker-1'
+    assert claimed.heartbeat_at is not None
+
+
+def test_claim_empty_queue(queue_engine):
+    assert jobs.claim(queue_engine, 'worker-1') is None
+
+
+def test_work_runs_queue(queue_engine, tasks):
+    done = enqueue(queue_engine, 'echo')
+    failed = enqueue(queue_engine, 'boom')
+
+    jobs.work(str(queue_engine.url), once=True)
+
+    job = status(queue_engine, done)
+    assert job.status == 'done'
+    assert job.progress == 1.0
+    assert job.result == {'echo': {}}
+    assert job.finished_at is not None
+    job = status(queue_engine, failed)
+    assert job.status == 'failed'
+    assert job.error == 'ValueError: bad params'
+
+
+def test_run_cancelled_by_heartbeat(queue_engine, tasks):
+    job_id = enqueue(queue_engine, 'slow')
+    jobs.claim(queue_engine, 'worker-1')
+
+    jobs.run(queue_engine, job_id, 'slow', {}, 'worker-1', heartbeat=0.01)
+
+    assert status(queue_engine, job_id).status == 'cancelled'
+
+
+def test_run_keeps_job_recovered_as_stale(queue_engine, tasks, caplog):
+    job_id = enqueue(queue_engine, 'echo')
+    jobs.claim(queue_engine, 'worker-1')
+    with queue_engine.begin() as connection:
+        connection.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(status='failed', error='Worker lost')
+        )
+
+    jobs.run(queue_engine, job_id, 'echo', {}, 'worker-1')
+
+    job = status(queue_engine, job_id)
+    assert job.status == 'failed'
+    assert job.result is None
+    assert 'no longer running' in caplog.text
+
+
+def test_recover_stale(queue_engine):
+    stale = enqueue(
+        queue_engine,
+        'echo',
+        status='running',
+        heartbeat_at=jobs.now() - timedelta(minutes=5),
+    )
+    alive = enqueue(queue_engine, 'echo', status='running', heartbeat_at=jobs.now())
+
+    assert jobs.recover_stale(queue_engine, stale_after=60) == 1
+    assert status(queue_engine, stale).status == 'failed'
+    assert status(queue_engine, stale).error == 'Worker lost'
+    assert status(queue_engine, alive).status == 'running'
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+import pytest
+
+from src.keystore import KeyBundle, write_bundle
+
+
+@pytest.fixture
+def bundle(tmp_path, crypto):
+    write_bundle(tmp_path / 'public.bundle', {'context': b'ctx', 'public_key': b'pk'})
+    bundle = KeyBundle(tmp_path / 'public.bundle')
+    crypto.bundles = [bundle]
+    yield bundle
+    bundle.close()
+
+
+def test_public_manifest(client, bundle):
+    response = client.get('/keys/public')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert response.json() == {
+        'slots': 4,
+        'bundles': [
+            {
+                'digest': bundle.digest,
+                'size': len(bundle.data),
+                'url': f'/keys/public/{bundle.digest}',
+            }
+        ],
+    }
+
+
+def test_public_manifest_not_modified(client, bundle):
+    etag = client.get('/keys/public').headers['ETag']
+
+    response = client.get('/keys/public', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.content
+
+
+def test_public_bundle_is_immutable(client, bundle, tmp_path):
+    response = client.get(f'/keys/public/{bundle.digest}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.content == (tmp_path / 'public.bundle').read_bytes()
+    assert response.headers['ETag'] == f'"{bundle.digest}"'
+    assert 'immutable' in response.headers['Cache-Control']
+
+    revalidated = client.get(
+        f'/keys/public/{bundle.digest}',
+        headers={'If-None-Match': f'W/"other", "{bundle.digest}"'},
+    )
+    assert revalidated.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_unknown_bundle(client, bundle):
+    response = client.get('/keys/public/' + '0' * 64)
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_public_manifest_without_bundle(client):
+    response = client.get('/keys/public')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
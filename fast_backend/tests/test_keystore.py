@@ -0,0 +1,44 @@
+import mmap
+
+import pytest
+
+from src.keystore import KeyBundle, KeyBundleError, write_bundle
+
+
+def test_write_and_read_bundle(tmp_path):
+    path = tmp_path / 'public.bundle'
+    write_bundle(path, {'context': b'ctx', 'public_key': b'pk' * 1000})
+
+    bundle = KeyBundle(path)
+
+    assert bundle.names() == ['context', 'public_key']
+    assert bytes(bundle['context']) == b'ctx'
+    assert bytes(bundle['public_key']) == b'pk' * 1000
+    assert 'eval_mult' not in bundle
+
+
+def test_bundle_slices_are_views_over_the_mapping(tmp_path):
+    path = tmp_path / 'public.bundle'
+    write_bundle(path, {'public_key': b'abc'})
+
+    view = KeyBundle(path)['public_key']
+
+    assert isinstance(view.obj, mmap.mmap)
+    assert view.readonly
+
+
+def test_bundle_rejects_other_files(tmp_path):
+    path = tmp_path / 'public.bundle'
+    path.write_bytes(b'not a bundle at all')
+
+    with pytest.raises(KeyBundleError):
+        KeyBundle(path)
+
+
+def test_bundle_rejects_truncated_file(tmp_path):
+    path = tmp_path / 'public.bundle'
+    write_bundle(path, {'public_key': b'x' * 100})
+    path.write_bytes(path.read_bytes()[:-10])
+
+    with pytest.raises(KeyBundleError):
+        KeyBundle(path)
@@ -0,0 +1,52 @@
+import pytest
+
+from src import database, health
+from src.app import app
+from src.crypto import get_crypto
+from tools.loadtest import percentile, run_load
+
+
+def test_percentile_nearest_rank():
+    samples = [float(n) for n in range(1, 101)]
+
+    assert percentile(samples, 50) == 50.0  # noqa: PLR2004
+    assert percentile(samples, 95) == 95.0  # noqa: PLR2004
+    assert percentile(samples, 99) == 99.0  # noqa: PLR2004
+    assert percentile([], 99) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_run_load_reports_every_route(crypto):
+    app.dependency_overrides[get_crypto] = lambda: crypto
+    try:
+        report = await run_load(users=2, duration=5, iterations=8, seed=1)
+    finally:
+        app.dependency_overrides.clear()
+    data = report.as_dict()
+
+    assert 'POST /users/' in data['routes']
+    assert 'POST /auth/token' in data['routes']
+    assert all(route['errors'] == 0 for route in data['routes'].values())
+    # O login pode ser repetido depois de um 429 do teto de verificações
+    assert data['requests'] >= 2 * (2 + 8)
+
+
+@pytest.mark.asyncio
+async def test_run_load_keeps_off_the_configured_databases(crypto, monkeypatch):
+    warmed = []
+    warm_pool = health.warm_pool
+
+    async def record_warm_pool(engine, connections=None):
+        warmed.append(engine)
+        await warm_pool(engine, connections)
+
+    monkeypatch.setattr(health, 'warm_pool', record_warm_pool)
+    app.dependency_overrides[get_crypto] = lambda: crypto
+    try:
+        await run_load(users=1, duration=5, iterations=1, seed=1)
+    finally:
+        app.dependency_overrides.clear()
+
+    configured = {database.engine, database.read_engine, database.vote_engine}
+    assert len(warmed) == 3  # noqa: PLR2004
+    assert configured.isdisjoint(warmed)
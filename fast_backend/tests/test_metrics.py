@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+import pytest
+
+from src.metrics import Counter, Histogram, Metric, fhe_timer, registry
+
+
+def test_metrics_endpoint_exposes_route_template(client, user):
+    client.get(f'/users/{user.id}')
+
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert (
+        'http_requests_total{method="GET",route="/users/{user_id}",status="200"}'
+        in response.text
+    )
+    assert 'http_request_duration_seconds_bucket{method="GET",' in response.text
+
+
+def test_metrics_unmatched_route_does_not_leak_path(client):
+    client.get('/nao/existe/123')
+
+    response = client.get('/metrics')
+
+    assert 'route="<unmatched>",status="404"' in response.text
+    assert '/nao/existe/123' not in response.text
+
+
+def test_metrics_password_hash_timings(client, user, token):
+    response = client.get('/metrics')
+
+    assert 'password_hash_duration_seconds_count{operation="hash"}' in response.text
+    assert 'password_hash_duration_seconds_count{operation="verify"}' in response.text
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('h', 'teste', ('op',), buckets=(0.1, 1.0))
+    histogram.observe(0.05, 'a')
+    histogram.observe(0.5, 'a')
+    histogram.observe(5.0, 'a')
+
+    lines = histogram.render()
+
+    assert 'h_bucket{op="a",le="0.1"} 1' in lines
+    assert 'h_bucket{op="a",le="1"} 2' in lines
+    assert 'h_bucket{op="a",le="+Inf"} 3' in lines
+    assert 'h_count{op="a"} 3' in lines
+
+
+def test_counter_escapes_label_values():
+    counter = Counter('c', 'teste', ('path',))
+    counter.inc('a"b')
+
+    assert 'c{path="a\\"b"} 1' in counter.render()
+
+
+def test_fhe_timer_counts_operation():
+    with fhe_timer('encrypt'):
+        pass
+
+    assert 'fhe_operations_total{operation="encrypt"}' in registry.render()
+
+
+def test_metric_subclass_must_implement_clear():
+    class Incomplete(Metric):
+        def render(self):
+            return self.header()
+
+    with pytest.raises(TypeError, match='clear'):
+        Incomplete('incompleta', 'Sem clear.')
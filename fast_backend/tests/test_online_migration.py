@@ -0,0 +1,145 @@
+import pytest
+import sqlalchemy as sa
+
+from src.online_migration import STATE_TABLE, OnlineRebuild, rebuild_table
+
+ROWS = 25
+BATCH = 10
+
+
+class Interrupted(Exception):
+    pass
+
+
+def _schema():
+    return [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('email', sa.String(), nullable=False, unique=True),
+        sa.Column('email_lower', sa.String(), nullable=False),
+        sa.Column('ativo', sa.Boolean(), server_default=sa.text('1'), nullable=False),
+        sa.Index('ix_usuarios_email_lower', 'email_lower'),
+    ]
+
+
+@pytest.fixture
+def connection(tmp_path):
+    engine = sa.create_engine(f'sqlite:///{tmp_path / "database.db"}')
+    with engine.connect() as connection:
+        connection.exec_driver_sql(
+            'CREATE TABLE usuarios (id INTEGER PRIMARY KEY, email VARCHAR NOT NULL)'
+        )
+        connection.execute(
+            sa.text('INSERT INTO usuarios (id, email) VALUES (:id, :email)'),
+            [{'id': n, 'email': f'User{n}@Test.com'} for n in range(1, ROWS + 1)],
+        )
+        connection.commit()
+        yield connection
+    engine.dispose()
+
+
+def _rows(connection):
+    return connection.exec_driver_sql(
+        'SELECT id, email, email_lower, ativo FROM usuarios ORDER BY id'
+    ).all()
+
+
+def _names(connection):
+    return {
+        row[0] for row in connection.exec_driver_sql('SELECT name FROM sqlite_master')
+    }
+
+
+def test_rebuild_table(connection):
+    progress = []
+
+    rebuild_table(
+        connection,
+        'usuarios',
+        _schema(),
+        expressions={'email_lower': 'lower(email)'},
+        batch_size=BATCH,
+        progress=lambda done, total: progress.append((done, total)),
+    )
+
+    assert progress == [(10, ROWS), (20, ROWS), (ROWS, ROWS)]
+    assert _rows(connection)[0] == (1, 'User1@Test.com', 'user1@test.com', 1)
+    assert len(_rows(connection)) == ROWS
+    assert 'ix_usuarios_email_lower' in _names(connection)
+    assert not {name for name in _names(connection) if name.startswith('_')}
+
+
+def test_rebuild_resumes_and_keeps_concurrent_writes(connection):
+    expressions = {'email_lower': 'lower(email)'}
+    deleted = 3
+    rebuild = OnlineRebuild(connection, 'usuarios', _schema(), expressions)
+    rebuild.prepare()
+
+    def stop(done, total):
+        raise Interrupted
+
+    with pytest.raises(Interrupted):
+        rebuild.copy(batch_size=BATCH, progress=stop)
+    assert (
+        connection.exec_driver_sql(f'SELECT last_key FROM {STATE_TABLE}').scalar()
+        == BATCH
+    )
+
+    # A API continua gravando na tabela antiga durante a cópia
+    connection.exec_driver_sql("UPDATE usuarios SET email = 'A@B.com' WHERE id = 5")
+    connection.exec_driver_sql("UPDATE usuarios SET email = 'C@D.com' WHERE id = 15")
+    connection.exec_driver_sql(f'DELETE FROM usuarios WHERE id = {deleted}')
+    connection.exec_driver_sql("INSERT INTO usuarios (id, email) VALUES (99, 'N@E.com')")
+
+    resumed = OnlineRebuild(connection, 'usuarios', _schema(), expressions)
+    resumed.prepare()
+    assert resumed.copy(batch_size=BATCH) == ROWS - BATCH - 1
+    resumed.swap()
+
+    rows = {row.id: row for row in _rows(connection)}
+    assert len(rows) == ROWS
+    assert deleted not in rows
+    assert rows[5].email_lower == 'a@b.com'
+    assert rows[15].email_lower == 'c@d.com'
+    assert rows[99].email_lower == 'n@e.com'
+
+
+def _unique_lower_schema():
+    return [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('email_lower', sa.String(), nullable=False, unique=True),
+    ]
+
+
+def test_rebuild_fails_on_duplicate_under_new_constraint(connection):
+    connection.exec_driver_sql(
+        "UPDATE usuarios SET email = 'user1@test.com' WHERE id = 2"
+    )
+    connection.commit()
+
+    with pytest.raises(sa.exc.IntegrityError, match='UNIQUE'):
+        rebuild_table(
+            connection,
+            'usuarios',
+            _unique_lower_schema(),
+            expressions={'email_lower': 'lower(email)'},
+            batch_size=BATCH,
+        )
+
+    assert len(connection.exec_driver_sql('SELECT id FROM usuarios').all()) == ROWS
+
+
+def test_concurrent_write_cannot_replace_another_row(connection):
+    rebuild = OnlineRebuild(
+        connection, 'usuarios', _unique_lower_schema(), {'email_lower': 'lower(email)'}
+    )
+    rebuild.prepare()
+    rebuild.copy(batch_size=BATCH)
+
+    with pytest.raises(sa.exc.IntegrityError, match='UNIQUE'):
+        connection.exec_driver_sql(
+            "UPDATE usuarios SET email = 'USER1@test.com' WHERE id = 2"
+        )
+
+    shadow = connection.exec_driver_sql('SELECT COUNT(*) FROM _usuarios_nova').scalar()
+    assert shadow == ROWS
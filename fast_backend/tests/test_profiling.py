@@ -0,0 +1,92 @@
+import pstats
+import threading
+import time
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.app import app
+from src.database import get_read_session, get_session
+from src.profiling import ProfilingMiddleware, StackSampler
+
+
+@pytest.fixture
+def profiled_client(session, tmp_path):
+    def get_session_override():
+        return session
+
+    def make(**kwargs):
+        wrapped = ProfilingMiddleware(app, directory=tmp_path, interval=0.0005, **kwargs)
+        return TestClient(wrapped)
+
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_read_session] = get_session_override
+    yield make
+    app.dependency_overrides.clear()
+
+
+def test_profile_with_admin_token_writes_folded_stacks(profiled_client, tmp_path, user):
+    client = profiled_client(token='segredo')
+
+    response = client.get(f'/users/{user.id}', headers={'X-Profile-Token': 'segredo'})
+
+    assert response.status_code == HTTPStatus.OK
+    [output] = tmp_path.iterdir()
+    assert output.name.endswith('-GET-users_user_id.folded')
+    for line in output.read_text().splitlines():
+        stack, count = line.rsplit(' ', 1)
+        assert int(count) > 0
+        assert stack
+
+
+def test_profile_wrong_token_is_ignored(profiled_client, tmp_path):
+    client = profiled_client(token='segredo')
+
+    response = client.get('/', headers={'X-Profile-Token': 'chute'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_without_header_is_not_captured(profiled_client, tmp_path):
+    client = profiled_client(token='segredo')
+
+    client.get('/')
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profile_sampling_rate_deterministic_mode(profiled_client, tmp_path, user):
+    client = profiled_client(sample_rate=1.0, mode='deterministic')
+
+    client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    [output] = tmp_path.iterdir()
+    assert output.suffix == '.prof'
+    stats = pstats.Stats(str(output))
+    assert any(func[2] == 'login_for_access_token' for func in stats.stats)
+
+
+def test_sampler_sees_worker_threads():
+    done = threading.Event()
+
+    def busy_worker():
+        while not done.is_set():
+            time.sleep(0.0001)
+
+    worker = threading.Thread(target=busy_worker, name='pool-worker')
+    sampler = StackSampler(interval=0.001)
+    worker.start()
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    done.set()
+    worker.join()
+
+    stacks = [stack for stack in sampler.samples if stack.startswith('pool-worker;')]
+    assert stacks
+    assert all('busy_worker' in stack for stack in stacks)
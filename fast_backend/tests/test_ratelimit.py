@@ -0,0 +1,117 @@
+from http import HTTPStatus
+
+import pytest
+
+from src.ratelimit import ConcurrencyCap, TokenBucketLimiter
+from src.routers import auth
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def test_bucket_allows_burst_then_refills(clock):
+    limiter = TokenBucketLimiter(rate=2, capacity=3, clock=clock)
+
+    assert [limiter.acquire('a') for _ in range(3)] == [0, 0, 0]
+    assert limiter.acquire('a') == pytest.approx(0.5)
+    assert limiter.acquire('b') == 0
+
+    clock.now = 0.5
+    assert limiter.acquire('a') == 0
+
+
+def test_bucket_forgets_oldest_keys(clock):
+    limiter = TokenBucketLimiter(rate=0, capacity=1, max_keys=2, clock=clock)
+    limiter.acquire('a')
+    limiter.acquire('b')
+    limiter.acquire('c')
+
+    assert limiter.retry_after('a') == 0
+    assert limiter.retry_after('c') == float('inf')
+
+
+def test_concurrency_cap_never_waits():
+    cap = ConcurrencyCap(1)
+
+    assert cap.try_acquire()
+    assert not cap.try_acquire()
+    cap.release()
+    assert cap.try_acquire()
+
+
+def login(client, user, password=None):
+    return client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': password or user.clean_password},
+    )
+
+
+def test_login_limited_per_client(client, user, login_guard):
+    login_guard.clients = TokenBucketLimiter(rate=0, capacity=2)
+
+    statuses = [login(client, user).status_code for _ in range(3)]
+
+    assert statuses == [HTTPStatus.OK, HTTPStatus.OK, HTTPStatus.TOO_MANY_REQUESTS]
+
+
+def test_login_failures_lock_the_account_only(client, user, other_user, login_guard):
+    login_guard.accounts = TokenBucketLimiter(rate=0.01, capacity=2)
+
+    statuses = [login(client, user, 'wrong').status_code for _ in range(3)]
+    response = login(client, user, 'wrong')
+
+    assert statuses == [
+        HTTPStatus.UNAUTHORIZED,
+        HTTPStatus.UNAUTHORIZED,
+        HTTPStatus.TOO_MANY_REQUESTS,
+    ]
+    assert response.headers['Retry-After'] == '100'
+    assert login(client, other_user, 'wrong').status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_failures_from_other_clients_do_not_lock_the_owner(client, user, login_guard):
+    login_guard.accounts = TokenBucketLimiter(rate=0, capacity=5)
+    for _ in range(6):
+        login_guard.failed(user.email.lower(), '10.0.0.1')
+
+    assert login(client, user).status_code == HTTPStatus.OK
+
+
+def test_locked_account_is_rejected_before_verifying(
+    client, user, login_guard, monkeypatch
+):
+    login_guard.accounts = TokenBucketLimiter(rate=0, capacity=1)
+    login(client, user, 'wrong')
+    calls = []
+    monkeypatch.setattr(auth, 'verify_password', lambda *args: calls.append(args) or True)
+
+    response = login(client, user)
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert calls == []
+
+
+def test_successful_logins_do_not_consume_the_account(client, user, login_guard):
+    login_guard.accounts = TokenBucketLimiter(rate=0, capacity=1)
+
+    assert login(client, user).status_code == HTTPStatus.OK
+    assert login(client, user).status_code == HTTPStatus.OK
+
+
+def test_login_rejected_when_verifications_are_saturated(client, user, login_guard):
+    login_guard.verifications = ConcurrencyCap(0)
+
+    response = login(client, user)
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.json() == {'detail': 'Too many login attempts'}
@@ -0,0 +1,210 @@
+import zlib
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.archive import BALLOT_ID, RECORD, BallotArchive
+from src.models import Ballot, Tally, table_registry
+from src.voting import TALLY_ID
+from tools.retally import retally
+
+VOTES = [0, 1, 1, 3, 1]
+
+
+@pytest.fixture
+def election(tmp_path, crypto):
+    """Banco em arquivo com cinco cédulas, o acumulador e o arquivo de auditoria."""
+    database = tmp_path / 'database.db'
+    engine = create_engine(f'sqlite:///{database}')
+    table_registry.metadata.create_all(engine)
+
+    ballots = [crypto.encrypt_vote(candidate) for candidate in VOTES]
+    archive = BallotArchive(tmp_path / 'database.ballots')
+    with Session(engine) as session:
+        for n, ciphertext in enumerate(ballots):
+            session.add(
+                Ballot(idempotency_key=f'k{n}', ciphertext=ciphertext, ballot_hash='h')
+            )
+        session.add(
+            Tally(id=TALLY_ID, ciphertext=crypto.add_all(ballots), ballots=len(VOTES))
+        )
+        session.commit()
+    for ballot_id, ciphertext in enumerate(ballots, start=1):
+        archive.append(ballot_id, ciphertext)
+    archive.close()
+    engine.dispose()
+    return database, archive.path
+
+
+@pytest.mark.parametrize('source', ['archive', 'db'])
+def test_retally_matches_stored_tally(election, crypto, source):
+    database, archive = election
+
+    report = retally(
+        crypto, database, archive if source == 'archive' else None, secret=crypto
+    )
+
+    assert report.ok
+    assert report.ballots == len(VOTES)
+    assert report.recomputed == report.stored == [1, 3, 0, 1]
+
+
+def test_retally_reports_progress_and_summary(election, crypto):
+    database, archive = election
+    calls = []
+
+    report = retally(
+        crypto,
+        database,
+        archive,
+        chunk_size=2,
+        progress=lambda done, total: calls.append((done, total)),
+    )
+
+    assert calls == [(2, 5), (4, 5), (5, 5)]
+    summary = report.summary()
+    assert summary['ok'] is True
+    assert summary['ballots'] == len(VOTES)
+
+
+@pytest.mark.parametrize('source', ['archive', 'db'])
+def test_retally_ignores_votes_cast_while_it_runs(election, crypto, source):
+    database, archive = election
+    engine = create_engine(f'sqlite:///{database}')
+    writer = BallotArchive(archive)
+
+    def vote(done, total):
+        if done == total:
+            return
+        ciphertext = crypto.encrypt_vote(2)
+        with Session(engine) as session:
+            ballot = Ballot(
+                idempotency_key=f'late{done}', ciphertext=ciphertext, ballot_hash='h'
+            )
+            session.add(ballot)
+            tally = session.get(Tally, TALLY_ID)
+            tally.ciphertext = crypto.add_all([tally.ciphertext, ciphertext])
+            tally.ballots += 1
+            session.commit()
+            writer.append(ballot.id, ciphertext)
+
+    report = retally(
+        crypto,
+        database,
+        archive if source == 'archive' else None,
+        chunk_size=2,
+        progress=vote,
+        secret=crypto,
+    )
+    writer.close()
+    engine.dispose()
+
+    assert report.ok
+    assert report.stored_ballots == report.ballots == len(VOTES)
+    assert report.stored == [1, 3, 0, 1]
+
+
+def test_retally_reports_tampered_tally(election, crypto):
+    database, archive = election
+    engine = create_engine(f'sqlite:///{database}')
+    with Session(engine) as session:
+        session.get(Tally, TALLY_ID).ciphertext = crypto.encrypt_vote(2)
+        session.commit()
+    engine.dispose()
+
+    report = retally(crypto, database, archive, secret=crypto)
+
+    assert not report.matches
+    assert report.recomputed == [1, 3, 0, 1]
+    assert report.stored == [0, 0, 1, 0]
+    assert 'DIVERGÊNCIA' in report.render()
+
+
+def test_retally_reports_corrupted_and_duplicated_records(election, crypto):
+    database, archive = election
+    data = bytearray(archive.read_bytes())
+    data[-1] ^= 0xFF
+    # Gravado direto: o BallotArchive cortaria o registro corrompido e não
+    # repetiria a cédula 1
+    payload = crypto.encrypt_vote(0)
+    checksum = zlib.crc32(payload, zlib.crc32(BALLOT_ID.pack(1)))
+    data += RECORD.pack(len(payload), checksum, 1) + payload
+    archive.write_bytes(bytes(data))
+
+    report = retally(crypto, database, archive, chunk_size=2)
+
+    assert not report.ok
+    assert report.duplicates == [1]
+    assert [ballot_id for ballot_id, _ in report.errors] == [5]
+    assert report.ballots == len(VOTES) - 1
+
+
+def test_parallel_retally_with_openfhe(tmp_path):
+    pytest.importorskip('openfhe')
+    from src.crypto import CryptoService  # noqa: PLC0415
+
+    service = CryptoService.generate(plaintext_modulus=65537, depth=1, slots=4)
+    service.export_bundle(tmp_path / 'public.bundle')
+    engine = create_engine(f'sqlite:///{tmp_path / "database.db"}')
+    table_registry.metadata.create_all(engine)
+    ballots = [service.encrypt_vote(candidate) for candidate in VOTES]
+    with Session(engine) as session:
+        total = ballots[0]
+        for n, ciphertext in enumerate(ballots):
+            session.add(
+                Ballot(idempotency_key=f'k{n}', ciphertext=ciphertext, ballot_hash='h')
+            )
+            if n:
+                total = service.add(total, ciphertext)
+        session.add(Tally(id=TALLY_ID, ciphertext=total, ballots=len(VOTES)))
+        session.commit()
+    engine.dispose()
+
+    report = retally(
+        service,
+        tmp_path / 'database.db',
+        bundles=[tmp_path / 'public.bundle'],
+        workers=2,
+        chunk_size=2,
+        secret=service,
+    )
+
+    assert report.ok
+    assert report.recomputed == [1, 3, 0, 1]
+
+
+def test_parallel_crt_retally_with_openfhe(tmp_path):
+    pytest.importorskip('openfhe')
+    from src.crypto import MultiModulusCrypto  # noqa: PLC0415
+
+    service = MultiModulusCrypto.generate([65537, 786433], depth=1, slots=4)
+    bundles = [tmp_path / f'public.t{modulus}.bundle' for modulus in service.moduli]
+    for lane, bundle in zip(service.services, bundles):
+        lane.export_bundle(bundle)
+    engine = create_engine(f'sqlite:///{tmp_path / "database.db"}')
+    table_registry.metadata.create_all(engine)
+    ballots = [service.encrypt_vote(candidate) for candidate in VOTES]
+    with Session(engine) as session:
+        for n, ciphertext in enumerate(ballots):
+            session.add(
+                Ballot(idempotency_key=f'k{n}', ciphertext=ciphertext, ballot_hash='h')
+            )
+        session.add(
+            Tally(id=TALLY_ID, ciphertext=service.add_all(ballots), ballots=len(VOTES))
+        )
+        session.commit()
+    engine.dispose()
+
+    report = retally(
+        service,
+        tmp_path / 'database.db',
+        bundles=bundles,
+        workers=2,
+        chunk_size=2,
+        secret=service,
+    )
+
+    assert report.ok
+    assert report.ballots == len(VOTES)
+    assert report.recomputed == [1, 3, 0, 1]
@@ -2,7 +2,7 @@ from http import HTTPStatus
 
 from jwt import decode
 
-from src.security import create_access_token, settings
+from src.security import PRUNE_INTERVAL, RevocationSet, create_access_token, settings
 
 
 def test_jwt():
@@ -23,3 +23,26 @@ def test_jwt_invalid_token(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_revocation_set_forgets_expired_tokens():
+    now = [100.0]
+    revoked = RevocationSet(clock=lambda: now[0])
+    revoked.revoke('a', 110.0)
+    revoked.revoke('b', 200.0)
+
+    assert 'a' in revoked
+    now[0] = 150.0
+    assert len(revoked) == 1
+    assert 'a' not in revoked
+    assert 'b' in revoked
+
+
+def test_revocation_set_prunes_the_database_once_per_interval():
+    now = [100.0]
+    revoked = RevocationSet(clock=lambda: now[0])
+
+    assert revoked.stored_prune_due()
+    assert not revoked.stored_prune_due()
+    now[0] += PRUNE_INTERVAL
+    assert revoked.stored_prune_due()
@@ -0,0 +1,188 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from src import security, tracing
+from src.app import app
+from src.models import User
+
+MAX_SPANS = 2
+
+
+@pytest.fixture(scope='module')
+def _traced_engine(engine):
+    # Os listeners ficam no engine da sessão de testes; sem trace ativo, não
+    # fazem nada
+    tracing.instrument_engine(engine)
+
+
+@pytest.fixture
+def tracer():
+    return tracing.Tracer(buffer_size=10)
+
+
+@pytest.fixture
+def traced_client(client, tracer):
+    tracing.instrument_routes(app)
+    return TestClient(tracing.TracingMiddleware(app, tracer))
+
+
+def test_span_without_trace_is_noop():
+    with tracing.span('solto') as span:
+        assert span is None
+
+
+def test_spans_nest_under_current_span(tracer):
+    with tracer.trace('teste'):
+        with tracing.span('externo', 'internal'):
+            with tracing.span('interno', 'crypto', slots=4):
+                pass
+
+    [trace] = tracer.buffer.snapshot()
+    outer, inner = trace['spans']
+    assert outer['name'] == 'externo'
+    assert outer['parent'] == 0
+    assert inner['parent'] == outer['id']
+    assert inner['kind'] == 'crypto'
+    assert inner['slots'] == 4  # noqa: PLR2004
+
+
+def test_span_records_error(tracer):
+    with pytest.raises(ValueError, match='falha'), tracer.trace('teste'):
+        with tracing.span('falha'):
+            raise ValueError('falha')
+
+    [span] = tracer.buffer.snapshot()[0]['spans']
+    assert span['error'] == 'ValueError'
+
+
+@pytest.mark.asyncio
+async def test_span_follows_run_in_threadpool(tracer):
+    def work():
+        with tracing.span('thread'):
+            pass
+
+    with tracer.trace('teste'):
+        await run_in_threadpool(work)
+
+    [span] = tracer.buffer.snapshot()[0]['spans']
+    assert span['name'] == 'thread'
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('_traced_engine')
+async def test_instrument_engine_records_queries(session, tracer, user):
+    with tracer.trace('teste'):
+        await session.scalar(select(User).where(User.id == user.id))
+
+    [span] = tracer.buffer.snapshot()[0]['spans']
+    assert span['kind'] == 'db'
+    assert span['statement'].startswith('SELECT')
+
+
+def test_max_spans_drops_extra_spans():
+    tracer = tracing.Tracer(max_spans=MAX_SPANS)
+
+    with tracer.trace('teste'):
+        for _ in range(MAX_SPANS + 1):
+            with tracing.span('passo'):
+                pass
+
+    [trace] = tracer.buffer.snapshot()
+    assert len(trace['spans']) == MAX_SPANS
+    assert trace['dropped_spans'] == 1
+
+
+def test_min_duration_skips_fast_traces():
+    tracer = tracing.Tracer(min_duration=60.0)
+
+    with tracer.trace('teste'):
+        pass
+
+    assert tracer.buffer.snapshot() == []
+
+
+def test_json_lines_sink(tmp_path):
+    path = tmp_path / 'traces' / 'traces.jsonl'
+    tracer = tracing.Tracer(path=path)
+
+    with tracer.trace('primeiro'):
+        pass
+    with tracer.trace('segundo'):
+        pass
+    tracer.close()
+
+    names = [json.loads(line)['name'] for line in path.read_text().splitlines()]
+    assert names == ['primeiro', 'segundo']
+
+
+@pytest.mark.usefixtures('_traced_engine')
+def test_middleware_traces_request(traced_client, tracer, user):
+    response = traced_client.get(f'/users/{user.id}')
+
+    assert response.status_code == HTTPStatus.OK
+    [trace] = tracer.buffer.snapshot()
+    assert trace['name'] == 'GET /users/{user_id}'
+    assert trace['status'] == HTTPStatus.OK
+    kinds = {span['kind'] for span in trace['spans']}
+    assert {'handler', 'db'} <= kinds
+    [handler] = [span for span in trace['spans'] if span['kind'] == 'handler']
+    assert handler['endpoint'] == 'get_user_by_id'
+
+
+def test_middleware_unmatched_route(traced_client, tracer):
+    response = traced_client.get('/nao-existe')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert tracer.buffer.snapshot()[0]['name'] == 'GET <unmatched>'
+
+
+def test_crypto_spans_from_password_hashing(tracer):
+    with tracer.trace('teste'):
+        security.verify_password('senha', security.get_password_hash('senha'))
+
+    names = [span['name'] for span in tracer.buffer.snapshot()[0]['spans']]
+    assert names == ['argon2.hash', 'argon2.verify']
+
+
+@pytest.fixture
+def admin_token(token, user, monkeypatch):
+    monkeypatch.setattr(security.settings, 'ADMIN_EMAILS', [user.email])
+    return token
+
+
+def test_admin_traces_disabled(client, admin_token):
+    response = client.get(
+        '/admin/traces', headers={'Authorization': f'Bearer {admin_token}'}
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.json() == {'detail': 'Tracing disabled'}
+
+
+def test_admin_traces_list_and_get(client, admin_token, tracer, monkeypatch):
+    monkeypatch.setattr(app.state, 'tracer', tracer)
+    with tracer.trace('GET /lento'):
+        pass
+    headers = {'Authorization': f'Bearer {admin_token}'}
+
+    [trace] = client.get('/admin/traces', headers=headers).json()['traces']
+    response = client.get(f'/admin/traces/{trace["trace_id"]}', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['name'] == 'GET /lento'
+
+
+def test_admin_trace_not_found(client, admin_token, tracer, monkeypatch):
+    monkeypatch.setattr(app.state, 'tracer', tracer)
+
+    response = client.get(
+        '/admin/traces/desconhecido', headers={'Authorization': f'Bearer {admin_token}'}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'Trace not found'}
@@ -0,0 +1,130 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import pytest
+
+from src import turnout as turnout_module
+from src.app import app
+from src.turnout import TurnoutBroadcaster, count_voters, get_turnout
+
+
+class FakeCounter:
+    def __init__(self, eligible, voted):
+        self.result = (eligible, voted)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+def _events(chunks):
+    return [
+        json.loads(line.removeprefix('data: '))
+        for chunk in chunks
+        for line in chunk.decode().splitlines()
+        if line.startswith('data: ')
+    ]
+
+
+async def _take(stream, count):
+    chunks = []
+    async for chunk in stream:
+        if chunk.startswith(b'id:'):
+            chunks.append(chunk)
+            if len(chunks) == count:
+                break
+    return _events(chunks)
+
+
+@pytest.mark.asyncio
+async def test_stream_pushes_counts_and_ballots():
+    counter = FakeCounter(10, 3)
+    broadcaster = TurnoutBroadcaster(counter, interval=0.01, resync=60)
+    stream = broadcaster.subscribe(heartbeat=1, max_age=5)
+
+    first = await _take(stream, 1)
+    broadcaster.ballot_cast()
+    second = await _take(stream, 1)
+    await stream.aclose()
+    await broadcaster.stop()
+
+    assert first[0]['voted'] == 3  # noqa: PLR2004
+    assert first[0]['turnout'] == 0.3  # noqa: PLR2004
+    assert second[0]['voted'] == 4  # noqa: PLR2004
+    assert second[0]['ballots_per_second'] > 0
+
+
+@pytest.mark.asyncio
+async def test_subscribers_share_one_producer():
+    counter = FakeCounter(100, 50)
+    broadcaster = TurnoutBroadcaster(counter, interval=0.01, resync=60)
+    streams = [broadcaster.subscribe(heartbeat=1, max_age=5) for _ in range(200)]
+
+    results = await asyncio.gather(*(_take(stream, 1) for stream in streams))
+
+    assert counter.calls == 1
+    assert {events[0]['voted'] for events in results} == {50}
+    assert broadcaster.subscribers == 200  # noqa: PLR2004
+    for stream in streams:
+        await stream.aclose()
+    assert broadcaster.subscribers == 0
+    await broadcaster.stop()
+
+
+@pytest.mark.asyncio
+async def test_producer_stops_without_subscribers():
+    broadcaster = TurnoutBroadcaster(FakeCounter(1, 0), interval=0.01)
+    stream = broadcaster.subscribe(heartbeat=1, max_age=5)
+    await _take(stream, 1)
+    await stream.aclose()
+
+    await asyncio.sleep(0.05)
+
+    assert broadcaster._task.done()
+
+
+@pytest.mark.asyncio
+async def test_count_voters(session, user, other_user):
+    other_user.statusVotacao = False
+    await session.commit()
+
+    assert await count_voters(session) == (2, 1)
+
+
+def test_turnout_stream_endpoint(client, monkeypatch):
+    broadcaster = TurnoutBroadcaster(FakeCounter(4, 1), interval=0.01)
+    app.dependency_overrides[get_turnout] = lambda: broadcaster
+    monkeypatch.setattr(turnout_module.settings, 'TURNOUT_STREAM_MAX_AGE', 0.05)
+
+    response = client.get('/turnout/stream')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/event-stream')
+    assert response.text.startswith('retry: ')
+    assert _events([response.content])[0] == {
+        'eligible': 4,
+        'voted': 1,
+        'turnout': 0.25,
+        'ballots_per_second': 0.0,
+    }
+
+
+def test_turnout_stream_disabled(client):
+    response = client.get('/turnout/stream')
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+
+def test_vote_feeds_turnout_counter(client, voter, voter_token):
+    broadcaster = TurnoutBroadcaster(FakeCounter(1, 0))
+    app.dependency_overrides[get_turnout] = lambda: broadcaster
+
+    client.post(
+        '/votes/',
+        headers={'Authorization': f'Bearer {voter_token}'},
+        json={'candidate': 0},
+    )
+
+    assert broadcaster.voted == 1
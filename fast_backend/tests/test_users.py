@@ -1,5 +1,7 @@
 from http import HTTPStatus
 
+import pytest
+
 from src.schemas import UserPublic
 from src.security import create_access_token
 
@@ -84,6 +86,15 @@ def test_get_users_with_users(client, user):
     assert response.json() == {'users': [user_schema]}
 
 
+def test_get_users_pagination(client, user, other_user):
+    other_schema = UserPublic.model_validate(other_user).model_dump()
+    response = client.get('/users', params={'limit': 100, 'offset': 1})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/json'
+    assert response.json() == {'users': [other_schema]}
+
+
 def test_get_user_by_id(client, user):
     user_schema = UserPublic.model_validate(user).model_dump()
     response = client.get(f'/users/{user.id}')
@@ -107,7 +118,7 @@ def test_update_user(client, user, token):
             'username': 'test2',
             'password': 'test2',
             'email': 'test2@test.com',
-            'statusVotacao': False,
+            'statusVotacao': True,
         },
     )
 
@@ -115,11 +126,29 @@ def test_update_user(client, user, token):
     assert response.json() == {
         'username': 'test2',
         'email': 'test2@test.com',
-        'statusVotacao': False,
+        'statusVotacao': True,
         'id': user.id,
     }
 
 
+@pytest.mark.parametrize('method', ['put', 'patch'])
+def test_update_user_cannot_change_voting_status(client, user, token, method):
+    response = client.request(
+        method.upper(),
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': user.username,
+            'password': 'test2',
+            'email': user.email,
+            'statusVotacao': False,
+        },
+    )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert response.json() == {'detail': 'Voting status cannot be changed'}
+
+
 def test_update_integrity_error(client, user, other_user, token):
     response_update = client.put(
         f'/users/{user.id}',
@@ -212,16 +241,26 @@ def test_parcial_update_user_with_wrong_user(client, other_user, token):
     assert response.json() == {'detail': 'Not enough permissions'}
 
 
-def test_delete_user(client, user, token):
+def test_delete_user(client, voter, voter_token):
     response = client.delete(
-        f'/users/{user.id}',
-        headers={'Authorization': f'Bearer {token}'},
+        f'/users/{voter.id}',
+        headers={'Authorization': f'Bearer {voter_token}'},
     )
 
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {'message': 'User deleted'}
 
 
+def test_delete_user_who_has_voted(client, user, token):
+    response = client.delete(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Users who have voted cannot be deleted'}
+
+
 def test_delete_user_with_wrong_user(client, other_user, token):
     response = client.delete(
         f'/users/{other_user.id}',
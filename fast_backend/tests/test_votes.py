@@ -0,0 +1,190 @@
+import base64
+import hashlib
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import select
+
+from src import voting
+from src.models import Ballot, Tally, User
+from src.voting import TALLY_ID, idempotency_hash
+
+
+def test_cast_vote(client, voter, voter_token):
+    response = client.post(
+        '/votes/',
+        headers={'Authorization': f'Bearer {voter_token}'},
+        json={'candidate': 2},
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert len(response.json()['ballot_hash']) == 64  # noqa: PLR2004
+
+
+@pytest.mark.asyncio
+async def test_cast_vote_flips_status_and_updates_tally(
+    client, session, crypto, voter, voter_token
+):
+    client.post(
+        '/votes/',
+        headers={'Authorization': f'Bearer {voter_token}'},
+        json={'candidate': 1},
+    )
+
+    user = await session.scalar(
+        select(User).where(User.id == voter.id).execution_options(populate_existing=True)
+    )
+    tally = await session.get(Tally, TALLY_ID)
+    ballots = (await session.scalars(select(Ballot))).all()
+
+    assert user.statusVotacao is True
+    assert tally.ballots == 1
+    assert crypto.decrypt(tally.ciphertext) == [0, 1, 0, 0]
+    assert len(ballots) == 1
+
+
+@pytest.mark.asyncio
+async def test_votes_are_summed(client, session, crypto, voter_token, other_user):
+    other_user.statusVotacao = False
+    await session.commit()
+    other_token = client.post(
+        '/auth/token',
+        data={'username': other_user.email, 'password': other_user.clean_password},
+    ).json()['access_token']
+
+    for token, candidate in ((voter_token, 3), (other_token, 3)):
+        response = client.post(
+            '/votes/',
+            headers={'Authorization': f'Bearer {token}'},
+            json={'candidate': candidate},
+        )
+        assert response.status_code == HTTPStatus.CREATED
+
+    tally = await session.get(Tally, TALLY_ID)
+    assert tally.ballots == 2  # noqa: PLR2004
+    assert crypto.decrypt(tally.ciphertext) == [0, 0, 0, 2]
+
+
+def test_cast_vote_twice_returns_conflict(client, voter, voter_token):
+    headers = {'Authorization': f'Bearer {voter_token}'}
+    client.post('/votes/', headers=headers, json={'candidate': 0})
+
+    response = client.post('/votes/', headers=headers, json={'candidate': 1})
+
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'User already voted'}
+
+
+def test_cannot_reset_status_to_vote_again(client, voter, voter_token):
+    headers = {'Authorization': f'Bearer {voter_token}'}
+    client.post('/votes/', headers=headers, json={'candidate': 0})
+
+    reset = client.patch(
+        f'/users/{voter.id}',
+        headers=headers,
+        json={
+            'username': voter.username,
+            'password': voter.clean_password,
+            'email': voter.email,
+            'statusVotacao': False,
+        },
+    )
+    response = client.post('/votes/', headers=headers, json={'candidate': 1})
+
+    assert reset.status_code == HTTPStatus.FORBIDDEN
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+def test_cast_vote_retry_with_same_idempotency_key(client, voter, voter_token):
+    headers = {
+        'Authorization': f'Bearer {voter_token}',
+        'Idempotency-Key': 'b7f1c7e2-retry',
+    }
+    first = client.post('/votes/', headers=headers, json={'candidate': 0})
+
+    retry = client.post('/votes/', headers=headers, json={'candidate': 0})
+
+    assert first.status_code == HTTPStatus.CREATED
+    assert retry.status_code == HTTPStatus.OK
+    assert retry.json() == first.json()
+
+
+def test_idempotency_hash_depends_on_server_secret(monkeypatch):
+    plain = hashlib.sha256(b'1:b7f1c7e2-retry').hexdigest()
+    key_hash = idempotency_hash(1, 'b7f1c7e2-retry')
+    monkeypatch.setattr(voting.settings, 'SECRET_KEY', 'other-secret')
+
+    assert key_hash != plain
+    assert idempotency_hash(1, 'b7f1c7e2-retry') != key_hash
+
+
+def test_cast_vote_user_already_marked_as_voted(client, user, token):
+    response = client.post(
+        '/votes/',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'candidate': 0},
+    )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+def test_cast_vote_invalid_candidate(client, voter, voter_token):
+    response = client.post(
+        '/votes/',
+        headers={'Authorization': f'Bearer {voter_token}'},
+        json={'candidate': 4},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': 'Invalid candidate'}
+
+
+def test_cast_vote_requires_authentication(client):
+    response = client.post('/votes/', json={'candidate': 0})
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('client_ciphertexts')
+async def test_cast_client_encrypted_vote(client, session, crypto, voter, voter_token):
+    ballot = base64.b64encode(crypto.encrypt_vote(2)).decode()
+
+    response = client.post(
+        '/votes/',
+        headers={'Authorization': f'Bearer {voter_token}'},
+        json={'ciphertext': ballot},
+    )
+
+    tally = await session.get(Tally, TALLY_ID)
+    assert response.status_code == HTTPStatus.CREATED
+    assert crypto.decrypt(tally.ciphertext) == [0, 0, 1, 0]
+
+
+@pytest.mark.parametrize(
+    'body',
+    [
+        {'ciphertext': base64.b64encode(b'not a ballot').decode()},
+        {'ciphertext': 'not base64!'},
+        {'candidate': 1, 'ciphertext': base64.b64encode(b'[0, 1, 0, 0]').decode()},
+        {},
+    ],
+)
+@pytest.mark.usefixtures('client_ciphertexts')
+def test_cast_vote_rejects_invalid_ballot(client, voter, voter_token, body):
+    response = client.post(
+        '/votes/', headers={'Authorization': f'Bearer {voter_token}'}, json=body
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_client_encryption_disabled_by_default(client, crypto, voter, voter_token):
+    response = client.post(
+        '/votes/',
+        headers={'Authorization': f'Bearer {voter_token}'},
+        json={'ciphertext': base64.b64encode(crypto.encrypt_vote(0)).decode()},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': 'Client-side encryption is disabled'}
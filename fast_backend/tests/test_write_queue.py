@@ -0,0 +1,224 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import event, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from src import tracing
+from src.app import app
+from src.archive import get_ballot_archive
+from src.crypto import get_crypto
+from src.database import enable_sqlite_savepoints, get_session
+from src.models import Ballot, Tally, User, table_registry
+from src.security import create_access_token
+from src.voting import TALLY_ID
+from src.write_queue import WriteCoalescer, get_vote_queue
+
+
+@pytest_asyncio.fixture
+async def file_engine(tmp_path):
+    """
+    Banco em arquivo: o group commit precisa de conexões independentes,
+    que o banco em memória com StaticPool dos demais testes não oferece.
+    """
+    engine = create_async_engine(f'sqlite+aiosqlite:///{tmp_path / "votes.db"}')
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def vote_engine(file_engine):
+    engine = create_async_engine(file_engine.url)
+    enable_sqlite_savepoints(engine, begin='BEGIN IMMEDIATE')
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def coalescer_factory(vote_engine):
+    return lambda: WriteCoalescer(
+        lambda: AsyncSession(vote_engine, expire_on_commit=False), window=0.01
+    )
+
+
+@pytest_asyncio.fixture
+async def coalescer(coalescer_factory):
+    queue = coalescer_factory()
+    await queue.start()
+    yield queue
+    await queue.stop()
+
+
+def _count_commits(engine):
+    commits = []
+    event.listen(engine.sync_engine, 'commit', lambda conn: commits.append(1))
+    return commits
+
+
+async def _insert_user(session, username):
+    await session.execute(
+        insert(User).values(
+            username=username,
+            password='x',
+            email=f'{username}@test.com',
+            statusVotacao=False,
+        )
+    )
+
+
+@pytest.mark.asyncio
+async def test_coalescer_commits_concurrent_writes_once(
+    coalescer, file_engine, vote_engine
+):
+    commits = _count_commits(vote_engine)
+
+    results = await asyncio.gather(
+        *(coalescer.submit(lambda s, n=n: _insert_user(s, f'u{n}')) for n in range(20))
+    )
+
+    async with AsyncSession(file_engine) as session:
+        total = await session.scalar(select(func.count()).select_from(User))
+
+    assert results == [None] * 20
+    assert total == 20  # noqa: PLR2004
+    assert len(commits) == 1
+
+
+@pytest.mark.asyncio
+async def test_coalescer_failed_operation_only_rolls_back_itself(coalescer, file_engine):
+    async def duplicated(session):
+        await _insert_user(session, 'dup')
+
+    results = await asyncio.gather(
+        coalescer.submit(duplicated),
+        coalescer.submit(duplicated),
+        coalescer.submit(lambda s: _insert_user(s, 'other')),
+        return_exceptions=True,
+    )
+
+    async with AsyncSession(file_engine) as session:
+        names = set((await session.scalars(select(User.username))).all())
+
+    assert results[0] is None
+    assert isinstance(results[1], Exception)
+    assert results[2] is None
+    assert names == {'dup', 'other'}
+
+
+@pytest.mark.asyncio
+async def test_stop_waits_for_batch_being_committed(coalescer_factory, file_engine):
+    queue = coalescer_factory()
+    await queue.start()
+    entered, release = asyncio.Event(), asyncio.Event()
+
+    async def slow(session):
+        entered.set()
+        await release.wait()
+        await _insert_user(session, 'slow')
+
+    first = asyncio.create_task(queue.submit(slow))
+    await entered.wait()
+    # Entra na fila durante o commit do primeiro lote
+    second = asyncio.create_task(queue.submit(lambda s: _insert_user(s, 'late')))
+    await asyncio.sleep(0)
+    stopping = asyncio.create_task(queue.stop())
+    await asyncio.sleep(0)
+    release.set()
+    await stopping
+
+    async with AsyncSession(file_engine) as session:
+        names = set((await session.scalars(select(User.username))).all())
+
+    assert await first is None
+    assert await second is None
+    assert names == {'slow', 'late'}
+    with pytest.raises(RuntimeError, match='not running'):
+        await queue.submit(lambda s: _insert_user(s, 'after'))
+
+
+@pytest.mark.asyncio
+async def test_cancelled_consumer_cancels_pending_votes(coalescer_factory):
+    queue = coalescer_factory()
+    await queue.start()
+    entered = asyncio.Event()
+
+    async def stuck(session):
+        entered.set()
+        await asyncio.Event().wait()
+
+    vote = asyncio.create_task(queue.submit(stuck))
+    await entered.wait()
+    queue._task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await vote
+
+
+@pytest.mark.asyncio
+async def test_operations_run_in_the_submitter_trace(coalescer, vote_engine):
+    tracing.instrument_engine(vote_engine)
+    tracer = tracing.Tracer(buffer_size=10)
+
+    with tracer.trace('POST /votes/'):
+        await coalescer.submit(lambda s: _insert_user(s, 'traced'))
+
+    [trace] = tracer.buffer.snapshot()
+    statements = [span['statement'] for span in trace['spans'] if span['kind'] == 'db']
+    assert any(statement.startswith('INSERT') for statement in statements)
+
+
+@pytest.mark.asyncio
+async def test_coalescer_requires_start(coalescer_factory):
+    queue = coalescer_factory()
+
+    with pytest.raises(RuntimeError):
+        await queue.submit(lambda s: _insert_user(s, 'x'))
+
+
+@pytest.mark.asyncio
+async def test_vote_route_through_group_commit(file_engine, coalescer_factory, crypto):
+    async with AsyncSession(file_engine, expire_on_commit=False) as setup:
+        for n in range(3):
+            await _insert_user(setup, f'voter{n}')
+        await setup.commit()
+
+    async def session_override():
+        async with AsyncSession(file_engine, expire_on_commit=False) as session:
+            yield session
+
+    queue = coalescer_factory()
+    app.dependency_overrides[get_session] = session_override
+    app.dependency_overrides[get_crypto] = lambda: crypto
+    app.dependency_overrides[get_vote_queue] = lambda: queue
+    app.dependency_overrides[get_ballot_archive] = lambda: None
+
+    def vote(n):
+        token = create_access_token({'sub': f'voter{n}@test.com'})
+        return client.post(
+            '/votes/',
+            headers={'Authorization': f'Bearer {token}'},
+            json={'candidate': n % 2},
+        )
+
+    try:
+        with TestClient(app) as client:
+            client.portal.call(queue.start)
+            statuses = [vote(n).status_code for n in range(3)]
+            repeated = vote(0)
+            client.portal.call(queue.stop)
+    finally:
+        app.dependency_overrides.clear()
+
+    async with AsyncSession(file_engine) as session:
+        tally = await session.get(Tally, TALLY_ID)
+        ballots = await session.scalar(select(func.count()).select_from(Ballot))
+
+    assert statuses == [HTTPStatus.CREATED] * 3
+    assert repeated.status_code == HTTPStatus.CONFLICT
+    assert ballots == 3  # noqa: PLR2004
+    assert crypto.decrypt(tally.ciphertext) == [2, 1, 0, 0]
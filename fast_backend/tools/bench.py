@@ -0,0 +1,411 @@
+"""
+Benchmarks dos caminhos quentes com comparação contra um baseline versionado.
+
+Mede rotas da API (em processo, httpx.ASGITransport), hash e verificação
+argon2, escritas no banco (SQLite em arquivo, WAL), a montagem de um lote
+de cédulas com várias disputas (src.ballots) e as operações do OpenFHE
+(puladas se o openfhe não estiver instalado). Cada caso roda `rounds`
+rodadas de `number` chamadas, com `number` calibrado para a rodada durar
+pelo menos `min_time`; o tempo por chamada de cada rodada é uma amostra.
+
+A comparação é robusta a ruído: um caso só regrediu quando a mediana piorou
+mais que `threshold` E os intervalos interquartis (q1-q3) do baseline e da
+medição atual não se sobrepõem. Uma variação grande com intervalos
+sobrepostos aparece como "ruído" e não falha. Com regressão, a saída mostra
+a tabela de diferenças e o código de saída é 1.
+
+Um caso do baseline que não foi medido (renomeado, removido, ou do OpenFHE
+sem o openfhe instalado) aparece como "missing" e também dá código de saída
+1, a menos que se passe --allow-missing; os de grupos fora de --only não
+contam.
+
+O baseline (tools/bench_baseline.json) só vale para o ambiente onde foi
+gravado; o relatório avisa quando o ambiente é outro. --update regrava os
+casos medidos, mantendo os demais.
+
+Uso:
+    python -m tools.bench
+    python -m tools.bench --only hash db --rounds 30 --json atual.json
+    python -m tools.bench --update
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import math
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+import numpy as np
+from sqlalchemy import insert, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.app import app, settings
+from src.ballots import BallotLayout
+from src.crypto import CryptoService
+from src.database import create_engine_for, get_read_session, get_session
+from src.models import User, table_registry
+from src.security import get_password_hash, verify_password
+
+BASELINE = Path(__file__).parent / 'bench_baseline.json'
+PASSWORD = 'benchmark'
+SEEDED_USERS = 1000
+# Lote de cédulas com três disputas, montado e conferido de uma vez
+BALLOT_RACES = (8, 5, 3)
+BALLOT_BATCH = 5000
+# Teto de chamadas por rodada, para casos de microssegundos
+MAX_NUMBER = 10_000
+
+Case = Callable[[], Awaitable[object]]
+
+
+@dataclass
+class Measurement:
+    number: int
+    samples: list[float]
+
+    def summary(self) -> dict:
+        q1, median, q3 = statistics.quantiles(self.samples, n=4, method='inclusive')
+        mad = statistics.median(abs(sample - median) for sample in self.samples)
+        return {
+            'rounds': len(self.samples),
+            'number': self.number,
+            'median_ms': round(median * 1e3, 4),
+            'q1_ms': round(q1 * 1e3, 4),
+            'q3_ms': round(q3 * 1e3, 4),
+            'mad_ms': round(mad * 1e3, 4),
+            'min_ms': round(min(self.samples) * 1e3, 4),
+        }
+
+
+async def measure(case: Case, rounds: int, min_time: float) -> Measurement:
+    """Calibra `number`, descarta uma rodada de aquecimento e mede `rounds`."""
+
+    async def batch(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            await case()
+        return time.perf_counter() - start
+
+    once = await batch(1)
+    number = min(MAX_NUMBER, max(1, math.ceil(min_time / max(once, 1e-9))))
+    await batch(number)
+    samples = [await batch(number) / number for _ in range(rounds)]
+    return Measurement(number, samples)
+
+
+@asynccontextmanager
+async def hash_cases():
+    hashed = get_password_hash(PASSWORD)
+
+    async def hash_password():
+        get_password_hash(PASSWORD)
+
+    async def verify():
+        verify_password(PASSWORD, hashed)
+
+    yield {'hash.argon2_hash': hash_password, 'hash.argon2_verify': verify}
+
+
+@asynccontextmanager
+async def _temporary_engine(prefix: str):
+    with tempfile.TemporaryDirectory(prefix=prefix) as tmp:
+        engine = create_engine_for(f'sqlite+aiosqlite:///{Path(tmp) / "bench.db"}')
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+            await conn.execute(
+                insert(User),
+                [
+                    {
+                        'username': f'bench{n}',
+                        'email': f'bench{n}@bench.com',
+                        'password': 'x',
+                        'statusVotacao': False,
+                    }
+                    for n in range(SEEDED_USERS)
+                ],
+            )
+        try:
+            yield engine
+        finally:
+            await engine.dispose()
+
+
+@asynccontextmanager
+async def db_cases():
+    async with _temporary_engine('bench-db-') as engine:
+        names = itertools.count()
+        voters = itertools.cycle(range(1, SEEDED_USERS + 1))
+
+        async def insert_user():
+            n = next(names)
+            async with AsyncSession(engine) as session:
+                session.add(
+                    User(
+                        username=f'novo{n}',
+                        email=f'novo{n}@bench.com',
+                        password='x',
+                        statusVotacao=False,
+                    )
+                )
+                await session.commit()
+
+        async def mark_voted():
+            # O UPDATE condicional do voto, alternando o estado para repetir
+            async with AsyncSession(engine) as session:
+                await session.execute(
+                    update(User)
+                    .where(User.id == next(voters))
+                    .values(statusVotacao=~User.statusVotacao)
+                )
+                await session.commit()
+
+        yield {'db.insert_user': insert_user, 'db.mark_voted': mark_voted}
+
+
+@asynccontextmanager
+async def api_cases():
+    async with _temporary_engine('bench-api-') as engine:
+
+        async def get_session_override():
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport, base_url='http://bench'
+            ) as client:
+
+                async def get_user():
+                    response = await client.get('/users/1')
+                    response.raise_for_status()
+
+                async def list_users():
+                    response = await client.get('/users/', params={'limit': 100})
+                    response.raise_for_status()
+
+                yield {'api.get_user': get_user, 'api.list_users': list_users}
+        finally:
+            app.dependency_overrides.pop(get_session, None)
+            app.dependency_overrides.pop(get_read_session, None)
+
+
+@asynccontextmanager
+async def fhe_cases():
+    if importlib.util.find_spec('openfhe') is None:
+        yield {}
+        return
+    service = CryptoService.generate(
+        settings.FHE_PLAINTEXT_MODULUS,
+        settings.FHE_MULTIPLICATIVE_DEPTH,
+        settings.ELECTION_CANDIDATES,
+    )
+    ballot = service.encrypt_vote(0)
+
+    async def encrypt():
+        service.encrypt_vote(1)
+
+    async def add():
+        service.add(ballot, ballot)
+
+    async def decrypt():
+        service.decrypt(ballot)
+
+    yield {'fhe.encrypt': encrypt, 'fhe.add': add, 'fhe.decrypt': decrypt}
+
+
+@asynccontextmanager
+async def ballot_cases():
+    layout = BallotLayout(BALLOT_RACES)
+    choices = np.random.default_rng(0).integers(
+        0, layout.races, size=(BALLOT_BATCH, len(BALLOT_RACES))
+    )
+
+    async def encode():
+        layout.validate(layout.encode(choices))
+
+    yield {'ballots.encode_batch': encode}
+
+
+GROUPS = {
+    'api': api_cases,
+    'hash': hash_cases,
+    'db': db_cases,
+    'fhe': fhe_cases,
+    'ballots': ballot_cases,
+}
+
+
+async def run_benchmarks(
+    groups: list[str], rounds: int = 15, min_time: float = 0.05
+) -> dict[str, dict]:
+    results = {}
+    for group in groups:
+        async with GROUPS[group]() as cases:
+            for name, case in cases.items():
+                results[name] = (await measure(case, rounds, min_time)).summary()
+    return results
+
+
+def environment() -> dict:
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'system': platform.system(),
+        'processor': platform.processor() or platform.machine(),
+    }
+
+
+@dataclass
+class Change:
+    name: str
+    baseline: dict | None
+    current: dict | None
+    status: str
+
+    @property
+    def ratio(self) -> float | None:
+        if not self.baseline or not self.current:
+            return None
+        return self.current['median_ms'] / self.baseline['median_ms']
+
+
+def classify(baseline: dict, current: dict, threshold: float) -> str:
+    ratio = current['median_ms'] / baseline['median_ms']
+    if ratio > 1 + threshold:
+        return 'regression' if current['q1_ms'] > baseline['q3_ms'] else 'noise'
+    if ratio < 1 / (1 + threshold):
+        return 'faster' if current['q3_ms'] < baseline['q1_ms'] else 'noise'
+    return 'ok'
+
+
+def compare(
+    baseline: dict, current: dict, threshold: float, groups: list[str] | None = None
+) -> list[Change]:
+    """
+    Compara os casos medidos agora. Os do baseline que não foram medidos
+    saem como "missing", menos os de grupos fora de `groups` (--only).
+    """
+    changes = [
+        Change(
+            name,
+            baseline.get(name),
+            result,
+            classify(baseline[name], result, threshold) if name in baseline else 'new',
+        )
+        for name, result in current.items()
+    ]
+    changes.extend(
+        Change(name, result, None, 'missing')
+        for name, result in baseline.items()
+        if name not in current and (groups is None or name.split('.')[0] in groups)
+    )
+    return sorted(changes, key=lambda change: change.name)
+
+
+def render(changes: list[Change]) -> str:
+    lines = [
+        f'{"caso":<22}{"baseline ms":>13}{"atual ms":>11}{"iqr atual":>18}'
+        f'{"variação":>10}  situação'
+    ]
+    for change in changes:
+        current = change.current
+        before = f'{change.baseline["median_ms"]:.3f}' if change.baseline else '-'
+        after = f'{current["median_ms"]:.3f}' if current else '-'
+        ratio = f'{change.ratio - 1:+.1%}' if change.ratio is not None else '-'
+        iqr = f'{current["q1_ms"]:.3f}-{current["q3_ms"]:.3f}' if current else '-'
+        lines.append(
+            f'{change.name:<22}{before:>13}{after:>11}{iqr:>18}'
+            f'{ratio:>10}  {change.status}'
+        )
+    return '\n'.join(lines)
+
+
+def load(path: Path) -> dict:
+    if not path.exists():
+        return {'environment': {}, 'benchmarks': {}}
+    return json.loads(path.read_text(encoding='utf-8'))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--only', nargs='+', choices=list(GROUPS), default=list(GROUPS))
+    parser.add_argument('--rounds', type=int, default=15)
+    parser.add_argument('--min-time', type=float, default=0.05, help='s por rodada')
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument(
+        '--threshold', type=float, default=0.25, help='piora tolerada da mediana'
+    )
+    parser.add_argument('--json', type=Path, default=None, help='salva a medição')
+    parser.add_argument(
+        '--update', action='store_true', help='grava a medição no baseline'
+    )
+    parser.add_argument(
+        '--allow-missing',
+        action='store_true',
+        help='não falha por casos do baseline que não foram medidos',
+    )
+    args = parser.parse_args(argv)
+
+    current = {
+        'environment': environment(),
+        'benchmarks': asyncio.run(run_benchmarks(args.only, args.rounds, args.min_time)),
+    }
+    if args.json:
+        args.json.write_text(json.dumps(current, indent=2) + '\n', encoding='utf-8')
+
+    baseline = load(args.baseline)
+    if args.update:
+        # Mantém os casos não medidos agora (de grupos fora de --only)
+        baseline['benchmarks'].update(current['benchmarks'])
+        baseline['environment'] = current['environment']
+        args.baseline.write_text(
+            json.dumps(baseline, indent=2, sort_keys=True) + '\n', encoding='utf-8'
+        )
+        print(f'Baseline gravado em {args.baseline}')
+        return 0
+
+    if baseline['environment'] and baseline['environment'] != current['environment']:
+        print(
+            'Aviso: baseline gravado em outro ambiente '
+            f'({baseline["environment"]}); as diferenças podem não ser regressões',
+            file=sys.stderr,
+        )
+    changes = compare(
+        baseline['benchmarks'], current['benchmarks'], args.threshold, args.only
+    )
+    print(render(changes))
+    failed = False
+    regressions = [change.name for change in changes if change.status == 'regression']
+    if regressions:
+        print(
+            f'\n{len(regressions)} regressão(ões) acima de {args.threshold:.0%}: '
+            + ', '.join(regressions),
+            file=sys.stderr,
+        )
+        failed = True
+    missing = [change.name for change in changes if change.status == 'missing']
+    if missing:
+        print(
+            f'\n{len(missing)} caso(s) do baseline não medido(s): ' + ', '.join(missing),
+            file=sys.stderr,
+        )
+        failed = failed or not args.allow_missing
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
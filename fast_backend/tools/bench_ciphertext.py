@@ -0,0 +1,86 @@
+"""
+Benchmark do tamanho das cédulas cifradas e do custo de reduzi-lo.
+
+Para cada profundidade multiplicativa mede a cédula recém-cifrada (todas as
+torres RNS), a compactada para STORAGE_TOWERS (o que o CryptoService grava)
+e as duas depois do zlib, com o custo de CPU de cada passo por cédula.
+
+Os coeficientes do BFV são praticamente uniformes, então o zlib ganha pouco
+(só os bits altos zerados de cada palavra de 64 bits) e custa milissegundos
+por cédula; a compactação de torres é que reduz o tamanho de fato.
+
+Uso:
+    python -m tools.bench_ciphertext --depths 0 1 --rounds 20
+"""
+
+import argparse
+import statistics
+import time
+import zlib
+
+from src.crypto import STORAGE_TOWERS, CryptoService
+
+
+def timed(function, rounds: int):
+    """Último resultado e mediana, em segundos, de `rounds` chamadas."""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, statistics.median(timings)
+
+
+def measure(depth: int, plaintext_modulus: int, rounds: int, level: int) -> dict:
+    service = CryptoService.generate(plaintext_modulus, depth, slots=8)
+    context = service.context
+    plaintext = context.MakePackedPlaintext([0, 1, 0, 0, 0, 0, 0, 0])
+
+    fresh, encrypt = timed(lambda: context.Encrypt(service.public_key, plaintext), rounds)
+    compacted, compact = timed(lambda: context.Compress(fresh, STORAGE_TOWERS), rounds)
+    raw = service.serialize(fresh)
+    stored = service.serialize(compacted)
+    raw_zlib, _ = timed(lambda: zlib.compress(raw, level), rounds)
+    stored_zlib, deflate = timed(lambda: zlib.compress(stored, level), rounds)
+    _, inflate = timed(lambda: zlib.decompress(stored_zlib), rounds)
+
+    return {
+        'depth': depth,
+        'ring': context.GetRingDimension(),
+        'raw_bytes': len(raw),
+        'raw_zlib_bytes': len(raw_zlib),
+        'stored_bytes': len(stored),
+        'stored_zlib_bytes': len(stored_zlib),
+        'encrypt_ms': encrypt * 1e3,
+        'compact_ms': compact * 1e3,
+        'deflate_ms': deflate * 1e3,
+        'inflate_ms': inflate * 1e3,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--depths', type=int, nargs='+', default=[0, 1])
+    parser.add_argument('--plaintext-modulus', type=int, default=65537)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--level', type=int, default=6, help='nível do zlib')
+    args = parser.parse_args()
+
+    print(
+        f'{"prof.":>6}{"anel":>6}{"bruta":>10}{"+zlib":>10}{"compacta":>10}'
+        f'{"+zlib":>10}{"economia":>10}{"cifrar ms":>11}{"compactar ms":>14}'
+        f'{"zlib ms":>9}{"unzlib ms":>11}'
+    )
+    for depth in args.depths:
+        row = measure(depth, args.plaintext_modulus, args.rounds, args.level)
+        saved = 1 - row['stored_bytes'] / row['raw_bytes']
+        print(
+            f'{row["depth"]:>6}{row["ring"]:>6}{row["raw_bytes"]:>10}'
+            f'{row["raw_zlib_bytes"]:>10}{row["stored_bytes"]:>10}'
+            f'{row["stored_zlib_bytes"]:>10}{saved:>9.1%} {row["encrypt_ms"]:>10.2f}'
+            f'{row["compact_ms"]:>14.3f}{row["deflate_ms"]:>9.2f}{row["inflate_ms"]:>11.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark do custo de serialização por item da listagem de usuários.
+
+Compara o caminho antigo de get_users (entidades ORM completas validadas uma
+a uma por UserPublic com from_attributes e codificadas pelo FastAPI com
+json.dumps) com o caminho rápido (só as colunas públicas, um TypeAdapter
+sobre a lista inteira e dump_json do pydantic-core).
+
+Uso:
+    python -m tools.bench_serialization --sizes 100 1000 10000
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.models import User, table_registry
+from src.routers.users import PUBLIC_COLUMNS, user_list_adapter
+from src.schemas import UserList
+
+
+async def legacy_path(session: AsyncSession, limit: int) -> bytes:
+    users = (await session.scalars(select(User).limit(limit))).all()
+    validated = UserList.model_validate({'users': users})
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+
+async def fast_path(session: AsyncSession, limit: int) -> bytes:
+    result = await session.execute(select(*PUBLIC_COLUMNS).limit(limit))
+    users = user_list_adapter.validate_python(
+        {'users': result.all()}, from_attributes=True
+    )
+    return user_list_adapter.dump_json(users)
+
+
+async def measure(engine, path, limit: int, rounds: int) -> float:
+    """Mediana, em segundos, de `rounds` execuções com sessão nova."""
+    timings = []
+    for _ in range(rounds):
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            start = time.perf_counter()
+            await path(session, limit)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+async def run(sizes: list[int], rounds: int) -> list[dict]:
+    engine = create_async_engine('sqlite+aiosqlite:///:memory:', poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    'username': f'user{n}',
+                    'password': 'x' * 97,
+                    'email': f'user{n}@example.com',
+                    'statusVotacao': n % 2 == 0,
+                }
+                for n in range(max(sizes))
+            ],
+        )
+
+    results = []
+    for size in sizes:
+        legacy = await measure(engine, legacy_path, size, rounds)
+        fast = await measure(engine, fast_path, size, rounds)
+        results.append({
+            'items': size,
+            'legacy_us_per_item': legacy / size * 1e6,
+            'fast_us_per_item': fast / size * 1e6,
+            'speedup': legacy / fast,
+        })
+    await engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--rounds', type=int, default=15)
+    args = parser.parse_args()
+
+    print(f'{"itens":>8}{"antigo µs/item":>16}{"rápido µs/item":>16}{"ganho":>8}')
+    for row in asyncio.run(run(args.sizes, args.rounds)):
+        print(
+            f'{row["items"]:>8}{row["legacy_us_per_item"]:>16.2f}'
+            f'{row["fast_us_per_item"]:>16.2f}{row["speedup"]:>7.1f}x'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""
+Gerador de carga assíncrono para a API.
+
+Executa usuários virtuais concorrentes contra o app ASGI, em processo
+(httpx.ASGITransport) ou por um socket local (uvicorn), sobre um banco
+SQLite temporário, e reporta vazão e latências p50/p95/p99 por rota.
+O passo de voto usa as chaves BFV de KEYS_DIR (geradas na primeira vez).
+
+Uso:
+    python -m tools.loadtest --users 50 --duration 30
+    python -m tools.loadtest --mode socket --users 200 --duration 60 --json out.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import tempfile
+import time
+from collections import Counter, defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from pathlib import Path
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from src.app import app, settings
+from src.archive import BallotArchive, get_ballot_archive
+from src.database import (
+    Engines,
+    create_engine_for,
+    enable_sqlite_savepoints,
+    get_engines,
+    get_read_session,
+    get_session,
+)
+from src.models import table_registry
+from src.ratelimit import build_login_guard, get_login_guard
+
+PASSWORD = 'loadtest'
+CANDIDATES = 4
+LOGIN_ATTEMPTS = 5
+
+# Peso de cada ação no laço de um usuário virtual após cadastro e login
+ACTIONS = {
+    'list_users': 5,
+    'get_user': 3,
+    'refresh': 2,
+    'vote': 1,
+}
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    """Percentil pelo método nearest-rank sobre amostras já ordenadas."""
+    if not samples:
+        return 0.0
+    rank = math.ceil(pct / 100 * len(samples))
+    return samples[max(rank, 1) - 1]
+
+
+@dataclass
+class RouteStats:
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> dict:
+        samples = sorted(self.latencies)
+        return {
+            'requests': len(samples),
+            'errors': self.errors,
+            'throughput': len(samples) / elapsed if elapsed else 0.0,
+            'mean_ms': sum(samples) / len(samples) * 1000 if samples else 0.0,
+            'p50_ms': percentile(samples, 50) * 1000,
+            'p95_ms': percentile(samples, 95) * 1000,
+            'p99_ms': percentile(samples, 99) * 1000,
+            'max_ms': samples[-1] * 1000 if samples else 0.0,
+            'statuses': dict(self.statuses),
+        }
+
+
+@dataclass
+class LoadReport:
+    users: int
+    elapsed: float
+    routes: dict[str, RouteStats] = field(default_factory=lambda: defaultdict(RouteStats))
+
+    def record(self, route: str, elapsed: float, status: int | None, expected: set[int]):
+        stats = self.routes[route]
+        stats.latencies.append(elapsed)
+        stats.statuses[status or 'error'] += 1
+        if status not in expected:
+            stats.errors += 1
+
+    def as_dict(self) -> dict:
+        total = sum(len(s.latencies) for s in self.routes.values())
+        return {
+            'users': self.users,
+            'elapsed_s': self.elapsed,
+            'requests': total,
+            'throughput': total / self.elapsed if self.elapsed else 0.0,
+            'routes': {
+                route: stats.summary(self.elapsed)
+                for route, stats in sorted(self.routes.items())
+            },
+        }
+
+    def render(self) -> str:
+        data = self.as_dict()
+        lines = [
+            f'{data["users"]} usuários, {data["elapsed_s"]:.1f}s, '
+            f'{data["requests"]} requisições, {data["throughput"]:.1f} req/s',
+            '',
+            f'{"rota":<28}{"reqs":>8}{"erros":>7}{"req/s":>9}'
+            f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}',
+        ]
+        for route, s in data['routes'].items():
+            lines.append(
+                f'{route:<28}{s["requests"]:>8}{s["errors"]:>7}{s["throughput"]:>9.1f}'
+                f'{s["p50_ms"]:>9.1f}{s["p95_ms"]:>9.1f}{s["p99_ms"]:>9.1f}'
+            )
+        return '\n'.join(lines)
+
+
+class VirtualUser:
+    def __init__(self, n: int, client: httpx.AsyncClient, report: LoadReport, rng):
+        self.n = n
+        self.client = client
+        self.report = report
+        self.rng = rng
+        self.user_id = None
+        self.headers = {}
+        # Um endereço por usuário virtual, como eleitores em máquinas
+        # diferentes: o limite de login por cliente vale para cada um
+        self.address = f'10.{n // 65536 % 256}.{n // 256 % 256}.{n % 256}'
+
+    async def _call(self, route: str, expected: set[int], method: str, url: str, **kw):
+        headers = {'X-Forwarded-For': self.address, **kw.pop('headers', {})}
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=headers, **kw)
+        except httpx.HTTPError:
+            self.report.record(route, time.perf_counter() - start, None, expected)
+            return None
+        self.report.record(
+            route, time.perf_counter() - start, response.status_code, expected
+        )
+        return response
+
+    async def register(self):
+        response = await self._call(
+            'POST /users/',
+            {HTTPStatus.CREATED},
+            'POST',
+            '/users/',
+            json={
+                'username': f'load{self.n}',
+                'password': PASSWORD,
+                'email': f'load{self.n}@loadtest.com',
+                'statusVotacao': False,
+            },
+        )
+        if response is not None and response.status_code == HTTPStatus.CREATED:
+            self.user_id = response.json()['id']
+
+    async def login(self):
+        # 429 é a resposta esperada quando o teto de verificações argon2 está
+        # cheio: o usuário virtual espera o Retry-After, como um cliente real
+        for _ in range(LOGIN_ATTEMPTS):
+            response = await self._call(
+                'POST /auth/token',
+                {HTTPStatus.OK, HTTPStatus.TOO_MANY_REQUESTS},
+                'POST',
+                '/auth/token',
+                data={'username': f'load{self.n}@loadtest.com', 'password': PASSWORD},
+            )
+            if response is None or response.status_code != HTTPStatus.TOO_MANY_REQUESTS:
+                break
+            await asyncio.sleep(float(response.headers.get('Retry-After', 1)))
+        if response is not None and response.status_code == HTTPStatus.OK:
+            self.headers = {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+    async def refresh(self):
+        response = await self._call(
+            'POST /auth/refresh_token',
+            {HTTPStatus.OK},
+            'POST',
+            '/auth/refresh_token',
+            headers=self.headers,
+        )
+        if response is not None and response.status_code == HTTPStatus.OK:
+            self.headers = {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+    async def list_users(self):
+        offset = self.rng.randrange(0, max(self.n, 1))
+        await self._call(
+            'GET /users/',
+            {HTTPStatus.OK},
+            'GET',
+            '/users/',
+            params={'limit': 100, 'offset': offset},
+        )
+
+    async def get_user(self):
+        await self._call(
+            'GET /users/{user_id}',
+            {HTTPStatus.OK},
+            'GET',
+            f'/users/{self.user_id}',
+        )
+
+    async def vote(self):
+        # Repetições reenviam a mesma Idempotency-Key, como um cliente que
+        # não recebeu a resposta: o servidor devolve o mesmo comprovante
+        await self._call(
+            'POST /votes/',
+            {HTTPStatus.CREATED, HTTPStatus.OK},
+            'POST',
+            '/votes/',
+            headers={**self.headers, 'Idempotency-Key': f'load-{self.n}'},
+            json={'candidate': self.n % CANDIDATES},
+        )
+
+    async def run(self, deadline: float, think_time: float, iterations: int | None):
+        await self.register()
+        if self.user_id is None:
+            return
+        await self.login()
+        if not self.headers:
+            return
+
+        actions, weights = zip(*ACTIONS.items())
+        done = 0
+        while time.perf_counter() < deadline and (
+            iterations is None or done < iterations
+        ):
+            action = self.rng.choices(actions, weights)[0]
+            await getattr(self, action)()
+            done += 1
+            if think_time:
+                await asyncio.sleep(self.rng.expovariate(1 / think_time))
+
+
+@asynccontextmanager
+async def temporary_database():
+    """Banco SQLite em arquivo temporário, no lugar do banco das configurações."""
+    with tempfile.TemporaryDirectory(prefix='loadtest-') as tmp:
+        url = f'sqlite+aiosqlite:///{Path(tmp) / "loadtest.db"}'
+        engine = create_engine_for(url)
+        read_engine = create_engine_for(url, read_only=True)
+        vote_engine = create_engine_for(url)
+        enable_sqlite_savepoints(vote_engine, begin='BEGIN IMMEDIATE')
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+
+        async def get_session_override():
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                yield session
+
+        async def get_read_session_override():
+            async with AsyncSession(read_engine, expire_on_commit=False) as session:
+                yield session
+
+        # O lifespan monta a fila de votos, o contador de comparecimento e o
+        # aquecimento sobre estes engines, não sobre os das configurações
+        engines = Engines(write=engine, read=read_engine, votes=vote_engine)
+        app.dependency_overrides[get_engines] = lambda: engines
+        app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_read_session_override
+        archive = BallotArchive(Path(tmp) / 'loadtest.ballots')
+        # Limitador novo, com os limites de produção
+        guard = build_login_guard(settings)
+
+        app.dependency_overrides[get_ballot_archive] = lambda: archive
+        app.dependency_overrides[get_login_guard] = lambda: guard
+        try:
+            yield engine
+        finally:
+            app.dependency_overrides.pop(get_engines, None)
+            app.dependency_overrides.pop(get_session, None)
+            app.dependency_overrides.pop(get_read_session, None)
+            app.dependency_overrides.pop(get_ballot_archive, None)
+            app.dependency_overrides.pop(get_login_guard, None)
+            archive.close()
+            await vote_engine.dispose()
+            await read_engine.dispose()
+            await engine.dispose()
+
+
+@asynccontextmanager
+async def asgi_client(users: int):
+    # O X-Forwarded-For de cada usuário virtual vira o endereço do cliente,
+    # como o uvicorn faz no modo socket
+    transport = httpx.ASGITransport(
+        app=ProxyHeadersMiddleware(app), client=('127.0.0.1', 50000)
+    )
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url='http://loadtest'
+        ) as c:
+            yield c
+
+
+@asynccontextmanager
+async def socket_client(users: int):
+    import uvicorn  # noqa: PLC0415
+
+    config = uvicorn.Config(app, host='127.0.0.1', port=0, log_level='warning')
+    server = uvicorn.Server(config)
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f'http://127.0.0.1:{port}', limits=limits
+        ) as c:
+            yield c
+    finally:
+        server.should_exit = True
+        await task
+
+
+async def run_load(  # noqa: PLR0913, PLR0917
+    users: int = 10,
+    duration: float = 10.0,
+    mode: str = 'asgi',
+    ramp_up: float = 0.0,
+    think_time: float = 0.0,
+    iterations: int | None = None,
+    seed: int | None = None,
+) -> LoadReport:
+    rng = random.Random(seed)
+    client_factory = socket_client if mode == 'socket' else asgi_client
+
+    async with temporary_database(), client_factory(users) as client:
+        report = LoadReport(users=users, elapsed=0.0)
+        start = time.perf_counter()
+        deadline = start + ramp_up + duration
+
+        async def start_user(n: int):
+            if ramp_up:
+                await asyncio.sleep(ramp_up * n / users)
+            user = VirtualUser(n, client, report, random.Random(rng.random()))
+            await user.run(deadline, think_time, iterations)
+
+        await asyncio.gather(*(start_user(n) for n in range(users)))
+        report.elapsed = time.perf_counter() - start
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Teste de carga da API.')
+    parser.add_argument('--users', type=int, default=10, help='usuários virtuais')
+    parser.add_argument('--duration', type=float, default=10.0, help='segundos de carga')
+    parser.add_argument('--mode', choices=['asgi', 'socket'], default='asgi')
+    parser.add_argument('--ramp-up', type=float, default=0.0, help='segundos até todos')
+    parser.add_argument('--think-time', type=float, default=0.0, help='pausa média (s)')
+    parser.add_argument('--iterations', type=int, default=None, help='ações por usuário')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument(
+        '--no-group-commit', action='store_true', help='um COMMIT por voto'
+    )
+    parser.add_argument('--json', type=Path, default=None, help='salva o relatório')
+    args = parser.parse_args()
+    if args.no_group_commit:
+        settings.VOTE_GROUP_COMMIT = False
+
+    report = asyncio.run(
+        run_load(
+            users=args.users,
+            duration=args.duration,
+            mode=args.mode,
+            ramp_up=args.ramp_up,
+            think_time=args.think_time,
+            iterations=args.iterations,
+            seed=args.seed,
+        )
+    )
+    print(report.render())
+    if args.json:
+        args.json.write_text(json.dumps(report.as_dict(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,440 @@
+"""
+Reapuração independente do acumulador cifrado.
+
+Lê as cédulas do arquivo de auditoria (src.archive) ou direto da tabela
+votos, soma em paralelo e compara o total com o acumulador guardado em
+apuracoes. Cada processo recebe uma lista de posições (ou ids) e lê as
+cédulas ele mesmo, pelo mmap do arquivo ou por uma conexão SQLite somente
+leitura; só as somas parciais trafegam entre processos, e elas são
+combinadas numa redução em árvore.
+
+Na apuração por CRT (FHE_PLAINTEXT_MODULI) cada tarefa é um par (contexto,
+lote): os contextos somam de forma independente, em processos diferentes, e
+os componentes só são juntados no fim.
+
+A soma homomórfica é exata, então a ordem das parcelas não altera o
+resultado: o total recalculado tem de ser igual ao guardado (comparado na
+forma canônica, ver CryptoService.canonical). Só a chave pública é
+necessária; com --decrypt e a chave secreta em KEYS_DIR os dois totais
+também são decifrados.
+
+A mesma conferência roda como tarefa em segundo plano (src.jobs, tipo
+'retally'), com o progresso e o cancelamento da fila.
+
+Uso:
+    python -m tools.retally
+    python -m tools.retally --source db --workers 8
+    python -m tools.retally --archive /backup/database.ballots --database database.db
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from multiprocessing import Pool
+from pathlib import Path
+
+from sqlalchemy.engine import make_url
+
+from src.archive import ArchiveError, ArchiveReader, default_archive_path
+from src.crypto import (
+    CryptoService,
+    MultiModulusCrypto,
+    attach,
+    key_locations,
+    load_secret,
+)
+from src.settings import Settings
+from src.voting import TALLY_ID
+
+# Estado de cada processo da redução, preenchido por _init_worker
+_worker: dict = {}
+
+Progress = Callable[[int, int], None]
+
+
+class RetallyError(Exception):
+    pass
+
+
+@dataclass
+class Partial:
+    ciphertext: bytes | None
+    ballots: int
+    errors: list[tuple[int, str]] = field(default_factory=list)
+    lane: int = 0
+
+
+@dataclass
+class RetallyReport:
+    source: str
+    ballots: int
+    elapsed: float
+    stored_ballots: int | None
+    matches: bool
+    errors: list[tuple[int, str]] = field(default_factory=list)
+    duplicates: list[int] = field(default_factory=list)
+    missing_from_archive: list[int] = field(default_factory=list)
+    unknown_in_archive: list[int] = field(default_factory=list)
+    truncated_bytes: int = 0
+    recomputed: list[int] | None = None
+    stored: list[int] | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.matches and not (
+            self.errors
+            or self.duplicates
+            or self.missing_from_archive
+            or self.unknown_in_archive
+            or self.truncated_bytes
+        )
+
+    def render(self) -> str:
+        rate = self.ballots / self.elapsed if self.elapsed else 0.0
+        lines = [
+            f'fonte: {self.source}',
+            f'cédulas somadas: {self.ballots} em {self.elapsed:.2f}s ({rate:.1f}/s)',
+            f'cédulas na apuração guardada: {self.stored_ballots}',
+            f'acumulador confere: {"sim" if self.matches else "NÃO"}',
+        ]
+        if self.recomputed is not None:
+            lines.append(f'total recalculado: {self.recomputed}')
+            lines.append(f'total guardado:    {self.stored}')
+        problems = [
+            ('registros ilegíveis', [f'{i}: {msg}' for i, msg in self.errors]),
+            ('ids repetidos no arquivo', self.duplicates),
+            ('cédulas do banco fora do arquivo', self.missing_from_archive),
+            ('cédulas do arquivo fora do banco', self.unknown_in_archive),
+        ]
+        for title, items in problems:
+            if items:
+                lines.append(f'{title} ({len(items)}):')
+                lines.extend(f'  {item}' for item in items[:20])
+                if len(items) > 20:  # noqa: PLR2004
+                    lines.append(f'  ... mais {len(items) - 20}')
+        if self.truncated_bytes:
+            lines.append(f'bytes incompletos no fim do arquivo: {self.truncated_bytes}')
+        lines.append('resultado: OK' if self.ok else 'resultado: DIVERGÊNCIA')
+        return '\n'.join(lines)
+
+    def summary(self) -> dict:
+        return {**asdict(self), 'ok': self.ok}
+
+
+def database_path(url: str) -> Path:
+    path = make_url(url).database
+    if make_url(url).get_backend_name() != 'sqlite' or path in {None, '', ':memory:'}:
+        raise RetallyError(f'Re-tally needs a SQLite database file, got {url}')
+    return Path(path)
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    return sqlite3.connect(f'{path.resolve().as_uri()}?mode=ro', uri=True)
+
+
+def _init_worker(bundles: list[Path], slots: int, archive: Path | None, database: Path):
+    _worker['crypto'] = attach(bundles, slots)
+    _worker['archive'] = ArchiveReader(archive) if archive else None
+    _worker['database'] = database
+
+
+def _archive_payloads(positions: list[int], errors: list):
+    reader = _worker['archive']
+    for position in positions:
+        try:
+            _, payload = reader.read(position)
+        except ArchiveError as exc:
+            errors.append((reader.index()[position][0], str(exc)))
+            continue
+        # O binding do OpenFHE só aceita bytes: a cópia dura uma cédula
+        yield bytes(payload)
+
+
+def _database_payloads(ids: list[int], errors: list):
+    connection = _connect(_worker['database'])
+    try:
+        placeholders = ','.join('?' * len(ids))
+        rows = connection.execute(
+            f'SELECT ciphertext FROM votos WHERE id IN ({placeholders})',
+            ids,
+        )
+        for (ciphertext,) in rows:
+            yield ciphertext
+    finally:
+        connection.close()
+
+
+def _lanes(crypto) -> list:
+    """Um serviço por contexto; sem CRT, o próprio serviço."""
+    return getattr(crypto, 'services', None) or [crypto]
+
+
+def _sum_chunk(task: tuple[int, list[int]]) -> Partial:
+    lane, chunk = task
+    crypto = _worker['crypto']
+    errors = []
+    if _worker['archive'] is not None:
+        payloads = _archive_payloads(chunk, errors)
+    else:
+        payloads = _database_payloads(chunk, errors)
+    if len(_lanes(crypto)) > 1:
+        payloads = (crypto.component(payload, lane) for payload in payloads)
+    ciphertext = _lanes(crypto)[lane].add_all(payloads)
+    return Partial(ciphertext, len(chunk) - len(errors), errors, lane)
+
+
+def _add_pair(pair: tuple[Partial, Partial]) -> Partial:
+    left, right = pair
+    present = [p.ciphertext for p in pair if p.ciphertext is not None]
+    return Partial(
+        _lanes(_worker['crypto'])[left.lane].add_all(present) if present else None,
+        left.ballots + right.ballots,
+        left.errors + right.errors,
+        left.lane,
+    )
+
+
+def _chunks(items: list[int], size: int) -> list[list[int]]:
+    return [items[start : start + size] for start in range(0, len(items), size)]
+
+
+def _reduce(partials: list[Partial], mapper, lanes: int) -> list[Partial]:
+    """
+    Redução em árvore por contexto: soma os parciais de cada contexto dois
+    a dois até sobrar um; os pares de contextos diferentes vão juntos para
+    o pool.
+    """
+    groups = [[p for p in partials if p.lane == lane] for lane in range(lanes)]
+    while any(len(group) > 1 for group in groups):
+        pairs, leftovers = [], []
+        for group in groups:
+            pairs.extend(zip(group[::2], group[1::2]))
+            leftovers.extend(group[-1:] if len(group) % 2 else [])
+        merged = list(mapper(_add_pair, pairs)) + leftovers
+        groups = [[p for p in merged if p.lane == lane] for lane in range(lanes)]
+    return [
+        group[0] if group else Partial(None, 0, lane=lane)
+        for lane, group in enumerate(groups)
+    ]
+
+
+def stderr_progress() -> Progress:
+    start = time.perf_counter()
+
+    def report(done: int, total: int):
+        elapsed = time.perf_counter() - start
+        rate = done / elapsed if elapsed else 0.0
+        sys.stderr.write(f'\r{done}/{total} cédulas  {rate:.1f}/s  {elapsed:.1f}s')
+        sys.stderr.flush()
+
+    return report
+
+
+def _snapshot(database: Path) -> tuple[list[int], bytes | None, int | None]:
+    """
+    Ids das cédulas e acumulador lidos na mesma transação de leitura: um voto
+    gravado durante a reapuração não entra em um sem entrar no outro.
+    """
+    connection = _connect(database)
+    try:
+        connection.execute('BEGIN')
+        ids = [row[0] for row in connection.execute('SELECT id FROM votos ORDER BY id')]
+        row = connection.execute(
+            'SELECT ciphertext, ballots FROM apuracoes WHERE id = ?', (TALLY_ID,)
+        ).fetchone()
+        connection.rollback()
+    finally:
+        connection.close()
+    return (ids, *(row if row is not None else (None, None)))
+
+
+def _plan(db_ids: list[int], archive: Path | None, report: RetallyReport) -> list[int]:
+    """Unidades de trabalho (posições no arquivo ou ids) e conferência de ids."""
+    if archive is None:
+        return db_ids
+
+    reader = ArchiveReader(archive, verify=False)
+    seen, units = set(), []
+    # O arquivo é lido depois do snapshot: ids acima do último dele são votos
+    # gravados durante a reapuração, fora do acumulador conferido
+    last = max(db_ids, default=0)
+    for position, ballot_id in enumerate(reader.ids()):
+        if ballot_id > last:
+            continue
+        if ballot_id in seen:
+            report.duplicates.append(ballot_id)
+            continue
+        seen.add(ballot_id)
+        units.append(position)
+    report.truncated_bytes = reader.truncated
+    reader.close()
+
+    report.missing_from_archive = sorted(set(db_ids) - seen)
+    report.unknown_in_archive = sorted(seen - set(db_ids))
+    return units
+
+
+def _sum_all(
+    crypto, chunks: list[list[int]], mapper, total: int, progress: Progress | None
+) -> Partial:
+    lanes = len(_lanes(crypto))
+    tasks = [(lane, chunk) for chunk in chunks for lane in range(lanes)]
+    partials, done = [], 0
+    for partial in mapper(_sum_chunk, tasks):
+        partials.append(partial)
+        done += partial.ballots
+        if progress is not None:
+            progress(done // lanes, total)
+
+    results = _reduce(partials, mapper, lanes)
+    # Contagens e erros são iguais em todos os contextos: vale o primeiro
+    first = results[0]
+    if lanes > 1 and first.ciphertext is not None:
+        first.ciphertext = crypto.join([result.ciphertext for result in results])
+    return first
+
+
+def retally(  # noqa: PLR0913, PLR0917
+    crypto: CryptoService | MultiModulusCrypto,
+    database: Path,
+    archive: Path | None = None,
+    bundles: list[Path] | None = None,
+    workers: int = 1,
+    chunk_size: int = 256,
+    progress: Progress | None = None,
+    secret: CryptoService | MultiModulusCrypto | None = None,
+) -> RetallyReport:
+    """
+    Com workers=1 tudo roda neste processo com `crypto`; acima disso cada
+    processo anexa aos pacotes públicos `bundles` (src.keystore), um por
+    contexto. `progress(cédulas somadas, total)` é chamado a cada lote, e
+    uma exceção dele interrompe a reapuração.
+    """
+    start = time.perf_counter()
+    report = RetallyReport(
+        source=str(archive or database),
+        ballots=0,
+        elapsed=0.0,
+        stored_ballots=None,
+        matches=False,
+    )
+    db_ids, stored, report.stored_ballots = _snapshot(database)
+    units = _plan(db_ids, archive, report)
+    chunks = _chunks(units, chunk_size)
+
+    if workers > 1:
+        if not bundles:
+            raise ValueError('Parallel re-tally needs the public key bundles')
+        arguments = (bundles, crypto.slots, archive, database)
+        with Pool(workers, _init_worker, arguments) as pool:
+            total = _sum_all(crypto, chunks, pool.imap_unordered, len(units), progress)
+    else:
+        _worker.update(
+            crypto=crypto,
+            archive=ArchiveReader(archive) if archive else None,
+            database=database,
+        )
+        try:
+            total = _sum_all(crypto, chunks, map, len(units), progress)
+        finally:
+            if _worker['archive'] is not None:
+                _worker['archive'].close()
+            _worker.clear()
+
+    report.ballots = total.ballots
+    report.errors = total.errors
+    if stored is None or total.ciphertext is None:
+        report.matches = stored is None and total.ciphertext is None
+    else:
+        report.matches = crypto.canonical(total.ciphertext) == crypto.canonical(stored)
+    report.matches = report.matches and report.stored_ballots in {None, total.ballots}
+
+    if secret is not None and stored is not None and total.ciphertext is not None:
+        report.recomputed = secret.decrypt(total.ciphertext)
+        report.stored = secret.decrypt(stored)
+
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def _inputs(
+    url: str, source: str, archive: Path | None, settings: Settings
+) -> tuple[Path, Path | None, list[Path]]:
+    """Banco, arquivo de auditoria (None com source='db') e pacotes públicos."""
+    database = database_path(url)
+    if source == 'archive':
+        archive = archive or default_archive_path(url)
+        if archive is None or not archive.exists():
+            raise RetallyError(f'Ballot archive not found: {archive}')
+    else:
+        archive = None
+
+    bundles = [bundle for _, _, bundle in key_locations(settings)]
+    for bundle in bundles:
+        if not bundle.exists():
+            raise RetallyError(f'Public key bundle not found: {bundle}')
+    return database, archive, bundles
+
+
+def retally_job(context, params: dict) -> dict:
+    """Tarefa 'retally' da fila (src.jobs). Parâmetros: source, workers, chunk_size."""
+    settings = Settings()
+    database, archive, bundles = _inputs(
+        settings.DATABASE_URL, params.get('source', 'archive'), None, settings
+    )
+    report = retally(
+        attach(bundles, settings.ELECTION_CANDIDATES),
+        database,
+        archive=archive,
+        bundles=bundles,
+        workers=int(params.get('workers', 1)),
+        chunk_size=int(params.get('chunk_size', 256)),
+        progress=context.progress,
+    )
+    return report.summary()
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description='Reapuração independente dos votos.')
+    parser.add_argument('--source', choices=['archive', 'db'], default='archive')
+    parser.add_argument(
+        '--database', default=settings.DATABASE_URL, help='URL ou arquivo SQLite'
+    )
+    parser.add_argument('--archive', type=Path, default=None)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-size', type=int, default=256, help='cédulas por tarefa')
+    parser.add_argument(
+        '--decrypt', action='store_true', help='decifra os totais (chave secreta)'
+    )
+    args = parser.parse_args()
+
+    url = args.database if '://' in args.database else f'sqlite:///{args.database}'
+    try:
+        database, archive, bundles = _inputs(url, args.source, args.archive, settings)
+    except RetallyError as exc:
+        raise SystemExit(str(exc)) from exc
+    crypto = attach(bundles, settings.ELECTION_CANDIDATES)
+    secret = load_secret(settings) if args.decrypt else None
+
+    report = retally(
+        crypto,
+        database,
+        archive=archive,
+        bundles=bundles,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        progress=stderr_progress(),
+        secret=secret,
+    )
+    sys.stderr.write('\n')
+    print(report.render())
+    sys.exit(0 if report.ok else 1)
+
+
+if __name__ == '__main__':
+    main()
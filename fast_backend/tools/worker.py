@@ -0,0 +1,51 @@
+"""
+Processos que executam a fila de tarefas (src.jobs).
+
+Cada processo toma uma tarefa por vez; o número de processos é o limite de
+reapurações e decifragens simultâneas, independente de quantos workers da
+API estão de pé. Pode rodar em outra máquina, desde que veja o mesmo banco
+(e as chaves em KEYS_DIR).
+
+Uso:
+    python -m tools.worker
+    python -m tools.worker --processes 2
+    python -m tools.worker --once
+"""
+
+import argparse
+import logging
+from multiprocessing import Process
+
+from src.jobs import work
+from src.settings import Settings
+
+
+def main():
+    settings = Settings()
+    parser = argparse.ArgumentParser(description='Executa a fila de tarefas.')
+    parser.add_argument(
+        '--processes', type=int, default=settings.JOB_WORKERS, help='tarefas simultâneas'
+    )
+    parser.add_argument(
+        '--once', action='store_true', help='sai quando a fila estiver vazia'
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    processes = [
+        Process(target=work, args=(settings.DATABASE_URL, args.once))
+        for _ in range(max(args.processes, 1))
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+if __name__ == '__main__':
+    main()